@@ -3,43 +3,73 @@ import json
 import re
 import sys
 import io
-import contextlib
+import time
 import warnings
-from typing import Optional, List, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List, Any, Tuple, Dict
 from PIL import Image
 import streamlit as st
 import pandas as pd
 import base64
 from io import BytesIO
-from together import Together
+from llm_client import ChatClient
 from e2b_code_interpreter import Sandbox
 
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 
 pattern = re.compile(r"```python\n(.*?)\n```", re.DOTALL)
 
-def code_interpret(e2b_code_interpreter: Sandbox, code: str) -> Optional[List[Any]]:
-    with st.spinner('Executing code in E2B sandbox...'):
-        stdout_capture = io.StringIO()
-        stderr_capture = io.StringIO()
+MODEL_OPTIONS: Dict[str, str] = {
+    "Meta-Llama 3.1 405B": "meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo",
+    "DeepSeek V3": "deepseek-ai/DeepSeek-V3",
+    "Qwen 2.5 7B": "Qwen/Qwen2.5-7B-Instruct-Turbo",
+    "Meta-Llama 3.3 70B": "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+}
+
+
+@dataclass
+class ModelRunResult:
+    """Outcome of running one query against one model in comparison mode."""
+    model_label: str
+    model_id: str
+    llm_response: str = ""
+    code_results: Optional[List[Any]] = None
+    llm_latency: float = 0.0
+    exec_latency: float = 0.0
+    total_latency: float = 0.0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    success: bool = False
+    error: Optional[str] = None
 
-        with contextlib.redirect_stdout(stdout_capture), contextlib.redirect_stderr(stderr_capture):
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                exec = e2b_code_interpreter.run_code(code)
 
-        if stderr_capture.getvalue():
-            print("[Code Interpreter Warnings/Errors]", file=sys.stderr)
-            print(stderr_capture.getvalue(), file=sys.stderr)
+def run_code(e2b_code_interpreter: Sandbox, code: str) -> Tuple[Optional[List[Any]], Optional[str]]:
+    """Run code in the sandbox without touching the Streamlit UI, returning (results, error).
 
-        if stdout_capture.getvalue():
-            print("[Code Interpreter Output]", file=sys.stdout)
-            print(stdout_capture.getvalue(), file=sys.stdout)
+    The sandbox's output comes back in execution.logs, so nothing here swaps sys.stdout/sys.stderr
+    or the warning filters, which are process-wide and would race between compare_models' threads.
+    """
+    execution = e2b_code_interpreter.run_code(code)
 
-        if exec.error:
-            print(f"[Code Interpreter ERROR] {exec.error}", file=sys.stderr)
-            return None
-        return exec.results
+    if execution.logs.stderr:
+        print("[Code Interpreter Warnings/Errors]", file=sys.stderr)
+        print("".join(execution.logs.stderr), file=sys.stderr)
+
+    if execution.logs.stdout:
+        print("[Code Interpreter Output]", file=sys.stdout)
+        print("".join(execution.logs.stdout), file=sys.stdout)
+
+    if execution.error:
+        print(f"[Code Interpreter ERROR] {execution.error}", file=sys.stderr)
+        return None, str(execution.error)
+    return execution.results, None
+
+def code_interpret(e2b_code_interpreter: Sandbox, code: str) -> Optional[List[Any]]:
+    with st.spinner('Executing code in E2B sandbox...'):
+        results, _ = run_code(e2b_code_interpreter, code)
+        return results
 
 def match_code_blocks(llm_response: str) -> str:
     match = pattern.search(llm_response)
@@ -48,33 +78,32 @@ def match_code_blocks(llm_response: str) -> str:
         return code
     return ""
 
-def chat_with_llm(e2b_code_interpreter: Sandbox, user_message: str, dataset_path: str) -> Tuple[Optional[List[Any]], str]:
+def build_messages(user_message: str, dataset_path: str) -> List[Dict[str, str]]:
     # Update system prompt to include dataset path information
     system_prompt = f"""You're a Python data scientist and data visualization expert. You are given a dataset at path '{dataset_path}' and also the user's query.
 You need to analyze the dataset and answer the user's query with a response and you run Python code to solve them.
 IMPORTANT: Always use the dataset path variable '{dataset_path}' in your code when reading the CSV file."""
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_message},
     ]
 
+def chat_with_llm(e2b_code_interpreter: Sandbox, user_message: str, dataset_path: str) -> Tuple[Optional[List[Any]], str]:
+    messages = build_messages(user_message, dataset_path)
+
     with st.spinner('Getting response from Together AI LLM model...'):
-        client = Together(api_key=st.session_state.together_api_key)
-        response = client.chat.completions.create(
-            model=st.session_state.model_name,
-            messages=messages,
-        )
+        client = ChatClient(st.session_state.together_api_key, "together")
+        response = client.chat(st.session_state.model_name, messages)
 
-        response_message = response.choices[0].message
-        python_code = match_code_blocks(response_message.content)
+        python_code = match_code_blocks(response.content)
         
         if python_code:
             code_interpreter_results = code_interpret(e2b_code_interpreter, python_code)
-            return code_interpreter_results, response_message.content
+            return code_interpreter_results, response.content
         else:
             st.warning(f"Failed to match any Python code in model's response")
-            return None, response_message.content
+            return None, response.content
 
 def upload_dataset(code_interpreter: Sandbox, uploaded_file) -> str:
     dataset_path = f"./{uploaded_file.name}"
@@ -86,6 +115,105 @@ def upload_dataset(code_interpreter: Sandbox, uploaded_file) -> str:
         st.error(f"Error during file upload: {error}")
         raise error
 
+def run_model_in_sandbox(model_label: str, model_id: str, together_api_key: str, e2b_api_key: str,
+                         user_message: str, file_name: str, file_bytes: bytes) -> ModelRunResult:
+    """Run one model end to end in its own E2B sandbox.
+
+    Called from worker threads, so it must not use st.* or st.session_state.
+    """
+    result = ModelRunResult(model_label=model_label, model_id=model_id)
+    started = time.perf_counter()
+    try:
+        with Sandbox(api_key=e2b_api_key) as code_interpreter:
+            dataset_path = f"./{file_name}"
+            code_interpreter.files.write(dataset_path, io.BytesIO(file_bytes))
+
+            llm_started = time.perf_counter()
+            client = ChatClient(together_api_key, "together")
+            response = client.chat(model_id, build_messages(user_message, dataset_path))
+            result.llm_latency = time.perf_counter() - llm_started
+
+            result.prompt_tokens = response.prompt_tokens
+            result.completion_tokens = response.completion_tokens
+            result.total_tokens = response.total_tokens
+
+            result.llm_response = response.content
+            python_code = match_code_blocks(result.llm_response)
+            if not python_code:
+                result.error = "No Python code block in model response"
+                return result
+
+            exec_started = time.perf_counter()
+            result.code_results, result.error = run_code(code_interpreter, python_code)
+            result.exec_latency = time.perf_counter() - exec_started
+            result.success = result.error is None
+    except Exception as error:
+        result.error = str(error)
+    finally:
+        result.total_latency = time.perf_counter() - started
+    return result
+
+def compare_models(models: Dict[str, str], together_api_key: str, e2b_api_key: str,
+                   user_message: str, file_name: str, file_bytes: bytes) -> List[ModelRunResult]:
+    """Fan one query out to several models concurrently, one sandbox per model."""
+    with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        futures = [
+            executor.submit(run_model_in_sandbox, label, model_id, together_api_key, e2b_api_key,
+                            user_message, file_name, file_bytes)
+            for label, model_id in models.items()
+        ]
+        return [future.result() for future in futures]
+
+def display_code_results(code_results: Optional[List[Any]]) -> None:
+    if not code_results:
+        return
+    for result in code_results:
+        if hasattr(result, 'png') and result.png:  # Check if PNG data is available
+            # Decode the base64-encoded PNG data
+            png_data = base64.b64decode(result.png)
+
+            # Convert PNG data to an image and display it
+            image = Image.open(BytesIO(png_data))
+            st.image(image, caption="Generated Visualization", use_container_width=False)
+        elif hasattr(result, 'figure'):  # For matplotlib figures
+            fig = result.figure  # Extract the matplotlib figure
+            st.pyplot(fig)  # Display using st.pyplot
+        elif hasattr(result, 'show'):  # For plotly figures
+            st.plotly_chart(result)
+        elif isinstance(result, (pd.DataFrame, pd.Series)):
+            st.dataframe(result)
+        else:
+            st.write(result)
+
+def display_comparison(results: List[ModelRunResult]) -> None:
+    st.subheader("Model Comparison")
+    summary = pd.DataFrame([
+        {
+            "Model": r.model_label,
+            "Status": "✅ success" if r.success else "❌ failed",
+            "Total latency (s)": round(r.total_latency, 2),
+            "LLM latency (s)": round(r.llm_latency, 2),
+            "Execution latency (s)": round(r.exec_latency, 2),
+            "Prompt tokens": r.prompt_tokens,
+            "Completion tokens": r.completion_tokens,
+            "Total tokens": r.total_tokens,
+            "Error": r.error or "",
+        }
+        for r in results
+    ])
+    st.dataframe(summary, hide_index=True)
+
+    columns = st.columns(len(results))
+    for column, r in zip(columns, results):
+        with column:
+            st.markdown(f"**{r.model_label}**")
+            st.caption(f"{r.total_latency:.2f}s · {r.total_tokens if r.total_tokens is not None else '?'} tokens")
+            if r.error:
+                st.error(r.error)
+            with st.expander("AI Response"):
+                st.write(r.llm_response)
+            display_code_results(r.code_results)
+
 
 def main():
     """Main Streamlit application."""
@@ -99,6 +227,8 @@ def main():
         st.session_state.e2b_api_key = ''
     if 'model_name' not in st.session_state:
         st.session_state.model_name = ''
+    if 'compare_models' not in st.session_state:
+        st.session_state.compare_models = []
 
     with st.sidebar:
         st.header("API Keys and Model Configuration")
@@ -110,12 +240,7 @@ def main():
         st.sidebar.markdown("[Get E2B API Key](https://e2b.dev/docs/legacy/getting-started/api-key)")
         
         # Add model selection dropdown
-        model_options = {
-            "Meta-Llama 3.1 405B": "meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo",
-            "DeepSeek V3": "deepseek-ai/DeepSeek-V3",
-            "Qwen 2.5 7B": "Qwen/Qwen2.5-7B-Instruct-Turbo",
-            "Meta-Llama 3.3 70B": "meta-llama/Llama-3.3-70B-Instruct-Turbo"
-        }
+        model_options = MODEL_OPTIONS
         st.session_state.model_name = st.selectbox(
             "Select Model",
             options=list(model_options.keys()),
@@ -123,6 +248,17 @@ def main():
         )
         st.session_state.model_name = model_options[st.session_state.model_name]
 
+        # Comparison mode runs the same query against several models concurrently
+        compare_mode = st.checkbox("Compare models side by side")
+        if compare_mode:
+            st.session_state.compare_models = st.multiselect(
+                "Models to compare",
+                options=list(model_options.keys()),
+                default=list(model_options.keys())[:3]
+            )
+        else:
+            st.session_state.compare_models = []
+
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
     
     if uploaded_file is not None:
@@ -142,6 +278,17 @@ def main():
         if st.button("Analyze"):
             if not st.session_state.together_api_key or not st.session_state.e2b_api_key:
                 st.error("Please enter both API keys in the sidebar.")
+            elif st.session_state.compare_models:
+                with st.spinner(f"Running {len(st.session_state.compare_models)} models concurrently..."):
+                    results = compare_models(
+                        {label: MODEL_OPTIONS[label] for label in st.session_state.compare_models},
+                        st.session_state.together_api_key,
+                        st.session_state.e2b_api_key,
+                        query,
+                        uploaded_file.name,
+                        uploaded_file.getvalue(),
+                    )
+                display_comparison(results)
             else:
                 with Sandbox(api_key=st.session_state.e2b_api_key) as code_interpreter:
                     # Upload the dataset
@@ -155,24 +302,7 @@ def main():
                     st.write(llm_response)
                     
                     # Display results/visualizations
-                    if code_results:
-                        for result in code_results:
-                            if hasattr(result, 'png') and result.png:  # Check if PNG data is available
-                                # Decode the base64-encoded PNG data
-                                png_data = base64.b64decode(result.png)
-                                
-                                # Convert PNG data to an image and display it
-                                image = Image.open(BytesIO(png_data))
-                                st.image(image, caption="Generated Visualization", use_container_width=False)
-                            elif hasattr(result, 'figure'):  # For matplotlib figures
-                                fig = result.figure  # Extract the matplotlib figure
-                                st.pyplot(fig)  # Display using st.pyplot
-                            elif hasattr(result, 'show'):  # For plotly figures
-                                st.plotly_chart(result)
-                            elif isinstance(result, (pd.DataFrame, pd.Series)):
-                                st.dataframe(result)
-                            else:
-                                st.write(result)  
+                    display_code_results(code_results)
 
 if __name__ == "__main__":
     main()
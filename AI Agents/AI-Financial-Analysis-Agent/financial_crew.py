@@ -0,0 +1,378 @@
+"""The financial analysis crew from crew-Financial_analysis.ipynb as a runnable module.
+
+Tasks form a dependency graph instead of one sequential (or manager-delegated) chain: each task
+runs as soon as the tasks it builds on have finished, so independent analyses run concurrently.
+Search and scrape results go through a shared SQLite cache with a TTL, so agents looking up the
+same ticker or page within a session reuse one result.
+
+    python financial_crew.py IBM --risk-tolerance Medium --strategy "Day Trading"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL_NAME", "gpt-3.5-turbo")
+
+AGENTS: Dict[str, Dict[str, str]] = {
+    "data_analyst": {
+        "role": "Data Analyst",
+        "goal": "Monitor and analyze market data in real-time "
+                "to identify trends and predict market movements.",
+        "backstory": "Specializing in financial markets, this agent "
+                     "uses statistical modeling and machine learning "
+                     "to provide crucial insights. With a knack for data, "
+                     "the Data Analyst Agent is the cornerstone for "
+                     "informing trading decisions.",
+    },
+    "trading_strategy": {
+        "role": "Trading Strategy Developer",
+        "goal": "Develop and test various trading strategies based "
+                "on insights from the Data Analyst Agent.",
+        "backstory": "Equipped with a deep understanding of financial "
+                     "markets and quantitative analysis, this agent "
+                     "devises and refines trading strategies. It evaluates "
+                     "the performance of different approaches to determine "
+                     "the most profitable and risk-averse options.",
+    },
+    "execution": {
+        "role": "Trade Advisor",
+        "goal": "Suggest optimal trade execution strategies "
+                "based on approved trading strategies.",
+        "backstory": "This agent specializes in analyzing the timing, price, "
+                     "and logistical details of potential trades. By evaluating "
+                     "these factors, it provides well-founded suggestions for "
+                     "when and how trades should be executed to maximize "
+                     "efficiency and adherence to strategy.",
+    },
+    "risk_management": {
+        "role": "Risk Advisor",
+        "goal": "Evaluate and provide insights on the risks "
+                "associated with potential trading activities.",
+        "backstory": "Armed with a deep understanding of risk assessment models "
+                     "and market dynamics, this agent scrutinizes the potential "
+                     "risks of proposed trades. It offers a detailed analysis of "
+                     "risk exposure and suggests safeguards to ensure that "
+                     "trading activities align with the firm’s risk tolerance.",
+    },
+}
+
+
+@dataclass
+class TaskSpec:
+    agent: str
+    description: str
+    expected_output: str
+    # Tasks whose output this one reads as context; it starts once they have all finished
+    depends_on: Tuple[str, ...] = ()
+
+
+TASKS: Dict[str, TaskSpec] = {
+    "data_analysis": TaskSpec(
+        agent="data_analyst",
+        description=(
+            "Continuously monitor and analyze market data for "
+            "the selected stock ({stock_selection}). "
+            "Use statistical modeling and machine learning to "
+            "identify trends and predict market movements."
+        ),
+        expected_output=(
+            "Insights and alerts about significant market "
+            "opportunities or threats for {stock_selection}."
+        ),
+    ),
+    "strategy_development": TaskSpec(
+        agent="trading_strategy",
+        description=(
+            "Develop and refine trading strategies based on "
+            "the insights from the Data Analyst and "
+            "user-defined risk tolerance ({risk_tolerance}). "
+            "Consider trading preferences ({trading_strategy_preference})."
+        ),
+        expected_output=(
+            "A set of potential trading strategies for {stock_selection} "
+            "that align with the user's risk tolerance."
+        ),
+        depends_on=("data_analysis",),
+    ),
+    "execution_planning": TaskSpec(
+        agent="execution",
+        description=(
+            "Analyze approved trading strategies to determine the "
+            "best execution methods for {stock_selection}, "
+            "considering current market conditions and optimal pricing."
+        ),
+        expected_output=(
+            "Detailed execution plans suggesting how and when to "
+            "execute trades for {stock_selection}."
+        ),
+        depends_on=("strategy_development",),
+    ),
+    # Assesses the strategies rather than waiting for the execution plan, so both run side by side
+    "risk_assessment": TaskSpec(
+        agent="risk_management",
+        description=(
+            "Evaluate the risks associated with the proposed trading "
+            "strategies for {stock_selection}, such as market, liquidity "
+            "and position-size risk. "
+            "Provide a detailed analysis of potential risks "
+            "and suggest mitigation strategies."
+        ),
+        expected_output=(
+            "A comprehensive risk analysis report detailing potential "
+            "risks and mitigation recommendations for {stock_selection}."
+        ),
+        depends_on=("strategy_development",),
+    ),
+}
+
+
+def execution_order(tasks: Dict[str, TaskSpec]) -> List[List[str]]:
+    """Tasks grouped into waves that can run together; raises ValueError on unknown or cyclic dependencies."""
+    remaining = dict(tasks)
+    done: set = set()
+    waves = []
+    while remaining:
+        ready = [name for name, spec in remaining.items() if all(dep in done for dep in spec.depends_on)]
+        if not ready:
+            unknown = {dep for spec in remaining.values() for dep in spec.depends_on if dep not in tasks}
+            raise ValueError(f"Unknown dependencies {sorted(unknown)}" if unknown
+                             else f"Dependency cycle among {sorted(remaining)}")
+        waves.append(ready)
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return waves
+
+
+class ToolCache:
+    """SQLite cache of tool results keyed by tool and normalized arguments, expiring after ttl seconds.
+
+    Concurrent calls with the same key wait for one lookup instead of each hitting the API.
+    """
+
+    def __init__(self, path: str = "tool_cache.sqlite3", ttl: float = 3600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, tool TEXT NOT NULL, "
+                "arguments TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    # Search queries match regardless of case and spacing; anything else (URLs in particular) is
+    # case-sensitive, so only surrounding whitespace is dropped
+    QUERY_ARGUMENTS = frozenset({"search_query", "query"})
+
+    @classmethod
+    def key(cls, tool: str, arguments: Dict[str, Any]) -> str:
+        normalized = {
+            k: " ".join(str(v).lower().split()) if k in cls.QUERY_ARGUMENTS else str(v).strip()
+            for k, v in arguments.items()
+        }
+        return hashlib.sha256(f"{tool}|{json.dumps(normalized, sort_keys=True)}".encode()).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT result, created_at FROM tool_results WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] < self.ttl:
+            return row[0]
+        return None
+
+    def get_or_call(self, tool: str, arguments: Dict[str, Any], call: Callable[[], str]) -> str:
+        key = self.key(tool, arguments)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            result = self._lookup(key)
+            if result is not None:
+                with self._lock:
+                    self.hits += 1
+                return result
+            result = call()
+            with self._lock, self._conn:
+                self.misses += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tool_results VALUES (?, ?, ?, ?, ?)",
+                    (key, tool, json.dumps(arguments, sort_keys=True, default=str), str(result), time.time()),
+                )
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def _cached(tool_class: type, name: str, cache: ToolCache) -> type:
+    """Subclass of a crewai_tools tool whose _run goes through cache."""
+    class Cached(tool_class):
+        def _run(self, *args: Any, **kwargs: Any) -> Any:
+            arguments = {**{str(i): a for i, a in enumerate(args)}, **kwargs}
+            return cache.get_or_call(name, arguments, lambda: super(Cached, self)._run(*args, **kwargs))
+
+    Cached.__name__ = f"Cached{tool_class.__name__}"
+    return Cached
+
+
+def build_tools(cache: Optional[ToolCache] = None) -> List[Any]:
+    """Scrape and Serper search tools, shared by every agent, cached when cache is given."""
+    from crewai_tools import ScrapeWebsiteTool, SerperDevTool
+
+    if cache is None:
+        return [ScrapeWebsiteTool(), SerperDevTool()]
+    return [_cached(ScrapeWebsiteTool, "scrape", cache)(), _cached(SerperDevTool, "search", cache)()]
+
+
+@dataclass
+class TaskResult:
+    name: str
+    output: str = ""
+    error: str = ""
+    seconds: float = 0.0
+
+
+@dataclass
+class CrewReport:
+    results: Dict[str, TaskResult]
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def markdown(self) -> str:
+        sections = []
+        for name, result in self.results.items():
+            title = name.replace("_", " ").title()
+            sections.append(f"## {title}\n\n{result.output or f'_Failed: {result.error}_'}")
+        return "\n\n".join(sections)
+
+
+def run_crew(inputs: Dict[str, Any], model: str = DEFAULT_MODEL, cache: Optional[ToolCache] = None,
+             max_workers: int = 4, tasks: Dict[str, TaskSpec] = TASKS, verbose: bool = False,
+             on_task: Optional[Callable[[TaskResult], None]] = None) -> CrewReport:
+    """Run every task once its dependencies are done, up to max_workers at a time.
+
+    Each task runs in a one-agent Crew; its context is the output of the tasks it depends on.
+    A failed task fails the tasks downstream of it, not the whole run.
+    """
+    from crewai import Agent, Crew, Task
+    from langchain_openai import ChatOpenAI
+    from llm_client import http_client
+
+    order = execution_order(tasks)
+    llm = ChatOpenAI(model=model, temperature=0.7, http_client=http_client(sdk="openai"))
+    tools = build_tools(cache)
+    agents = {
+        name: Agent(**spec, llm=llm, tools=tools, verbose=verbose,
+                    # The task graph moves work between agents, so they do not delegate to each other
+                    allow_delegation=False)
+        for name, spec in AGENTS.items()
+    }
+    crew_tasks: Dict[str, Any] = {}
+    for wave in order:
+        for name in wave:
+            spec = tasks[name]
+            crew_tasks[name] = Task(
+                description=spec.description,
+                expected_output=spec.expected_output,
+                agent=agents[spec.agent],
+                context=[crew_tasks[dep] for dep in spec.depends_on] or None,
+            )
+
+    def run(name: str) -> TaskResult:
+        started = time.perf_counter()
+        task = crew_tasks[name]
+        output = Crew(agents=[task.agent], tasks=[task], verbose=verbose).kickoff(inputs=inputs)
+        return TaskResult(name, output=str(output), seconds=time.perf_counter() - started)
+
+    return schedule(tasks, run, max_workers, on_task, cache)
+
+
+def schedule(tasks: Dict[str, TaskSpec], run: Callable[[str], TaskResult], max_workers: int = 4,
+             on_task: Optional[Callable[[TaskResult], None]] = None, cache: Optional[ToolCache] = None) -> CrewReport:
+    """Dependency-driven execution of run(name) over tasks; on_task is called from the calling thread."""
+    execution_order(tasks)
+    started = time.perf_counter()
+    results: Dict[str, TaskResult] = {}
+    pending: Dict[Any, str] = {}
+    waiting = dict(tasks)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while waiting or pending:
+            for name, spec in list(waiting.items()):
+                failed = [dep for dep in spec.depends_on if dep in results and results[dep].error]
+                if failed:
+                    del waiting[name]
+                    results[name] = TaskResult(name, error=f"skipped: {', '.join(failed)} failed")
+                    if on_task:
+                        on_task(results[name])
+                elif all(dep in results for dep in spec.depends_on):
+                    del waiting[name]
+                    pending[executor.submit(run, name)] = name
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = TaskResult(name, error=str(e))
+                if on_task:
+                    on_task(results[name])
+
+    total = time.perf_counter() - started
+    stats: Dict[str, Any] = {
+        "total_seconds": total,
+        # What the same tasks would have taken one after another
+        "sequential_seconds": sum(r.seconds for r in results.values()),
+        "failed": sum(bool(r.error) for r in results.values()),
+    }
+    if cache:
+        stats["tool_cache"] = cache.stats()
+    return CrewReport({name: results[name] for name in tasks}, stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the financial analysis crew for one stock.")
+    parser.add_argument("stock", help="Ticker, e.g. IBM")
+    parser.add_argument("--initial-capital", default="10000")
+    parser.add_argument("--risk-tolerance", default="Medium")
+    parser.add_argument("--strategy", default="Day Trading", help="Trading strategy preference")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cache", default="tool_cache.sqlite3", help="Search/scrape result cache file")
+    parser.add_argument("--cache-ttl", type=float, default=3600.0, help="Seconds a cached result stays valid")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    inputs = {
+        "stock_selection": args.stock,
+        "initial_capital": args.initial_capital,
+        "risk_tolerance": args.risk_tolerance,
+        "trading_strategy_preference": args.strategy,
+        "news_impact_consideration": True,
+    }
+    cache = None if args.no_cache else ToolCache(args.cache, args.cache_ttl)
+
+    def show(result: TaskResult) -> None:
+        status = f"error: {result.error}" if result.error else f"{len(result.output)} chars"
+        print(f"[{result.seconds:6.1f}s] {result.name} ({status})", flush=True)
+
+    report = run_crew(inputs, args.model, cache, args.workers, verbose=args.verbose, on_task=show)
+    print("\n" + report.markdown() + "\n")
+    s = report.stats
+    print(f"Finished in {s['total_seconds']:.1f}s (vs {s['sequential_seconds']:.1f}s one task at a time)"
+          + (f"; tool cache {s['tool_cache']}" if cache else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
+import os
+import time
 import streamlit as st
 import requests
 from phi.agent import Agent
 from phi.tools.firecrawl import FirecrawlTools
 from phi.model.openai import OpenAIChat
-from firecrawl import FirecrawlApp
+from llm_client import ensure_shared_transport, http_client
 from pydantic import BaseModel, Field
-from typing import List
-from composio_phidata import Action, ComposioToolSet
+from typing import List, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import hashlib
+import io
+import math
 import json
+from lead_cache import LeadCache
+from lead_export import EXPORT_FORMATS, GoogleSheetsWriter, export_leads
+
+# Point this at a local mock server (mock_firecrawl.py) to exercise the pipeline without the hosted API
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+SEARCH_TIMEOUT = 90.0
+# Upper bound for any single HTTP call to Firecrawl, so a stalled connection cannot hold a worker
+REQUEST_TIMEOUT = 30.0
+LEAD_CACHE_PATH = os.getenv("LEAD_CACHE_PATH", "lead_cache.sqlite3")
+
+EXTRACT_PROMPT = 'Extract all user information including username, bio, post type (question/answer), timestamp, upvotes, and any links from Quora posts. Focus on identifying potential leads who are asking questions or providing answers related to the topic.'
 
 class QuoraUserInteractionSchema(BaseModel):
     username: str = Field(description="The username of the user who posted the question or answer")
@@ -20,8 +36,13 @@ class QuoraUserInteractionSchema(BaseModel):
 class QuoraPageSchema(BaseModel):
     interactions: List[QuoraUserInteractionSchema] = Field(description="List of all user interactions (questions and answers) on the page")
 
+# Cached extractions are only reused while the schema and prompt they were produced with are unchanged
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps({"schema": QuoraPageSchema.model_json_schema(), "prompt": EXTRACT_PROMPT}, sort_keys=True).encode()
+).hexdigest()[:16]
+
 def search_for_urls(company_description: str, firecrawl_api_key: str, num_links: int) -> List[str]:
-    url = "https://api.firecrawl.dev/v1/search"
+    url = f"{FIRECRAWL_API_URL}/v1/search"
     headers = {
         "Authorization": f"Bearer {firecrawl_api_key}",
         "Content-Type": "application/json"
@@ -34,7 +55,7 @@ def search_for_urls(company_description: str, firecrawl_api_key: str, num_links:
         "location": "United States",
         "timeout": 60000,
     }
-    response = requests.post(url, json=payload, headers=headers)
+    response = requests.post(url, json=payload, headers=headers, timeout=SEARCH_TIMEOUT)
     if response.status_code == 200:
         data = response.json()
         if data.get("success"):
@@ -42,31 +63,122 @@ def search_for_urls(company_description: str, firecrawl_api_key: str, num_links:
             return [result["url"] for result in results]
     return []
 
-def extract_user_info_from_urls(urls: List[str], firecrawl_api_key: str) -> List[dict]:
-    user_info_list = []
-    firecrawl_app = FirecrawlApp(api_key=firecrawl_api_key)
-    
+def _remaining(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("extraction deadline passed")
+    return remaining
+
+def _extract_once(firecrawl_api_key: str, url: str, deadline: float, poll_interval: float) -> dict:
+    """Start one extract job and poll it until it finishes or ``deadline`` passes."""
+    headers = {
+        "Authorization": f"Bearer {firecrawl_api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "urls": [url],
+        "prompt": EXTRACT_PROMPT,
+        "schema": QuoraPageSchema.model_json_schema(),
+    }
+    response = requests.post(f"{FIRECRAWL_API_URL}/v1/extract", json=payload, headers=headers,
+                             timeout=min(REQUEST_TIMEOUT, _remaining(deadline)))
+    response.raise_for_status()
+    job = response.json()
+    if not job.get("success") or not job.get("id"):
+        raise RuntimeError(job.get("error") or "extract request was not accepted")
+
+    status_url = f"{FIRECRAWL_API_URL}/v1/extract/{job['id']}"
+    while True:
+        response = requests.get(status_url, headers=headers, timeout=min(REQUEST_TIMEOUT, _remaining(deadline)))
+        response.raise_for_status()
+        status = response.json()
+        if status.get("status") == "completed" and status.get("success"):
+            return status
+        if status.get("status") in ("failed", "cancelled") or not status.get("success", True):
+            raise RuntimeError(status.get("error") or f"extract status: {status.get('status')}")
+        time.sleep(min(poll_interval, _remaining(deadline)))
+
+def extract_user_info_from_url(
+    firecrawl_api_key: str,
+    url: str,
+    deadline: float,
+    retries: int = 2,
+    backoff: float = 1.0,
+    poll_interval: float = 2.0,
+) -> dict:
+    """Extract interactions from a single URL, retrying failed extractions.
+
+    ``deadline`` is a ``time.monotonic()`` value; every request and poll is bounded by it,
+    so the call raises ``TimeoutError`` instead of outliving it.
+    """
+    last_error = "unknown error"
+    for attempt in range(retries + 1):
+        try:
+            response = _extract_once(firecrawl_api_key, url, deadline, poll_interval)
+            interactions = (response.get('data') or {}).get('interactions', [])
+            return {"website_url": url, "user_info": interactions}
+        except TimeoutError:
+            raise
+        except Exception as e:
+            last_error = str(e)
+        if attempt < retries:
+            time.sleep(min(backoff * (2 ** attempt), _remaining(deadline)))
+    raise RuntimeError(last_error)
+
+def iter_user_info_from_urls(
+    urls: List[str],
+    firecrawl_api_key: str,
+    max_workers: int = 4,
+    timeout: float = 120.0,
+    retries: int = 2,
+    total_timeout: Optional[float] = None,
+) -> Iterator[dict]:
+    """Extract URLs concurrently and yield one result per URL as soon as it finishes.
+
+    Each yielded dict has ``website_url`` and ``user_info``; failed or timed-out URLs
+    carry an ``error`` message and an empty ``user_info`` instead of aborting the run.
+    ``timeout`` applies per URL from when a worker picks it up, and ``total_timeout``
+    (default: enough rounds of ``timeout`` for every URL) bounds the whole run,
+    including time spent waiting for a free worker.
+    """
+    workers = max(1, min(max_workers, len(urls) or 1))
+    if total_timeout is None:
+        total_timeout = timeout * math.ceil(len(urls) / workers)
+    run_deadline = time.monotonic() + total_timeout
+
+    def run(url: str) -> dict:
+        deadline = min(time.monotonic() + timeout, run_deadline)
+        return extract_user_info_from_url(firecrawl_api_key, url, deadline, retries=retries)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
     try:
-        for url in urls:
-            response = firecrawl_app.extract(
-                [url],
-                {
-                    'prompt': 'Extract all user information including username, bio, post type (question/answer), timestamp, upvotes, and any links from Quora posts. Focus on identifying potential leads who are asking questions or providing answers related to the topic.',
-                    'schema': QuoraPageSchema.model_json_schema(),
-                }
-            )
-            
-            if response.get('success') and response.get('status') == 'completed':
-                interactions = response.get('data', {}).get('interactions', [])
-                if interactions:
-                    user_info_list.append({
-                        "website_url": url,
-                        "user_info": interactions
-                    })
-    except Exception:
-        pass
-    
-    return user_info_list
+        pending = {executor.submit(run, url): url for url in urls}
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    yield future.result()
+                except TimeoutError:
+                    limit = f"{total_timeout:.0f}s overall" if time.monotonic() >= run_deadline else f"{timeout:.0f}s"
+                    yield {"website_url": url, "user_info": [], "error": f"timed out after {limit}"}
+                except Exception as e:
+                    yield {"website_url": url, "user_info": [], "error": str(e)}
+
+            # Workers stop on their own at the deadline; this only covers one stuck past its last request timeout
+            if pending and time.monotonic() > run_deadline + REQUEST_TIMEOUT:
+                for future, url in pending.items():
+                    future.cancel()
+                    yield {"website_url": url, "user_info": [], "error": f"timed out after {total_timeout:.0f}s overall"}
+                pending.clear()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def extract_user_info_from_urls(urls: List[str], firecrawl_api_key: str) -> List[dict]:
+    return [
+        info for info in iter_user_info_from_urls(urls, firecrawl_api_key)
+        if info.get("user_info")
+    ]
 
 def format_user_info_to_flattened_json(user_info_list: List[dict]) -> List[dict]:
     flattened_data = []
@@ -89,42 +201,17 @@ def format_user_info_to_flattened_json(user_info_list: List[dict]) -> List[dict]
     
     return flattened_data
 
-def create_google_sheets_agent(composio_api_key: str, openai_api_key: str) -> Agent:
-    composio_toolset = ComposioToolSet(api_key=composio_api_key)
-    google_sheets_tool = composio_toolset.get_tools(actions=[Action.GOOGLESHEETS_SHEET_FROM_JSON])[0]
-    
-    google_sheets_agent = Agent(
-        model=OpenAIChat(id="gpt-4o-mini", api_key=openai_api_key),
-        tools=[google_sheets_tool],
-        show_tool_calls=True,
-        system_prompt="You are an expert at creating and updating Google Sheets. You will be given user information in JSON format, and you need to write it into a new Google Sheet.",
-        markdown=True
-    )
-    return google_sheets_agent
-
-def write_to_google_sheets(flattened_data: List[dict], composio_api_key: str, openai_api_key: str) -> str:
-    google_sheets_agent = create_google_sheets_agent(composio_api_key, openai_api_key)
-    
+def write_to_google_sheets(flattened_data: List[dict], composio_api_key: str, batch_size: int = 500) -> str:
     try:
-        message = (
-            "Create a new Google Sheet with this data. "
-            "The sheet should have these columns: Website URL, Username, Bio, Post Type, Timestamp, Upvotes, and Links in the same order as mentioned. "
-            "Here's the data in JSON format:\n\n"
-            f"{json.dumps(flattened_data, indent=2)}"
-        )
-        
-        create_sheet_response = google_sheets_agent.run(message)
-        
-        if "https://docs.google.com/spreadsheets/d/" in create_sheet_response.content:
-            google_sheets_link = create_sheet_response.content.split("https://docs.google.com/spreadsheets/d/")[1].split(" ")[0]
-            return f"https://docs.google.com/spreadsheets/d/{google_sheets_link}"
-    except Exception:
-        pass
+        return GoogleSheetsWriter(composio_api_key, batch_size=batch_size).write(flattened_data)
+    except Exception as e:
+        st.error(f"Error writing to Google Sheets: {e}")
     return None
 
 def create_prompt_transformation_agent(openai_api_key: str) -> Agent:
     return Agent(
-        model=OpenAIChat(id="gpt-4o-mini", api_key=openai_api_key),
+        model=ensure_shared_transport(OpenAIChat(id="gpt-4o-mini", api_key=openai_api_key,
+                                                 client_params={"http_client": http_client(sdk="openai")})),
         system_prompt="""You are an expert at transforming detailed user queries into concise company descriptions.
 Your task is to extract the core business/product focus in 3-4 words.
 
@@ -159,6 +246,13 @@ def main():
         st.caption(" Get your Composio API key from [Composio's website](https://composio.ai)")
         
         num_links = st.number_input("Number of links to search", min_value=1, max_value=10, value=3)
+
+        st.header("Cache")
+        cache_ttl_hours = st.number_input("Reuse search/extraction results for (hours)", min_value=0, value=24)
+        skip_seen_leads = st.checkbox("Skip leads found in previous runs", value=True)
+
+        st.header("Export")
+        export_format = st.selectbox("Export leads to", ["Google Sheets", "csv", "xlsx", "parquet"])
         
         if st.button("Reset"):
             st.session_state.clear()
@@ -171,7 +265,7 @@ def main():
     )
 
     if st.button("Generate Leads"):
-        if not all([firecrawl_api_key, openai_api_key, composio_api_key, user_query]):
+        if not all([firecrawl_api_key, openai_api_key, user_query]) or (export_format == "Google Sheets" and not composio_api_key):
             st.error("Please fill in all the API keys and describe what leads you're looking for.")
         else:
             with st.spinner("Processing your query..."):
@@ -179,29 +273,72 @@ def main():
                 company_description = transform_agent.run(f"Transform this query into a concise 3-4 word company description: {user_query}")
                 st.write("🎯 Searching for:", company_description.content)
             
+            cache = LeadCache(LEAD_CACHE_PATH, ttl_seconds=cache_ttl_hours * 3600)
             with st.spinner("Searching for relevant URLs..."):
-                urls = search_for_urls(company_description.content, firecrawl_api_key, num_links)
+                urls = cache.get_search(company_description.content, num_links)
+                if urls is None:
+                    urls = search_for_urls(company_description.content, firecrawl_api_key, num_links)
+                    if urls:
+                        cache.put_search(company_description.content, num_links, urls)
             
             if urls:
                 st.subheader("Quora Links Used:")
                 for url in urls:
                     st.write(url)
                 
-                with st.spinner("Extracting user info from URLs..."):
-                    user_info_list = extract_user_info_from_urls(urls, firecrawl_api_key)
+                cached_infos, urls_to_fetch = cache.partition_urls(urls, SCHEMA_VERSION)
+                st.caption(f"{len(cached_infos)} URLs reused from cache, {len(urls_to_fetch)} sent to Firecrawl")
+
+                st.subheader("Leads")
+                leads_table = st.empty()
+                user_info_list = [info for info in cached_infos if info["user_info"]]
+                if user_info_list:
+                    leads_table.dataframe(format_user_info_to_flattened_json(user_info_list))
+                if urls_to_fetch:
+                    progress = st.progress(0.0, text="Extracting user info from URLs...")
+                    for done_count, info in enumerate(iter_user_info_from_urls(urls_to_fetch, firecrawl_api_key), start=1):
+                        progress.progress(done_count / len(urls_to_fetch), text=f"Extracted {done_count}/{len(urls_to_fetch)} URLs")
+                        if info.get("error"):
+                            st.warning(f"Could not extract {info['website_url']}: {info['error']}")
+                            continue
+                        cache.put_extraction(info["website_url"], SCHEMA_VERSION, info["user_info"])
+                        if info["user_info"]:
+                            user_info_list.append(info)
+                            leads_table.dataframe(format_user_info_to_flattened_json(user_info_list))
+
+                if skip_seen_leads:
+                    user_info_list = cache.filter_new_leads(user_info_list)
+                    st.caption(f"{sum(len(info['user_info']) for info in user_info_list)} new leads after removing ones seen in previous runs")
                 
                 with st.spinner("Formatting user info..."):
                     flattened_data = format_user_info_to_flattened_json(user_info_list)
                 
-                with st.spinner("Writing to Google Sheets..."):
-                    google_sheets_link = write_to_google_sheets(flattened_data, composio_api_key, openai_api_key)
-                
-                if google_sheets_link:
-                    st.success("Lead generation and data writing to Google Sheets completed successfully!")
-                    st.subheader("Google Sheets Link:")
-                    st.markdown(f"[View Google Sheet]({google_sheets_link})")
+                if export_format == "Google Sheets":
+                    with st.spinner("Writing to Google Sheets..."):
+                        google_sheets_link = write_to_google_sheets(flattened_data, composio_api_key)
+
+                    if google_sheets_link:
+                        cache.mark_seen(user_info_list)
+                        st.success("Lead generation and data writing to Google Sheets completed successfully!")
+                        st.subheader("Google Sheets Link:")
+                        st.markdown(f"[View Google Sheet]({google_sheets_link})")
+                    else:
+                        st.error("Failed to retrieve the Google Sheets link.")
                 else:
-                    st.error("Failed to retrieve the Google Sheets link.")
+                    buffer = io.BytesIO()
+                    try:
+                        row_count = export_leads(flattened_data, export_format, buffer)
+                    except ImportError as e:
+                        st.error(str(e))
+                    else:
+                        cache.mark_seen(user_info_list)
+                        st.success(f"Exported {row_count} leads.")
+                        st.download_button(
+                            label=f"📥 Download leads.{export_format}",
+                            data=buffer.getvalue(),
+                            file_name=f"leads.{export_format}",
+                            mime=EXPORT_FORMATS[export_format],
+                        )
             else:
                 st.warning("No relevant URLs found.")
 
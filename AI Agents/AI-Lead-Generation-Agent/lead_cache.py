@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class LeadCache:
+    """Persistent SQLite store for search results, extractions and already-seen leads.
+
+    Search results are keyed by (query, limit) and extractions by (url, schema_version),
+    both expiring after ``ttl_seconds``. Seen leads are keyed by (username, url) and never
+    expire, so each lead is only reported once across runs.
+    """
+
+    def __init__(self, path: str = "lead_cache.sqlite3", ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS search_results (
+                    query TEXT NOT NULL,
+                    num_links INTEGER NOT NULL,
+                    urls TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (query, num_links)
+                );
+                CREATE TABLE IF NOT EXISTS extractions (
+                    url TEXT NOT NULL,
+                    schema_version TEXT NOT NULL,
+                    interactions TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (url, schema_version)
+                );
+                CREATE TABLE IF NOT EXISTS seen_leads (
+                    username TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    PRIMARY KEY (username, url)
+                );
+                """
+            )
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl_seconds
+
+    def get_search(self, query: str, num_links: int) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT urls, fetched_at FROM search_results WHERE query = ? AND num_links = ?",
+                (query.strip().lower(), num_links),
+            ).fetchone()
+        if row and self._is_fresh(row[1]):
+            return json.loads(row[0])
+        return None
+
+    def put_search(self, query: str, num_links: int, urls: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?)",
+                (query.strip().lower(), num_links, json.dumps(urls), time.time()),
+            )
+
+    def get_extraction(self, url: str, schema_version: str) -> Optional[List[dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT interactions, fetched_at FROM extractions WHERE url = ? AND schema_version = ?",
+                (url, schema_version),
+            ).fetchone()
+        if row and self._is_fresh(row[1]):
+            return json.loads(row[0])
+        return None
+
+    def put_extraction(self, url: str, schema_version: str, interactions: List[dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (url, schema_version, json.dumps(interactions), time.time()),
+            )
+
+    def partition_urls(self, urls: List[str], schema_version: str) -> Tuple[List[dict], List[str]]:
+        """Split urls into cached user info entries and the urls that still need extracting."""
+        cached, to_fetch = [], []
+        for url in dict.fromkeys(urls):
+            interactions = self.get_extraction(url, schema_version)
+            if interactions is None:
+                to_fetch.append(url)
+            else:
+                cached.append({"website_url": url, "user_info": interactions})
+        return cached, to_fetch
+
+    def filter_new_leads(self, user_info_list: List[dict]) -> List[dict]:
+        """Drop interactions whose (username, url) was already reported, without recording anything.
+
+        Call mark_seen once the leads are exported, so a failed export reports them again next run.
+        """
+        new_list = []
+        with self._lock:
+            for info in user_info_list:
+                url = info["website_url"]
+                new_interactions, usernames = [], set()
+                for interaction in info["user_info"]:
+                    username = interaction.get("username", "")
+                    if username in usernames:
+                        continue
+                    usernames.add(username)
+                    seen = self._conn.execute(
+                        "SELECT 1 FROM seen_leads WHERE username = ? AND url = ?", (username, url)
+                    ).fetchone()
+                    if not seen:
+                        new_interactions.append(interaction)
+                if new_interactions:
+                    new_list.append({"website_url": url, "user_info": new_interactions})
+        return new_list
+
+    def mark_seen(self, user_info_list: List[dict]) -> None:
+        """Record every (username, url) in user_info_list as reported."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_leads VALUES (?, ?, ?)",
+                [
+                    (interaction.get("username", ""), info["website_url"], now)
+                    for info in user_info_list
+                    for interaction in info["user_info"]
+                ],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
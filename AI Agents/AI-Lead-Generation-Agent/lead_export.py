@@ -0,0 +1,149 @@
+import csv
+import io
+import re
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from composio_phidata import Action, ComposioToolSet
+
+# Column order of the rows produced by format_user_info_to_flattened_json
+LEAD_COLUMNS = ["Website URL", "Username", "Bio", "Post Type", "Timestamp", "Upvotes", "Links"]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_COUNT = re.compile(r"(\d+(?:\.\d+)?)\s*([km]?)\b", re.IGNORECASE)
+_COUNT_SUFFIXES = {"": 1, "k": 1_000, "m": 1_000_000}
+
+
+def iter_batches(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[List[Any]]]:
+    """Yield rows as lists of cell values in LEAD_COLUMNS order, batch_size rows at a time."""
+    iterator = iter(rows)
+    while True:
+        batch = [[row.get(column, "") for column in LEAD_COLUMNS] for row in islice(iterator, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """Upvote count as an int: accepts 12, "12", "1,234", "1.2k", "12 upvotes"; None if no number is found."""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _COUNT.search(str(value).replace(",", ""))
+    if not match:
+        return None
+    return int(float(match.group(1)) * _COUNT_SUFFIXES[match.group(2).lower()])
+
+
+def export_csv(rows: Iterable[Dict[str, Any]], target: BinaryIO) -> int:
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(LEAD_COLUMNS)
+    count = 0
+    for batch in iter_batches(rows, 1000):
+        writer.writerows(batch)
+        count += len(batch)
+    text.flush()
+    text.detach()
+    return count
+
+
+def export_xlsx(rows: Iterable[Dict[str, Any]], target: BinaryIO) -> int:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("XLSX export requires openpyxl: pip install openpyxl")
+
+    # write_only mode streams rows to disk instead of building the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Leads")
+    sheet.append(LEAD_COLUMNS)
+    count = 0
+    for batch in iter_batches(rows, 1000):
+        for values in batch:
+            sheet.append(values)
+        count += len(batch)
+    workbook.save(target)
+    return count
+
+
+def export_parquet(rows: Iterable[Dict[str, Any]], target: BinaryIO) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (column, pa.int64() if column == "Upvotes" else pa.string()) for column in LEAD_COLUMNS
+    ])
+    count = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        for batch in iter_batches(rows, 10000):
+            columns = list(zip(*batch))
+            arrays = [
+                pa.array([parse_count(v) for v in values], type=pa.int64()) if column == "Upvotes" else pa.array([str(v) for v in values])
+                for column, values in zip(LEAD_COLUMNS, columns)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export_leads(rows: Iterable[Dict[str, Any]], fmt: str, target: BinaryIO) -> int:
+    """Stream rows into target in the given format and return the number of rows written."""
+    exporters = {"csv": export_csv, "xlsx": export_xlsx, "parquet": export_parquet}
+    if fmt not in exporters:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return exporters[fmt](rows, target)
+
+
+def _response_data(response: Dict[str, Any]) -> Dict[str, Any]:
+    data = response.get("data") or {}
+    return data.get("response_data", data)
+
+
+class GoogleSheetsWriter:
+    """Writes lead rows to a new Google Sheet through Composio actions, with no LLM in the loop."""
+
+    def __init__(self, composio_api_key: str, batch_size: int = 500, sheet_name: str = "Sheet1"):
+        self.toolset = ComposioToolSet(api_key=composio_api_key)
+        self.batch_size = batch_size
+        self.sheet_name = sheet_name
+
+    def _execute(self, action: Action, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.toolset.execute_action(action=action, params=params)
+        if not response.get("successful", response.get("successfull", False)):
+            raise RuntimeError(f"{action} failed: {response.get('error')}")
+        return _response_data(response)
+
+    def create_sheet(self, title: str) -> str:
+        data = self._execute(Action.GOOGLESHEETS_CREATE_GOOGLE_SHEET1, {"title": title})
+        spreadsheet_id = data.get("spreadsheetId") or data.get("spreadsheet_id")
+        if not spreadsheet_id:
+            raise RuntimeError(f"No spreadsheet id in create response: {data}")
+        return spreadsheet_id
+
+    def append_rows(self, spreadsheet_id: str, first_row: int, values: List[List[Any]]) -> None:
+        self._execute(Action.GOOGLESHEETS_BATCH_UPDATE, {
+            "spreadsheet_id": spreadsheet_id,
+            "sheet_name": self.sheet_name,
+            "first_cell_location": f"A{first_row}",
+            "values": values,
+        })
+
+    def write(self, rows: Iterable[Dict[str, Any]], title: str = "Leads") -> str:
+        """Create a sheet, write the header and rows in fixed-size batches, and return its URL."""
+        spreadsheet_id = self.create_sheet(title)
+        self.append_rows(spreadsheet_id, 1, [LEAD_COLUMNS])
+        next_row = 2
+        for batch in iter_batches(rows, self.batch_size):
+            self.append_rows(spreadsheet_id, next_row, batch)
+            next_row += len(batch)
+        return f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
@@ -0,0 +1,123 @@
+"""Local stand-in for the Firecrawl search and extract endpoints, for trying the agent offline.
+
+    python mock_firecrawl.py --port 3002 --extract-seconds 3
+
+then run the app with FIRECRAWL_API_URL=http://localhost:3002 (any Firecrawl key is accepted).
+
+Search returns made-up Quora URLs. Extract jobs complete after --extract-seconds with a few
+generated interactions per URL. To exercise the timeouts, every --slow-every-th search result
+is a URL whose extract job never completes, and every --stall-every-th one is a URL whose
+status requests get no answer for --stall-seconds.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def mock_interactions(url: str, count: int = 3) -> list:
+    seed = int(hashlib.sha256(url.encode()).hexdigest(), 16)
+    return [
+        {
+            "username": f"user-{(seed >> (8 * i)) % 10000:04d}",
+            "bio": "Small business owner looking for tools",
+            "post_type": "question" if i == 0 else "answer",
+            "timestamp": "2024-01-01",
+            # The hosted extractor often returns counts as text
+            "upvotes": (seed >> i) % 500 if i % 2 == 0 else f"{(seed >> i) % 50 / 10:.1f}k",
+            "links": [],
+        }
+        for i in range(count)
+    ]
+
+
+class MockFirecrawlHandler(BaseHTTPRequestHandler):
+    """Implements POST /v1/search, POST /v1/extract and GET /v1/extract/<id>."""
+
+    extract_seconds = 3.0
+    slow_every = 0
+    stall_every = 0
+    stall_seconds = 300.0
+    jobs: dict = {}
+    _jobs_lock = threading.Lock()
+    _urls = itertools.count(1)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.startswith("/v1/search"):
+            results = []
+            for _ in range(int(body.get("limit") or 5)):
+                n = next(self._urls)
+                kind = "stall" if self.stall_every and n % self.stall_every == 0 else (
+                    "slow" if self.slow_every and n % self.slow_every == 0 else "question")
+                results.append({"url": f"https://www.quora.com/mock-{kind}-{n}", "title": f"Mock question {n}"})
+            self._send_json(200, {"success": True, "data": results})
+        elif self.path.startswith("/v1/extract"):
+            job_id = str(uuid.uuid4())
+            with self._jobs_lock:
+                self.jobs[job_id] = {"urls": body.get("urls") or [], "created": time.monotonic()}
+            print(f"[firecrawl] extract {job_id} for {', '.join(body.get('urls') or [])}", flush=True)
+            self._send_json(200, {"success": True, "id": job_id})
+        else:
+            self._send_json(404, {"success": False, "error": "not found"})
+
+    def do_GET(self) -> None:
+        if not self.path.startswith("/v1/extract/"):
+            self._send_json(404, {"success": False, "error": "not found"})
+            return
+        with self._jobs_lock:
+            job = self.jobs.get(self.path.rsplit("/", 1)[-1])
+        if job is None:
+            self._send_json(404, {"success": False, "error": "unknown job"})
+            return
+        if any("-stall-" in url for url in job["urls"]):
+            time.sleep(self.stall_seconds)
+        done = (time.monotonic() - job["created"] >= self.extract_seconds
+                and not any("-slow-" in url for url in job["urls"]))
+        if not done:
+            self._send_json(200, {"success": True, "status": "processing"})
+            return
+        interactions = [interaction for url in job["urls"] for interaction in mock_interactions(url)]
+        self._send_json(200, {"success": True, "status": "completed", "data": {"interactions": interactions}})
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a mock Firecrawl API.")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--extract-seconds", type=float, default=3.0, help="How long an extract job takes")
+    parser.add_argument("--slow-every", type=int, default=0, help="Every Nth search result never finishes extracting")
+    parser.add_argument("--stall-every", type=int, default=0, help="Every Nth search result's status requests hang")
+    parser.add_argument("--stall-seconds", type=float, default=300.0)
+    args = parser.parse_args()
+
+    MockFirecrawlHandler.extract_seconds = args.extract_seconds
+    MockFirecrawlHandler.slow_every = args.slow_every
+    MockFirecrawlHandler.stall_every = args.stall_every
+    MockFirecrawlHandler.stall_seconds = args.stall_seconds
+    server = ThreadingHTTPServer(("localhost", args.port), MockFirecrawlHandler)
+    server.daemon_threads = True
+    print(f"Mock Firecrawl on http://localhost:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Durable SQLite job queue for outbound actions (emails, interview scheduling).
+
+Jobs carry an idempotency key, so enqueueing the same action twice (for example after a
+Streamlit rerun) is a no-op. Failed jobs are retried with exponential backoff, and jobs
+left running by a crashed process are picked up again after their lease expires. Each job
+names the tenant (sender) it belongs to, so workers can claim only the jobs whose
+credentials they hold.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from phi.utils.log import logger
+
+Handler = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class ActionQueue:
+    def __init__(self, path: str = "actions.sqlite3", base_delay: float = 5.0, max_delay: float = 300.0,
+                 lease_seconds: float = 600.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    kind TEXT NOT NULL,
+                    tenant TEXT NOT NULL DEFAULT '',
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    next_run_at REAL NOT NULL,
+                    last_error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "tenant" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_run_at)")
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str, max_attempts: int = 5,
+                tenant: str = "") -> Tuple[int, bool]:
+        """Add a job unless one with the same idempotency key exists. Returns (job id, created)."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (idempotency_key, kind, tenant, payload, status, max_attempts, next_run_at, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (idempotency_key, kind, tenant, json.dumps(payload), max_attempts, now, now, now),
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid, True
+            row = self._conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            return row["id"], False
+
+    def claim(self, kinds: Optional[List[str]] = None, tenants: Optional[Sequence[str]] = None) -> Optional[sqlite3.Row]:
+        """Mark the oldest ready job as running and return it, or None if nothing is ready.
+
+        tenants, when given, limits the claim to jobs of those tenants.
+        """
+        now = time.time()
+        kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})" if kinds else ""
+        tenant_filter, tenant_params = _tenant_filter(tenants, "AND")
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE ((status = 'queued' AND next_run_at <= ?) "
+                f"OR (status = 'running' AND updated_at <= ?)) {kind_filter} {tenant_filter} "
+                "ORDER BY next_run_at, id LIMIT 1",
+                (now, now - self.lease_seconds, *(kinds or []), *tenant_params),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?", (now, row["id"])
+            )
+            return self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def complete(self, job_id: int, result: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result or {}), time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str) -> str:
+        """Record a failed attempt; the job is retried with backoff until max_attempts. Returns the new status."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row["attempts"] >= row["max_attempts"]:
+                status, next_run_at = "failed", time.time()
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** (row["attempts"] - 1))
+                status, next_run_at = "queued", time.time() + delay * random.uniform(0.8, 1.2)
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, next_run_at = ?, updated_at = ? WHERE id = ?",
+                (status, error, next_run_at, time.time(), job_id),
+            )
+        return status
+
+    def retry(self, job_id: int) -> None:
+        """Give a failed job a fresh set of attempts."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_run_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'failed'",
+                (time.time(), time.time(), job_id),
+            )
+
+    def get(self, idempotency_key: str) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+
+    def jobs(self, status: Optional[str] = None, limit: int = 100,
+             tenants: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        tenant_filter, params = _tenant_filter(tenants, "WHERE")
+        query = f"SELECT * FROM jobs {tenant_filter}"
+        if status:
+            query, params = query + (" AND" if tenant_filter else " WHERE") + " status = ?", [*params, status]
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [{
+            "id": row["id"],
+            "kind": row["kind"],
+            "key": row["idempotency_key"],
+            "status": row["status"],
+            "attempts": f"{row['attempts']}/{row['max_attempts']}",
+            "last_error": row["last_error"] or "",
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["updated_at"])),
+        } for row in rows]
+
+    def counts(self, tenants: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        tenant_filter, params = _tenant_filter(tenants, "WHERE")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) AS n FROM jobs {tenant_filter} GROUP BY status", params
+            ).fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def pending(self, tenants: Optional[Sequence[str]] = None) -> int:
+        counts = self.counts(tenants)
+        return counts["queued"] + counts["running"]
+
+
+def _tenant_filter(tenants: Optional[Sequence[str]], keyword: str) -> Tuple[str, List[str]]:
+    """SQL condition (after keyword) and parameters limiting a query to tenants; no condition for None."""
+    if tenants is None:
+        return "", []
+    if not tenants:
+        return f"{keyword} 0", []
+    return f"{keyword} tenant IN ({','.join('?' * len(tenants))})", list(tenants)
+
+
+class ActionWorkers:
+    """Background threads that claim jobs from an ActionQueue and run the handler for their kind.
+
+    tenants, when given, returns the tenants whose jobs may be claimed; it is called before every claim.
+    """
+
+    def __init__(self, queue: ActionQueue, handlers: Dict[str, Handler], workers: int = 2, poll_interval: float = 1.0,
+                 tenants: Optional[Callable[[], Sequence[str]]] = None):
+        self.queue = queue
+        self.handlers = handlers
+        self.tenants = tenants
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def run_one(self) -> bool:
+        """Process a single ready job. Returns False when no job was ready."""
+        job = self.queue.claim(list(self.handlers), self.tenants() if self.tenants else None)
+        if job is None:
+            return False
+        try:
+            result = self.handlers[job["kind"]](json.loads(job["payload"]))
+            self.queue.complete(job["id"], result)
+        except Exception as e:
+            status = self.queue.fail(job["id"], f"{type(e).__name__}: {e}")
+            logger.error(f"Job {job['id']} ({job['kind']}) failed, now {status}: {e}")
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if not self.run_one():
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"action-worker-{i}", daemon=True) for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_until_idle(self, timeout: float = 600.0) -> None:
+        """Process jobs in the calling thread, waiting out retry backoff, until none are queued or running."""
+        deadline = time.monotonic() + timeout
+        while self.queue.pending(self.tenants() if self.tenants else None) and time.monotonic() < deadline:
+            if not self.run_one():
+                time.sleep(self.poll_interval)
@@ -1,57 +1,19 @@
 from typing import Literal, Tuple, Dict, Optional
 import os
-import time
-import json
-import requests
-import PyPDF2
-from datetime import datetime, timedelta
-import pytz
+import hashlib
 
 import streamlit as st
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.tools.email import EmailTools
-from phi.tools.zoom import ZoomTool
+from llm_client import ensure_shared_transport, http_client
 from phi.utils.log import logger
 from streamlit_pdf_viewer import pdf_viewer
 
+from outbound import Outbound, OutboundConfig
+from resume_analysis import ANALYSIS_METRICS, AnalysisMetrics, ResumeAnalysis, run_with_repair
+from resume_parser import ResumeText, key_sections_text, parse_resume
 
 
-class CustomZoomTool(ZoomTool):
-    def __init__(self, *, account_id: Optional[str] = None, client_id: Optional[str] = None, client_secret: Optional[str] = None, name: str = "zoom_tool"):
-        super().__init__(account_id=account_id, client_id=client_id, client_secret=client_secret, name=name)
-        self.token_url = "https://zoom.us/oauth/token"
-        self.access_token = None
-        self.token_expires_at = 0
-
-    def get_access_token(self) -> str:
-        if self.access_token and time.time() < self.token_expires_at:
-            return str(self.access_token)
-            
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {"grant_type": "account_credentials", "account_id": self.account_id}
-
-        try:
-            response = requests.post(self.token_url, headers=headers, data=data, auth=(self.client_id, self.client_secret))
-            response.raise_for_status()
-
-            token_info = response.json()
-            self.access_token = token_info["access_token"]
-            expires_in = token_info["expires_in"]
-            self.token_expires_at = time.time() + expires_in - 60
-
-            self._set_parent_token(str(self.access_token))
-            return str(self.access_token)
-
-        except requests.RequestException as e:
-            logger.error(f"Error fetching access token: {e}")
-            return ""
-
-    def _set_parent_token(self, token: str) -> None:
-        """Helper method to set the token in the parent ZoomTool class"""
-        if token:
-            self._ZoomTool__access_token = token
-
 
 # Role requirements as a constant dictionary
 ROLE_REQUIREMENTS: Dict[str, str] = {
@@ -91,24 +53,22 @@ def init_session_state() -> None:
     defaults = {
         'candidate_email': "", 'openai_api_key': "", 'resume_text': "", 'analysis_complete': False,
         'is_selected': False, 'zoom_account_id': "", 'zoom_client_id': "", 'zoom_client_secret': "",
-        'email_sender': "", 'email_passkey': "", 'company_name': "", 'current_pdf': None
+        'email_sender': "", 'email_passkey': "", 'company_name': "", 'current_pdf': None, 'analysis_result': None,
+        'resume_sections': {}
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
 
-def create_resume_analyzer() -> Agent:
-    """Creates and returns a resume analysis agent."""
-    if not st.session_state.openai_api_key:
-        st.error("Please enter your OpenAI API key first.")
-        return None
-
+def build_resume_analyzer(openai_api_key: str) -> Agent:
+    """Creates a resume analysis agent without reading Streamlit session state."""
     return Agent(
-        model=OpenAIChat(
+        model=ensure_shared_transport(OpenAIChat(
             id="gpt-4o",
-            api_key=st.session_state.openai_api_key
-        ),
+            api_key=openai_api_key,
+            client_params={"http_client": http_client(sdk="openai")}
+        )),
         description="You are an expert technical recruiter who analyzes resumes.",
         instructions=[
             "Analyze the resume against the provided job requirements",
@@ -117,201 +77,227 @@ def create_resume_analyzer() -> Agent:
             "Value hands-on experience with key technologies",
             "Return a JSON response with selection decision and feedback"
         ],
-        markdown=True
+        response_model=ResumeAnalysis,
+        structured_outputs=True
     )
 
-def create_email_agent() -> Agent:
+
+def build_repair_agent(openai_api_key: str) -> Agent:
+    """Creates a cheap agent that only reformats a malformed analysis into the ResumeAnalysis schema."""
     return Agent(
-        model=OpenAIChat(
-            id="gpt-4o",
-            api_key=st.session_state.openai_api_key
-        ),
-        tools=[EmailTools(
-            receiver_email=st.session_state.candidate_email,
-            sender_email=st.session_state.email_sender,
-            sender_name=st.session_state.company_name,
-            sender_passkey=st.session_state.email_passkey
-        )],
-        description="You are a professional recruitment coordinator handling email communications.",
-        instructions=[
-            "Draft and send professional recruitment emails",
-            "Act like a human writing an email and use all lowercase letters",
-            "Maintain a friendly yet professional tone",
-            "Always end emails with exactly: 'best,\nthe ai recruiting team'",
-            "Never include the sender's or receiver's name in the signature",
-            f"The name of the company is '{st.session_state.company_name}'"
-        ],
-        markdown=True,
-        show_tool_calls=True
+        model=ensure_shared_transport(OpenAIChat(
+            id="gpt-4o-mini",
+            api_key=openai_api_key,
+            client_params={"http_client": http_client(sdk="openai")}
+        )),
+        description="You convert resume analyses into valid JSON without changing their content.",
+        response_model=ResumeAnalysis,
+        structured_outputs=True
     )
 
 
-def create_scheduler_agent() -> Agent:
-    zoom_tools = CustomZoomTool(
-        account_id=st.session_state.zoom_account_id,
-        client_id=st.session_state.zoom_client_id,
-        client_secret=st.session_state.zoom_client_secret
-    )
+def create_resume_analyzer() -> Agent:
+    """Creates and returns a resume analysis agent."""
+    if not st.session_state.openai_api_key:
+        st.error("Please enter your OpenAI API key first.")
+        return None
 
-    return Agent(
-        name="Interview Scheduler",
-        model=OpenAIChat(
-            id="gpt-4o",
-            api_key=st.session_state.openai_api_key
-        ),
-        tools=[zoom_tools],
-        description="You are an interview scheduling coordinator.",
-        instructions=[
-            "You are an expert at scheduling technical interviews using Zoom.",
-            "Schedule interviews during business hours (9 AM - 5 PM EST)",
-            "Create meetings with proper titles and descriptions",
-            "Ensure all meeting details are included in responses",
-            "Use ISO 8601 format for dates",
-            "Handle scheduling errors gracefully"
-        ],
-        markdown=True,
-        show_tool_calls=True
-    )
+    return build_resume_analyzer(st.session_state.openai_api_key)
 
 
-def extract_text_from_pdf(pdf_file) -> str:
+def extract_resume_from_pdf(pdf_file) -> Optional[ResumeText]:
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        if isinstance(pdf_file, (bytes, bytearray)):
+            data = bytes(pdf_file)
+        else:
+            data = pdf_file.getvalue() if hasattr(pdf_file, "getvalue") else pdf_file.read()
+        return parse_resume(data)
     except Exception as e:
         st.error(f"Error extracting PDF text: {str(e)}")
-        return ""
+        return None
 
 
-def analyze_resume(
+def _response_content(response):
+    if response.content is not None:
+        return response.content
+    return next((msg.content for msg in response.messages or [] if msg.role == 'assistant'), None)
+
+
+def evaluate_resume(
     resume_text: str,
     role: Literal["ai_ml_engineer", "frontend_engineer", "backend_engineer"],
-    analyzer: Agent
-) -> Tuple[bool, str]:
-    try:
-        response = analyzer.run(
-            f"""Please analyze this resume against the following requirements and provide your response in valid JSON format:
-            Role Requirements:
-            {ROLE_REQUIREMENTS[role]}
-            Resume Text:
-            {resume_text}
-            Your response must be a valid JSON object like this:
-            {{
-                "selected": true/false,
-                "feedback": "Detailed feedback explaining the decision",
-                "matching_skills": ["skill1", "skill2"],
-                "missing_skills": ["skill3", "skill4"],
-                "experience_level": "junior/mid/senior"
-            }}
-            Evaluation criteria:
-            1. Match at least 70% of required skills
-            2. Consider both theoretical knowledge and practical experience
-            3. Value project experience and real-world applications
-            4. Consider transferable skills from similar technologies
-            5. Look for evidence of continuous learning and adaptability
-            Important: Return ONLY the JSON object without any markdown formatting or backticks.
-            """
-        )
-
-        assistant_message = next((msg.content for msg in response.messages if msg.role == 'assistant'), None)
-        if not assistant_message:
+    analyzer: Agent,
+    repairer: Optional[Agent] = None,
+    max_repairs: int = 2,
+    metrics: AnalysisMetrics = ANALYSIS_METRICS,
+    sections: Optional[Dict[str, str]] = None
+) -> Dict:
+    """Runs the analyzer and returns the full validated analysis as a dict.
+
+    sections are the resume's split_sections; its skills, experience and projects are put ahead
+    of the full text. Output that does not match the schema is sent to repairer (a cheaper model)
+    up to max_repairs times before ValueError is raised.
+    """
+    key_sections = key_sections_text(sections or {})
+    key_sections_block = f"""Skills, Experience and Projects (judge skills and experience mainly from these):
+        {key_sections}
+        """ if key_sections else ""
+    prompt = f"""Please analyze this resume against the following requirements and provide your response in valid JSON format:
+        Role Requirements:
+        {ROLE_REQUIREMENTS[role]}
+        {key_sections_block}Resume Text:
+        {resume_text}
+        Your response must be a valid JSON object like this:
+        {{
+            "selected": true/false,
+            "feedback": "Detailed feedback explaining the decision",
+            "matching_skills": ["skill1", "skill2"],
+            "missing_skills": ["skill3", "skill4"],
+            "experience_level": "junior/mid/senior"
+        }}
+        Evaluation criteria:
+        1. Match at least 70% of required skills
+        2. Consider both theoretical knowledge and practical experience
+        3. Value project experience and real-world applications
+        4. Consider transferable skills from similar technologies
+        5. Look for evidence of continuous learning and adaptability
+        Important: Return ONLY the JSON object without any markdown formatting or backticks.
+        """
+
+    def analyze():
+        content = _response_content(analyzer.run(prompt))
+        if content is None:
             raise ValueError("No assistant message found in response.")
+        return content
+
+    repair = (lambda repair_prompt: _response_content(repairer.run(repair_prompt)) or "") if repairer else None
+    return run_with_repair(analyze, repair, max_repairs, metrics).model_dump()
 
-        result = json.loads(assistant_message.strip())
-        if not isinstance(result, dict) or not all(k in result for k in ["selected", "feedback"]):
-            raise ValueError("Invalid response format")
 
+def analyze_resume(
+    resume_text: str,
+    role: Literal["ai_ml_engineer", "frontend_engineer", "backend_engineer"],
+    analyzer: Agent,
+    sections: Optional[Dict[str, str]] = None
+) -> Tuple[bool, str]:
+    """Analyzes a resume and keeps the full result in st.session_state.analysis_result."""
+    try:
+        result = evaluate_resume(resume_text, role, analyzer, repairer=build_repair_agent(st.session_state.openai_api_key),
+                                 sections=sections)
+        st.session_state.analysis_result = result
         return result["selected"], result["feedback"]
 
-    except (json.JSONDecodeError, ValueError) as e:
+    except ValueError as e:
         st.error(f"Error processing response: {str(e)}")
         return False, f"Error analyzing resume: {str(e)}"
 
 
-def send_selection_email(email_agent: Agent, to_email: str, role: str) -> None:
-    email_agent.run(
-        f"""
-        Send an email to {to_email} regarding their selection for the {role} position.
-        The email should:
-        1. Congratulate them on being selected
-        2. Explain the next steps in the process
-        3. Mention that they will receive interview details shortly
-        4. The name of the company is 'AI Recruiting Team'
-        """
-    )
+def persist_analysis(result: Dict, role: str, resume_file, email: str) -> None:
+    """Saves the full single-application analysis to the screening database used by batch mode."""
+    from batch_screening import ScreeningStore  # batch_screening imports this module
 
+    try:
+        store = ScreeningStore()
+        store.save_interactive(hashlib.sha256(resume_file.getvalue()).hexdigest(), role, resume_file.name,
+                               email, st.session_state.resume_text, result)
+    except Exception as e:
+        logger.error(f"Error saving analysis: {e}")
 
-def send_rejection_email(email_agent: Agent, to_email: str, role: str, feedback: str) -> None:
-    """
-    Send a rejection email with constructive feedback.
-    """
-    email_agent.run(
-        f"""
-        Send an email to {to_email} regarding their application for the {role} position.
-        Use this specific style:
-        1. use all lowercase letters
-        2. be empathetic and human
-        3. mention specific feedback from: {feedback}
-        4. encourage them to upskill and try again
-        5. suggest some learning resources based on missing skills
-        6. end the email with exactly:
-           best,
-           the ai recruiting team
-        
-        Do not include any names in the signature.
-        The tone should be like a human writing a quick but thoughtful email.
-        """
+
+def session_outbound_config() -> OutboundConfig:
+    return OutboundConfig(
+        st.session_state.openai_api_key, st.session_state.email_sender, st.session_state.email_passkey,
+        st.session_state.company_name, st.session_state.zoom_account_id, st.session_state.zoom_client_id,
+        st.session_state.zoom_client_secret
     )
 
 
-def schedule_interview(scheduler: Agent, candidate_email: str, email_agent: Agent, role: str) -> None:
-    """
-    Schedule interviews during business hours (9 AM - 5 PM IST).
-    """
-    try:
-        # Get current time in IST
-        ist_tz = pytz.timezone('Asia/Kolkata')
-        current_time_ist = datetime.now(ist_tz)
-
-        tomorrow_ist = current_time_ist + timedelta(days=1)
-        interview_time = tomorrow_ist.replace(hour=11, minute=0, second=0, microsecond=0)
-        formatted_time = interview_time.strftime('%Y-%m-%dT%H:%M:%S')
-
-        meeting_response = scheduler.run(
-            f"""Schedule a 60-minute technical interview with these specifications:
-            - Title: '{role} Technical Interview'
-            - Date: {formatted_time}
-            - Timezone: IST (India Standard Time)
-            - Attendee: {candidate_email}
-            
-            Important Notes:
-            - The meeting must be between 9 AM - 5 PM IST
-            - Use IST (UTC+5:30) timezone for all communications
-            - Include timezone information in the meeting details
-            """
-        )
-
-        email_agent.run(
-            f"""Send an interview confirmation email with these details:
-            - Role: {role} position
-            - Meeting Details: {meeting_response}
-            
-            Important:
-            - Clearly specify that the time is in IST (India Standard Time)
-            - Ask the candidate to join 5 minutes early
-            - Include timezone conversion link if possible
-            - Ask him to be confident and not so nervous and prepare well for the interview
-            """
-        )
-        
-        st.success("Interview scheduled successfully! Check your email for details.")
-        
-    except Exception as e:
-        logger.error(f"Error scheduling interview: {str(e)}")
-        st.error("Unable to schedule interview. Please try again.")
+def get_outbound() -> Tuple[Outbound, str]:
+    """Returns the process-wide outbound queue and workers, and this session's tenant with its
+    sidebar settings registered, so the session's jobs are sent with its own credentials."""
+    outbound = _process_outbound()
+    return outbound, outbound.register(session_outbound_config())
+
+
+@st.cache_resource(show_spinner=False)
+def _process_outbound() -> Outbound:
+    """The one Outbound whose workers run in this process, shared by every session."""
+    outbound = Outbound()
+    outbound.workers.start()
+    return outbound
+
+
+def render_outbound_status(outbound: Outbound, tenant: str) -> None:
+    """Status view of this sender's queued emails and interview scheduling."""
+    counts = outbound.queue.counts([tenant])
+    with st.expander(f"Outbound actions: {counts['queued'] + counts['running']} pending, {counts['failed']} failed"):
+        cols = st.columns(len(counts))
+        for col, (name, n) in zip(cols, counts.items()):
+            col.metric(name.capitalize(), n)
+        jobs = outbound.queue.jobs(limit=50, tenants=[tenant])
+        if jobs:
+            st.dataframe(jobs, use_container_width=True, hide_index=True)
+        failed = [job["id"] for job in jobs if job["status"] == "failed"]
+        if failed and st.button("Retry failed actions"):
+            for job_id in failed:
+                outbound.queue.retry(job_id)
+            st.rerun()
+        if st.button("Refresh status"):
+            st.rerun()
+
+
+def render_batch_screening() -> None:
+    """Batch mode: screen a zip or several PDFs at once and queue the emails as a separate step."""
+    import tempfile, zipfile
+    from batch_screening import enqueue_queued_emails, format_stats, run_batch
+
+    st.subheader("Batch Screening")
+    role = st.selectbox("Role to screen for:", list(ROLE_REQUIREMENTS), key="batch_role")
+    uploads = st.file_uploader("Upload resumes (PDFs or a zip of PDFs)", type=["pdf", "zip"], accept_multiple_files=True)
+    calls_per_minute = st.number_input("Max analysis calls per minute", min_value=1, value=60)
+    col1, col2 = st.columns(2)
+    with col1:
+        prefilter_threshold = st.slider("Pre-filter threshold", 0.0, 1.0, 0.35, 0.05,
+                                        help="Resumes scoring below this (minus the borderline band) are rejected locally without an LLM call. Set to 0 to disable.")
+    with col2:
+        borderline_band = st.slider("Borderline band", 0.0, 0.5, 0.1, 0.05)
+
+    if uploads and st.button("Run Batch Screening"):
+        stage_labels = {"extract": "Extracting text", "prefilter": "Pre-filtering", "analyze": "Analyzing resumes"}
+        bars = {}
+
+        def show_progress(stage: str, done: int, total: int) -> None:
+            if stage not in bars:
+                bars[stage] = st.progress(0.0, text=stage_labels.get(stage, stage))
+            bars[stage].progress(done / total if total else 1.0, text=f"{stage_labels.get(stage, stage)}: {done}/{total}")
+
+        with tempfile.TemporaryDirectory() as upload_dir:
+            for i, upload in enumerate(uploads):
+                if upload.name.lower().endswith(".zip"):
+                    with zipfile.ZipFile(upload) as archive:
+                        pdfs = [n for n in archive.namelist() if n.lower().endswith(".pdf") and not n.startswith("__MACOSX/")]
+                        archive.extractall(os.path.join(upload_dir, str(i)), members=pdfs)
+                else:
+                    with open(os.path.join(upload_dir, f"{i}_{upload.name}"), "wb") as f:
+                        f.write(upload.getbuffer())
+            st.session_state.batch_results, st.session_state.batch_stats = run_batch(
+                upload_dir, role, st.session_state.openai_api_key,
+                calls_per_minute=calls_per_minute,
+                prefilter_threshold=prefilter_threshold or None, borderline_band=borderline_band,
+                progress=show_progress
+            )
+
+    results = st.session_state.get('batch_results')
+    if results:
+        st.dataframe(results, use_container_width=True)
+        st.caption(f"{len(results)} candidates ranked, {sum(r['selected'] for r in results)} selected")
+        st.text(format_stats(st.session_state.get('batch_stats', {"analyze": {"calls": 0}})))
+        if st.button("Send Queued Emails"):
+            enqueued = enqueue_queued_emails(role, *get_outbound())
+            st.success(f"Queued {enqueued} emails; they are sent in the background.")
+            if not session_outbound_config().zoom_configured:
+                st.warning("Zoom is not configured in the sidebar, so no interviews were scheduled for selected candidates.")
+    render_outbound_status(*get_outbound())
 
 
 def main() -> None:
@@ -320,6 +306,7 @@ def main() -> None:
     init_session_state()
     with st.sidebar:
         st.header("Configuration")
+        mode = st.radio("Mode", ["Single application", "Batch screening"], horizontal=True)
         
         # OpenAI Configuration
         st.subheader("OpenAI Settings")
@@ -348,6 +335,14 @@ def main() -> None:
                           'Email Sender': st.session_state.email_sender, 'Email Password': st.session_state.email_passkey,
                           'Company Name': st.session_state.company_name}
 
+    if mode == "Batch screening":
+        missing_configs = [k for k in ('OpenAI API Key', 'Email Sender', 'Email Password', 'Company Name') if not required_configs[k]]
+        if missing_configs:
+            st.warning(f"Please configure the following in the sidebar: {', '.join(missing_configs)}")
+        else:
+            render_batch_screening()
+        return
+
     missing_configs = [k for k, v in required_configs.items() if not v]
     if missing_configs:
         st.warning(f"Please configure the following in the sidebar: {', '.join(missing_configs)}")
@@ -363,10 +358,10 @@ def main() -> None:
     # Add a "New Application" button before the resume upload
     if st.button("📝 New Application"):
         # Clear only the application-related states
-        keys_to_clear = ['resume_text', 'analysis_complete', 'is_selected', 'candidate_email', 'current_pdf']
+        keys_to_clear = ['resume_text', 'analysis_complete', 'is_selected', 'candidate_email', 'current_pdf', 'analysis_result']
         for key in keys_to_clear:
             if key in st.session_state:
-                st.session_state[key] = None if key == 'current_pdf' else ""
+                st.session_state[key] = None if key in ('current_pdf', 'analysis_result') else ""
         st.rerun()
 
     resume_file = st.file_uploader("Upload your resume (PDF)", type=["pdf"], key="resume_uploader")
@@ -375,29 +370,27 @@ def main() -> None:
         st.session_state.resume_text = ""
         st.session_state.analysis_complete = False
         st.session_state.is_selected = False
+        st.session_state.analysis_result = None
         st.rerun()
 
     if resume_file:
         st.subheader("Uploaded Resume")
         col1, col2 = st.columns([4, 1])
         
+        # Read the upload once and share the bytes between the viewer, download and parser
+        resume_bytes = resume_file.getvalue()
         with col1:
-            import tempfile, os
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(resume_file.read())
-                tmp_file_path = tmp_file.name
-            resume_file.seek(0)
-            try: pdf_viewer(tmp_file_path)
-            finally: os.unlink(tmp_file_path)
+            pdf_viewer(resume_bytes)
         
         with col2:
-            st.download_button(label="📥 Download", data=resume_file, file_name=resume_file.name, mime="application/pdf")
+            st.download_button(label="📥 Download", data=resume_bytes, file_name=resume_file.name, mime="application/pdf")
         # Process the resume text
         if not st.session_state.resume_text:
             with st.spinner("Processing your resume..."):
-                resume_text = extract_text_from_pdf(resume_file)
-                if resume_text:
-                    st.session_state.resume_text = resume_text
+                resume = extract_resume_from_pdf(resume_bytes)
+                if resume and resume.text:
+                    st.session_state.resume_text = resume.text
+                    st.session_state.resume_sections = resume.sections
                     st.success("Resume processed successfully!")
                 else:
                     st.error("Could not process the PDF. Please try again.")
@@ -415,16 +408,16 @@ def main() -> None:
         if st.button("Analyze Resume"):
             with st.spinner("Analyzing your resume..."):
                 resume_analyzer = create_resume_analyzer()
-                email_agent = create_email_agent()  # Create email agent here
                 
-                if resume_analyzer and email_agent:
-                    print("DEBUG: Starting resume analysis")
+                if resume_analyzer:
                     is_selected, feedback = analyze_resume(
                         st.session_state.resume_text,
                         role,
-                        resume_analyzer
+                        resume_analyzer,
+                        st.session_state.resume_sections
                     )
-                    print(f"DEBUG: Analysis complete - Selected: {is_selected}, Feedback: {feedback}")
+                    if st.session_state.analysis_result:
+                        persist_analysis(st.session_state.analysis_result, role, resume_file, email)
 
                     if is_selected:
                         st.success("Congratulations! Your skills match our requirements.")
@@ -435,80 +428,52 @@ def main() -> None:
                         st.warning("Unfortunately, your skills don't match our requirements.")
                         st.write(f"Feedback: {feedback}")
                         
-                        # Send rejection email
-                        with st.spinner("Sending feedback email..."):
-                            try:
-                                send_rejection_email(
-                                    email_agent=email_agent,
-                                    to_email=email,
-                                    role=role,
-                                    feedback=feedback
-                                )
-                                st.info("We've sent you an email with detailed feedback.")
-                            except Exception as e:
-                                logger.error(f"Error sending rejection email: {e}")
-                                st.error("Could not send feedback email. Please try again.")
+                        # Queue the rejection email; a background worker renders and sends it
+                        if st.session_state.analysis_result:
+                            outbound, tenant = get_outbound()
+                            outbound.enqueue_rejection_email(
+                                tenant, email, role, feedback, st.session_state.analysis_result['missing_skills'])
+                            st.info("We'll send you an email with detailed feedback shortly.")
+
+    result = st.session_state.get('analysis_result')
+    if result:
+        with st.expander("Analysis details"):
+            st.write(f"**Experience level:** {result['experience_level'] or 'unknown'}")
+            st.write(f"**Matching skills:** {', '.join(result['matching_skills']) or 'none'}")
+            st.write(f"**Missing skills:** {', '.join(result['missing_skills']) or 'none'}")
+            quality = ANALYSIS_METRICS.snapshot()
+            st.caption(f"{quality['analyses']} analyses this session: {quality['repaired']} repaired, "
+                       f"{quality['failed']} failed ({quality['failure_rate']:.0%})")
 
     if st.session_state.get('analysis_complete') and st.session_state.get('is_selected', False):
         st.success("Congratulations! Your skills match our requirements.")
         st.info("Click 'Proceed with Application' to continue with the interview process.")
         
         if st.button("Proceed with Application", key="proceed_button"):
-            print("DEBUG: Proceed button clicked")  # Debug
-            with st.spinner("🔄 Processing your application..."):
-                try:
-                    print("DEBUG: Creating email agent")  # Debug
-                    email_agent = create_email_agent()
-                    print(f"DEBUG: Email agent created: {email_agent}")  # Debug
+            try:
+                # Both run on background workers; the keys make repeated clicks a no-op
+                outbound, tenant = get_outbound()
+                outbound.enqueue_selection_email(tenant, st.session_state.candidate_email, role)
+                outbound.enqueue_interview(tenant, st.session_state.candidate_email, role)
+                st.success("""
+                    🎉 Application Successfully Processed!
                     
-                    print("DEBUG: Creating scheduler agent")  # Debug
-                    scheduler_agent = create_scheduler_agent()
-                    print(f"DEBUG: Scheduler agent created: {scheduler_agent}")  # Debug
-
-                    # 3. Send selection email
-                    with st.status("📧 Sending confirmation email...", expanded=True) as status:
-                        print(f"DEBUG: Attempting to send email to {st.session_state.candidate_email}")  # Debug
-                        send_selection_email(
-                            email_agent,
-                            st.session_state.candidate_email,
-                            role
-                        )
-                        print("DEBUG: Email sent successfully")  # Debug
-                        status.update(label="✅ Confirmation email sent!")
-
-                    # 4. Schedule interview
-                    with st.status("📅 Scheduling interview...", expanded=True) as status:
-                        print("DEBUG: Attempting to schedule interview")  # Debug
-                        schedule_interview(
-                            scheduler_agent,
-                            st.session_state.candidate_email,
-                            email_agent,
-                            role
-                        )
-                        print("DEBUG: Interview scheduled successfully")  # Debug
-                        status.update(label="✅ Interview scheduled!")
-
-                    print("DEBUG: All processes completed successfully")  # Debug
-                    st.success("""
-                        🎉 Application Successfully Processed!
-                        
-                        Please check your email for:
-                        1. Selection confirmation ✅
-                        2. Interview details with Zoom link 🔗
-                        
-                        Next steps:
-                        1. Review the role requirements
-                        2. Prepare for your technical interview
-                        3. Join the interview 5 minutes early
-                    """)
-
-                except Exception as e:
-                    print(f"DEBUG: Error occurred: {str(e)}")  # Debug
-                    print(f"DEBUG: Error type: {type(e)}")  # Debug
-                    import traceback
-                    print(f"DEBUG: Full traceback: {traceback.format_exc()}")  # Debug
-                    st.error(f"An error occurred: {str(e)}")
-                    st.error("Please try again or contact support.")
+                    Please check your email shortly for:
+                    1. Selection confirmation ✅
+                    2. Interview details with Zoom link 🔗
+                    
+                    Next steps:
+                    1. Review the role requirements
+                    2. Prepare for your technical interview
+                    3. Join the interview 5 minutes early
+                """)
+
+            except Exception as e:
+                logger.error(f"Error queueing application actions: {e}")
+                st.error(f"An error occurred: {str(e)}")
+                st.error("Please try again or contact support.")
+
+    render_outbound_status(*get_outbound())
 
     # Reset button
     if st.sidebar.button("Reset Application"):
@@ -0,0 +1,499 @@
+"""Batch resume screening.
+
+Screens a directory or zip of PDF resumes in stages that are checkpointed to SQLite,
+so a crashed or interrupted run picks up where it stopped:
+
+    python batch_screening.py screen --input resumes.zip --role ai_ml_engineer --out ranked.csv
+    python batch_screening.py send-emails --role ai_ml_engineer --sender-email hr@example.com --company-name Acme
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prefilter import RolePrefilter
+from resume_analysis import AnalysisMetrics
+from resume_parser import ResumeParser, split_sections
+from ai_recruitment_agent_team import (
+    ROLE_REQUIREMENTS,
+    build_repair_agent,
+    build_resume_analyzer,
+    evaluate_resume,
+)
+from outbound import DEFAULT_QUEUE_PATH, Outbound, OutboundConfig
+
+# Used for the "seconds saved" estimate until a run has measured real analyze latency
+DEFAULT_LLM_SECONDS = 10.0
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def _no_progress(stage: str, done: int, total: int) -> None:
+    pass
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most calls_per_minute start in any minute."""
+
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ScreeningStore:
+    """SQLite checkpoint of every candidate's progress through the batch stages."""
+
+    def __init__(self, path: str = "screening.sqlite3"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS candidates (
+                    content_hash TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    email TEXT,
+                    resume_text TEXT,
+                    status TEXT NOT NULL,
+                    selected INTEGER,
+                    feedback TEXT,
+                    result_json TEXT,
+                    error TEXT,
+                    email_status TEXT,
+                    prefilter_score REAL,
+                    sections_json TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (content_hash, role)
+                )
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(candidates)")}
+            if "prefilter_score" not in columns:
+                self._conn.execute("ALTER TABLE candidates ADD COLUMN prefilter_score REAL")
+            if "sections_json" not in columns:
+                self._conn.execute("ALTER TABLE candidates ADD COLUMN sections_json TEXT")
+            # Extraction failures used to share the analysis 'failed' status and were never retried
+            self._conn.execute(
+                "UPDATE candidates SET status = 'extract_failed' "
+                "WHERE status = 'failed' AND (resume_text IS NULL OR resume_text = '')"
+            )
+
+    def known_hashes(self, role: str) -> set:
+        """Hashes that need no extraction; failed extractions are left out so every run tries them again."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content_hash FROM candidates WHERE role = ? AND status != 'extract_failed'", (role,)
+            ).fetchall()
+        return {row["content_hash"] for row in rows}
+
+    def add_extracted(self, content_hash: str, role: str, file_name: str, resume_text: str,
+                      sections: Optional[Dict[str, str]] = None, error: Optional[str] = None) -> None:
+        """Record an extraction; empty text is stored as 'extract_failed', and a later success replaces it."""
+        match = EMAIL_PATTERN.search(resume_text)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO candidates (content_hash, role, file_name, email, resume_text, sections_json, "
+                "status, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (content_hash, role) DO UPDATE SET file_name = excluded.file_name, "
+                "email = excluded.email, resume_text = excluded.resume_text, sections_json = excluded.sections_json, "
+                "status = excluded.status, error = excluded.error, updated_at = excluded.updated_at "
+                "WHERE candidates.status = 'extract_failed'",
+                (content_hash, role, file_name, match.group(0) if match else None, resume_text,
+                 json.dumps(sections or {}), "extracted" if resume_text else "extract_failed",
+                 None if resume_text else error or "No text could be extracted", time.time()),
+            )
+
+    def pending_analysis(self, role: str, retry_failed: bool = False) -> List[sqlite3.Row]:
+        statuses = ("extracted", "failed") if retry_failed else ("extracted",)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT * FROM candidates WHERE role = ? AND status IN ({','.join('?' * len(statuses))}) "
+                "AND resume_text != ''",
+                (role, *statuses),
+            ).fetchall()
+
+    def save_result(self, content_hash: str, role: str, result: Dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE candidates SET status = 'analyzed', selected = ?, feedback = ?, result_json = ?, "
+                "error = NULL, updated_at = ? WHERE content_hash = ? AND role = ?",
+                (int(bool(result["selected"])), result["feedback"], json.dumps(result), time.time(), content_hash, role),
+            )
+
+    def save_interactive(self, content_hash: str, role: str, file_name: str, email: str,
+                         resume_text: str, result: Dict) -> None:
+        """Record an analysis from the single-application flow, which sends its own emails, so it is never queued."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO candidates (content_hash, role, file_name, email, resume_text, status, selected, "
+                "feedback, result_json, email_status, updated_at) VALUES (?, ?, ?, ?, ?, 'analyzed', ?, ?, ?, 'interactive', ?)",
+                (content_hash, role, file_name, email, resume_text, int(bool(result["selected"])), result["feedback"],
+                 json.dumps(result), time.time()),
+            )
+
+    def set_prefilter_score(self, content_hash: str, role: str, score: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE candidates SET prefilter_score = ? WHERE content_hash = ? AND role = ?",
+                (score, content_hash, role),
+            )
+
+    def save_error(self, content_hash: str, role: str, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE candidates SET status = 'failed', error = ?, updated_at = ? WHERE content_hash = ? AND role = ?",
+                (error, time.time(), content_hash, role),
+            )
+
+    def ranked(self, role: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM candidates WHERE role = ? AND status = 'analyzed'", (role,)
+            ).fetchall()
+        ranked = []
+        for row in rows:
+            result = json.loads(row["result_json"])
+            matching = result.get("matching_skills") or []
+            missing = result.get("missing_skills") or []
+            total = len(matching) + len(missing)
+            ranked.append({
+                "file_name": row["file_name"],
+                "email": row["email"] or "",
+                "selected": bool(row["selected"]),
+                "match_ratio": round(len(matching) / total, 3) if total else 0.0,
+                "prefilter_score": row["prefilter_score"],
+                "screened_by": result.get("screened_by", "llm"),
+                "experience_level": result.get("experience_level", ""),
+                "matching_skills": ", ".join(matching),
+                "missing_skills": ", ".join(missing),
+                "feedback": row["feedback"],
+                "email_status": row["email_status"] or "",
+            })
+        ranked.sort(key=lambda r: (r["selected"], r["match_ratio"]), reverse=True)
+        return ranked
+
+    def queue_emails(self, role: str) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE candidates SET email_status = 'queued', updated_at = ? "
+                "WHERE role = ? AND status = 'analyzed' AND email IS NOT NULL AND email_status IS NULL",
+                (time.time(), role),
+            )
+        return cursor.rowcount
+
+    def queued_emails(self, role: str) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM candidates WHERE role = ? AND email_status = 'queued'", (role,)
+            ).fetchall()
+
+    def enqueued_emails(self, role: str) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM candidates WHERE role = ? AND email_status = 'enqueued'", (role,)
+            ).fetchall()
+
+    def set_email_status(self, content_hash: str, role: str, email_status: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE candidates SET email_status = ?, updated_at = ? WHERE content_hash = ? AND role = ?",
+                (email_status, time.time(), content_hash, role),
+            )
+
+
+def collect_resumes(source: str, workdir: str) -> List[str]:
+    """Return the PDF paths in a directory, or extract them from a zip archive into workdir."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [n for n in archive.namelist() if n.lower().endswith(".pdf") and not n.startswith("__MACOSX/")]
+            archive.extractall(workdir, members=names)
+        return sorted(os.path.join(workdir, name) for name in names)
+    paths = []
+    for root, _, files in os.walk(source):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+    return sorted(paths)
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_pdf_text(path: str) -> Tuple[str, str, Dict[str, str], Optional[str]]:
+    """Process pool worker: return (path, text, sections, error), with empty text when the PDF cannot be read."""
+    try:
+        with open(path, "rb") as f:
+            # Already running in a pool process, so parse each resume's pages sequentially
+            resume = ResumeParser(workers=1).parse(f.read())
+            return path, resume.text, resume.sections, None
+    except Exception as e:
+        return path, "", {}, f"{type(e).__name__}: {e}"
+
+
+def row_sections(row: sqlite3.Row) -> Dict[str, str]:
+    """The sections stored with a candidate; rows extracted before they were stored are split again."""
+    if row["sections_json"]:
+        return json.loads(row["sections_json"])
+    return split_sections(row["resume_text"] or "")
+
+
+def extract_stage(store: ScreeningStore, paths: List[str], role: str, workers: int,
+                  progress: ProgressCallback = _no_progress) -> int:
+    """Extract text for resumes not yet in the store, or whose extraction failed before, across a process pool."""
+    known = store.known_hashes(role)
+    hashes = {path: file_hash(path) for path in paths}
+    todo = [path for path in paths if hashes[path] not in known]
+    progress("extract", 0, len(todo))
+    if not todo:
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(extract_pdf_text, path) for path in todo]
+        for done, future in enumerate(as_completed(futures), start=1):
+            path, text, sections, error = future.result()
+            store.add_extracted(hashes[path], role, os.path.basename(path), text, sections, error)
+            progress("extract", done, len(todo))
+    return len(todo)
+
+
+def prefilter_stage(store: ScreeningStore, role: str, threshold: float = 0.35, borderline_band: float = 0.1,
+                    progress: ProgressCallback = _no_progress) -> Dict:
+    """Score pending resumes locally and reject clear mismatches without an LLM call."""
+    rows = store.pending_analysis(role)
+    progress("prefilter", 0, len(rows))
+    started = time.perf_counter()
+    results = RolePrefilter(ROLE_REQUIREMENTS[role]).score(
+        [row["resume_text"] for row in rows], threshold, borderline_band, [row_sections(row) for row in rows]
+    )
+    counts = {"pass": 0, "borderline": 0, "reject": 0}
+    for row, result in zip(rows, results):
+        counts[result.decision] += 1
+        store.set_prefilter_score(row["content_hash"], role, result.score)
+        if result.decision == "reject":
+            store.save_result(row["content_hash"], role, {
+                "selected": False,
+                "feedback": "Your resume does not yet show enough of the required skills for this role. "
+                            f"Missing: {'; '.join(result.missing_skills)}.",
+                "matching_skills": result.matching_skills,
+                "missing_skills": result.missing_skills,
+                "experience_level": "",
+                "screened_by": "prefilter",
+            })
+    progress("prefilter", len(rows), len(rows))
+    return {"scored": len(rows), **counts, "seconds": time.perf_counter() - started}
+
+
+def analyze_stage(store: ScreeningStore, role: str, openai_api_key: str, workers: int = 4,
+                  calls_per_minute: float = 60, retry_failed: bool = False,
+                  progress: ProgressCallback = _no_progress) -> Dict:
+    """Run analyze calls concurrently under a rate limit, checkpointing each result as it arrives."""
+    rows = store.pending_analysis(role, retry_failed=retry_failed)
+    progress("analyze", 0, len(rows))
+    metrics = AnalysisMetrics()
+    if not rows:
+        return {"calls": 0, "mean_latency": None, "quality": metrics.snapshot()}
+    limiter = RateLimiter(calls_per_minute)
+    # Agents keep per-run state, so each worker thread gets its own
+    local = threading.local()
+    latencies = []
+
+    def analyze(row: sqlite3.Row) -> None:
+        if not hasattr(local, "analyzer"):
+            local.analyzer = build_resume_analyzer(openai_api_key)
+            local.repairer = build_repair_agent(openai_api_key)
+        limiter.wait()
+        started = time.perf_counter()
+        try:
+            result = evaluate_resume(row["resume_text"], role, local.analyzer, local.repairer, metrics=metrics,
+                                     sections=row_sections(row))
+            store.save_result(row["content_hash"], role, result)
+        except Exception as e:
+            store.save_error(row["content_hash"], role, str(e))
+        latencies.append(time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyze, row) for row in rows]
+        for done, _ in enumerate(as_completed(futures), start=1):
+            progress("analyze", done, len(rows))
+    return {"calls": len(rows), "mean_latency": sum(latencies) / len(latencies), "quality": metrics.snapshot()}
+
+
+def write_ranked_csv(store: ScreeningStore, role: str, out_path: str) -> int:
+    ranked = store.ranked(role)
+    if not ranked:
+        return 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(ranked[0].keys()))
+        writer.writeheader()
+        writer.writerows(ranked)
+    return len(ranked)
+
+
+def run_batch(source: str, role: str, openai_api_key: str, db_path: str = "screening.sqlite3",
+              out_path: Optional[str] = None, extract_workers: int = 4, analyze_workers: int = 4,
+              calls_per_minute: float = 60, retry_failed: bool = False,
+              prefilter_threshold: Optional[float] = 0.35, borderline_band: float = 0.1,
+              progress: ProgressCallback = _no_progress) -> Tuple[List[Dict], Dict]:
+    """Extract, pre-filter, analyze, rank and queue emails for every resume in source.
+
+    Returns the ranked table and a stats dict; pass prefilter_threshold=None to send
+    every resume to the LLM.
+    """
+    store = ScreeningStore(db_path)
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = collect_resumes(source, workdir)
+        extract_stage(store, paths, role, extract_workers, progress)
+    stats = {}
+    if prefilter_threshold is not None:
+        stats["prefilter"] = prefilter_stage(store, role, prefilter_threshold, borderline_band, progress)
+    stats["analyze"] = analyze_stage(store, role, openai_api_key, analyze_workers, calls_per_minute, retry_failed, progress)
+    if "prefilter" in stats:
+        saved_calls = stats["prefilter"]["reject"]
+        mean_latency = stats["analyze"]["mean_latency"] or DEFAULT_LLM_SECONDS
+        stats["saved"] = {
+            "llm_calls": saved_calls,
+            "llm_seconds": saved_calls * mean_latency,
+            # Calls run analyze_workers at a time, so wall-clock savings are roughly this much
+            "wall_seconds": saved_calls * mean_latency / max(1, analyze_workers) - stats["prefilter"]["seconds"],
+        }
+    store.queue_emails(role)
+    if out_path:
+        write_ranked_csv(store, role, out_path)
+    return store.ranked(role), stats
+
+
+def format_stats(stats: Dict) -> str:
+    lines = []
+    if "prefilter" in stats:
+        p = stats["prefilter"]
+        lines.append(f"Pre-filter: {p['scored']} scored in {p['seconds']:.2f}s -> "
+                     f"{p['pass']} passed, {p['borderline']} borderline, {p['reject']} rejected locally")
+    a = stats["analyze"]
+    if a["calls"]:
+        lines.append(f"LLM analysis: {a['calls']} calls, {a['mean_latency']:.1f}s mean latency")
+        q = a["quality"]
+        repair_latency = f", {q['mean_repair_seconds']:.1f}s mean repair latency" if q["repair_attempts"] else ""
+        lines.append(f"Response quality: {q['first_pass_ok']} valid first time, {q['repaired']} repaired, "
+                     f"{q['failed']} failed ({q['failure_rate']:.1%}){repair_latency}")
+    if "saved" in stats:
+        s = stats["saved"]
+        lines.append(f"Saved: {s['llm_calls']} LLM calls, ~{s['llm_seconds']:.0f} LLM-seconds "
+                     f"(~{max(0.0, s['wall_seconds']):.0f}s wall-clock)")
+    return "\n".join(lines)
+
+
+def enqueue_queued_emails(role: str, outbound: Outbound, tenant: str, db_path: str = "screening.sqlite3") -> int:
+    """Separate stage: hand the emails queued by run_batch, and interviews for those selected, to the outbound
+    queue as jobs of tenant."""
+    store = ScreeningStore(db_path)
+    rows = store.queued_emails(role)
+    # Slots are allocated by the workers; without Zoom credentials the interviews are skipped with a warning
+    outbound.enqueue_interviews(tenant, [(row["email"], role) for row in rows if row["selected"]])
+    for row in rows:
+        if row["selected"]:
+            outbound.enqueue_selection_email(tenant, row["email"], role)
+        else:
+            missing_skills = json.loads(row["result_json"]).get("missing_skills") or []
+            outbound.enqueue_rejection_email(tenant, row["email"], role, row["feedback"], missing_skills)
+        store.set_email_status(row["content_hash"], role, "enqueued")
+    return len(rows)
+
+
+def sync_email_statuses(role: str, outbound: Outbound, tenant: str, db_path: str = "screening.sqlite3") -> Dict[str, int]:
+    """Copy the outcome of each candidate's email job back into the screening store."""
+    store = ScreeningStore(db_path)
+    counts: Dict[str, int] = {}
+    for row in store.enqueued_emails(role):
+        kind = "selection_email" if row["selected"] else "rejection_email"
+        status = outbound.job_status(kind, tenant, role, row["email"]) or "missing"
+        if status in ("done", "failed"):
+            store.set_email_status(row["content_hash"], role, "sent" if status == "done" else "failed")
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _print_progress(stage: str, done: int, total: int) -> None:
+    print(f"\r[{stage}] {done}/{total}", end="\n" if done == total else "", flush=True)
+
+
+def main() -> None:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default="screening.sqlite3", help="SQLite checkpoint file")
+    common.add_argument("--role", required=True, choices=list(ROLE_REQUIREMENTS))
+    common.add_argument("--openai-api-key", default=os.getenv("OPENAI_API_KEY"))
+
+    parser = argparse.ArgumentParser(description="Batch resume screening.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    screen = subparsers.add_parser("screen", parents=[common], help="Extract, analyze and rank resumes")
+    screen.add_argument("--input", required=True, help="Directory or zip file of PDF resumes")
+    screen.add_argument("--out", default="ranked_candidates.csv", help="Ranked results CSV")
+    screen.add_argument("--extract-workers", type=int, default=os.cpu_count() or 4)
+    screen.add_argument("--analyze-workers", type=int, default=4)
+    screen.add_argument("--rpm", type=float, default=60, help="Maximum analyze calls per minute")
+    screen.add_argument("--retry-failed", action="store_true", help="Re-analyze candidates that failed before")
+    screen.add_argument("--prefilter-threshold", type=float, default=0.35,
+                        help="Local score (0-1) at or above which resumes go to the LLM")
+    screen.add_argument("--borderline-band", type=float, default=0.1,
+                        help="Resumes this far below the threshold still go to the LLM")
+    screen.add_argument("--no-prefilter", action="store_true", help="Send every resume to the LLM")
+
+    emails = subparsers.add_parser("send-emails", parents=[common],
+                                   help="Send the queued selection/rejection emails through the outbound queue")
+    emails.add_argument("--sender-email", required=True)
+    emails.add_argument("--company-name", required=True)
+    emails.add_argument("--sender-passkey", default=os.getenv("EMAIL_PASSKEY"))
+    emails.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="Outbound action queue file")
+    emails.add_argument("--zoom-account-id", default=os.getenv("ZOOM_ACCOUNT_ID", ""))
+    emails.add_argument("--zoom-client-id", default=os.getenv("ZOOM_CLIENT_ID", ""))
+    emails.add_argument("--zoom-client-secret", default=os.getenv("ZOOM_CLIENT_SECRET", ""),
+                        help="Without all three Zoom settings, selected candidates get no interview")
+
+    args = parser.parse_args()
+    if not args.openai_api_key:
+        parser.error("Set OPENAI_API_KEY or pass --openai-api-key")
+
+    if args.command == "screen":
+        ranked, stats = run_batch(args.input, args.role, args.openai_api_key, args.db, args.out,
+                                  args.extract_workers, args.analyze_workers, args.rpm, args.retry_failed,
+                                  None if args.no_prefilter else args.prefilter_threshold, args.borderline_band,
+                                  progress=_print_progress)
+        print(format_stats(stats))
+        print(f"{len(ranked)} candidates ranked, {sum(r['selected'] for r in ranked)} selected -> {args.out}")
+    else:
+        outbound = Outbound(args.queue)
+        config = OutboundConfig(args.openai_api_key, args.sender_email, args.sender_passkey or "", args.company_name,
+                                args.zoom_account_id, args.zoom_client_id, args.zoom_client_secret)
+        if not config.zoom_configured:
+            print("Zoom is not configured: selected candidates get their email but no interview")
+        tenant = outbound.register(config)
+        enqueued = enqueue_queued_emails(args.role, outbound, tenant, args.db)
+        print(f"Enqueued {enqueued} emails, sending...")
+        outbound.workers.run_until_idle()
+        print(", ".join(f"{status}: {n}" for status, n in
+                        sync_email_statuses(args.role, outbound, tenant, args.db).items()))
+
+
+if __name__ == "__main__":
+    main()
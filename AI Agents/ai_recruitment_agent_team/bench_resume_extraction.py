@@ -0,0 +1,71 @@
+"""Benchmark resume text extraction over a directory of sample PDFs.
+
+Compares the original page loop (``text += page.extract_text()``) with ResumeParser
+on a cold cache and on a warm cache:
+
+    python bench_resume_extraction.py --corpus ./sample_resumes --repeat 3
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import PyPDF2
+
+from resume_parser import ResumeParser
+
+
+def legacy_extract(data: bytes) -> str:
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text
+
+
+def time_corpus(corpus: List[bytes], extract: Callable[[bytes], object]) -> float:
+    started = time.perf_counter()
+    for data in corpus:
+        extract(data)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark resume PDF extraction.")
+    parser.add_argument("--corpus", required=True, help="Directory of sample PDF resumes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(root, f) for root, _, files in os.walk(args.corpus) for f in files if f.lower().endswith(".pdf")
+    )
+    if not paths:
+        parser.error(f"No PDFs found in {args.corpus}")
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as f:
+            corpus.append(f.read())
+    pages = sum(len(PyPDF2.PdfReader(io.BytesIO(data)).pages) for data in corpus)
+    print(f"{len(corpus)} PDFs, {pages} pages, {sum(map(len, corpus)) / 1e6:.1f} MB")
+
+    results = {"legacy": [], "parser (cold cache)": [], "parser (warm cache)": []}
+    for _ in range(args.repeat):
+        results["legacy"].append(time_corpus(corpus, legacy_extract))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            resume_parser = ResumeParser(cache_dir=cache_dir, workers=args.workers)
+            results["parser (cold cache)"].append(time_corpus(corpus, resume_parser.parse))
+            results["parser (warm cache)"].append(time_corpus(corpus, resume_parser.parse))
+
+    baseline = statistics.median(results["legacy"])
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"{name:<22} median {median * 1000:9.1f} ms  "
+              f"({median / len(corpus) * 1000:7.2f} ms/PDF, {baseline / median if median else float('inf'):6.1f}x vs legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Locally rendered recruitment emails, plus a cache for the optional LLM personalization paragraph."""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from string import Template
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+ROLE_TITLES: Dict[str, str] = {
+    "ai_ml_engineer": "ai/ml engineer",
+    "frontend_engineer": "frontend engineer",
+    "backend_engineer": "backend engineer",
+}
+
+TIMEZONE_CONVERTER_URL = "https://www.timeanddate.com/worldclock/converter.html"
+
+SIGNATURE = "best,\nthe ai recruiting team"
+
+TEMPLATES: Dict[str, Tuple[Template, Template]] = {
+    "selection": (
+        Template("your application for the $role_title position"),
+        Template(
+            "hi there,\n\n"
+            "great news: after reviewing your resume, we'd like to move you forward for the $role_title "
+            "position at $company.\n\n"
+            "$personalization\n\n"
+            "next steps: you'll receive a separate email shortly with the details of a 60-minute technical "
+            "interview over zoom.\n\n"
+            "$signature"
+        ),
+    ),
+    "rejection": (
+        Template("your application for the $role_title position"),
+        Template(
+            "hi there,\n\n"
+            "thank you for applying for the $role_title position at $company. after carefully reviewing your "
+            "resume, we've decided not to move forward this time.\n\n"
+            "here's some feedback from our review:\n$feedback\n\n"
+            "$personalization\n\n"
+            "we'd genuinely love to see you apply again once you've had a chance to build on these areas.\n\n"
+            "$signature"
+        ),
+    ),
+    "interview": (
+        Template("interview invitation: $role_title technical interview"),
+        Template(
+            "hi there,\n\n"
+            "your technical interview for the $role_title position at $company is confirmed.\n\n"
+            "when: $start_time ist (india standard time, utc+5:30)\n"
+            "duration: $duration minutes\n"
+            "zoom link: $join_url\n\n"
+            "to see this in your own timezone: $converter_url\n\n"
+            "please join 5 minutes early. be confident, don't be too nervous, and prepare well - "
+            "we're looking forward to talking with you.\n\n"
+            "$signature"
+        ),
+    ),
+}
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def role_title(role: str) -> str:
+    return ROLE_TITLES.get(role, role.replace("_", " "))
+
+
+def render_email(kind: str, role: str, company: str, personalization: str = "", **fields: str) -> Tuple[str, str]:
+    """Fill in a template and return (subject, body). Raises KeyError if a field is missing."""
+    subject, body = TEMPLATES[kind]
+    values = {
+        "role_title": role_title(role),
+        "company": company,
+        "personalization": personalization.strip(),
+        "signature": SIGNATURE,
+        "converter_url": TIMEZONE_CONVERTER_URL,
+        **fields,
+    }
+    return subject.substitute(values), _BLANK_LINES.sub("\n\n", body.substitute(values))
+
+
+def personalization_prompt(role: str, missing_skills: Iterable[str]) -> str:
+    return (
+        f"A candidate for the {role_title(role)} position is missing these skills: {', '.join(missing_skills)}.\n"
+        "Write one short paragraph (2-3 sentences, all lowercase) suggesting specific, well-known learning "
+        "resources for those skills. No greeting, no sign-off, no names."
+    )
+
+
+class PersonalizationCache:
+    """SQLite cache of personalization paragraphs keyed by role and the set of missing skills.
+
+    Concurrent requests for the same key wait for one generation instead of each calling the LLM.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS personalization (key TEXT PRIMARY KEY, role TEXT NOT NULL, "
+                "skills TEXT NOT NULL, paragraph TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def key(role: str, missing_skills: Iterable[str]) -> str:
+        skills = sorted({skill.strip().lower() for skill in missing_skills if skill.strip()})
+        return hashlib.sha256(f"{role}|{'|'.join(skills)}".encode()).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT paragraph FROM personalization WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_or_create(self, role: str, missing_skills: Iterable[str], generate: Callable[[str], str]) -> str:
+        """Return the cached paragraph, or call generate(prompt) once per key and store the result."""
+        missing_skills = list(missing_skills)
+        key = self.key(role, missing_skills)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            paragraph = self._lookup(key)
+            if paragraph is not None:
+                with self._lock:
+                    self.hits += 1
+                return paragraph
+            paragraph = generate(personalization_prompt(role, missing_skills)).strip()
+            with self._lock, self._conn:
+                self.misses += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO personalization VALUES (?, ?, ?, ?, ?)",
+                    (key, role, ", ".join(sorted(missing_skills)), paragraph, time.time()),
+                )
+            return paragraph
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,135 @@
+"""Local stand-ins for the SMTP server and the Zoom API, for trying the outbound queue offline.
+
+    python local_sinks.py --smtp-port 1025 --zoom-port 8765 --mail-dir ./sent_mail
+
+then run the app or `python outbound.py work` with:
+
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SECURITY=none
+    ZOOM_API_BASE=http://localhost:8765/v2 ZOOM_OAUTH_URL=http://localhost:8765/oauth/token
+"""
+import argparse
+import itertools
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Accepts any message and writes it to mail_dir as an .eml file. No AUTH or TLS."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        self.reply("220 local smtp sink")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 local smtp sink")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                self.server.save(sender, recipients, b"".join(lines))
+                self.reply("250 OK: queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, mail_dir: str):
+        super().__init__(address, SMTPSinkHandler)
+        self.mail_dir = mail_dir
+        self._counter = itertools.count(1)
+        os.makedirs(mail_dir, exist_ok=True)
+
+    def save(self, sender: str, recipients: list, data: bytes) -> None:
+        path = os.path.join(self.mail_dir, f"{int(time.time())}-{next(self._counter)}.eml")
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"[smtp] {sender} -> {', '.join(recipients)} saved to {path}", flush=True)
+
+
+class MockZoomHandler(BaseHTTPRequestHandler):
+    """Implements the OAuth token and create/list meeting endpoints used by outbound.py."""
+
+    meetings: list = []
+    _ids = itertools.count(1000)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.startswith("/oauth/token"):
+            self._send_json(200, {"access_token": f"mock-token-{time.time():.0f}", "expires_in": 3600})
+        elif self.path.startswith("/v2/users/me/meetings"):
+            meeting = {**json.loads(body or b"{}"), "id": next(self._ids)}
+            meeting["join_url"] = f"http://localhost/j/{meeting['id']}"
+            self.meetings.append(meeting)
+            print(f"[zoom] created meeting {meeting['id']} '{meeting.get('topic')}' at {meeting.get('start_time')}", flush=True)
+            self._send_json(201, meeting)
+        else:
+            self._send_json(404, {"message": "not found"})
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/v2/users/me/meetings"):
+            self._send_json(200, {"meetings": self.meetings, "total_records": len(self.meetings)})
+        else:
+            self._send_json(404, {"message": "not found"})
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink and a mock Zoom API.")
+    parser.add_argument("--smtp-port", type=int, default=1025)
+    parser.add_argument("--zoom-port", type=int, default=8765)
+    parser.add_argument("--mail-dir", default="sent_mail")
+    args = parser.parse_args()
+
+    smtp = SMTPSink(("localhost", args.smtp_port), args.mail_dir)
+    zoom = ThreadingHTTPServer(("localhost", args.zoom_port), MockZoomHandler)
+    threading.Thread(target=smtp.serve_forever, daemon=True).start()
+    print(f"SMTP sink on localhost:{args.smtp_port}, mock Zoom on http://localhost:{args.zoom_port}", flush=True)
+    try:
+        zoom.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
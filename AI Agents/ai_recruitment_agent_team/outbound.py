@@ -0,0 +1,298 @@
+"""Outbound recruitment actions run by background workers off the Streamlit request.
+
+Selection, rejection and interview emails are rendered from templates (email_templates.py)
+and sent over SMTP, and interviews are created through the Zoom REST API. Both endpoints
+can be pointed at local stand-ins (see local_sinks.py) with SMTP_HOST/SMTP_PORT/SMTP_SECURITY
+and ZOOM_API_BASE/ZOOM_OAUTH_URL.
+
+One Outbound serves every sender in a process. Credentials never go into the queue: each job
+names its sender's tenant, and the workers look the config up in the tenants registered with
+Outbound.register.
+
+    python outbound.py status
+    python outbound.py work      # process queued jobs with credentials from the environment
+    python outbound.py retry 12
+"""
+import argparse
+import hashlib
+import os
+import smtplib
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from llm_client import ensure_shared_transport, http_client
+from phi.utils.log import logger
+
+from action_queue import ActionQueue, ActionWorkers
+from email_templates import PersonalizationCache, render_email, role_title
+from zoom_scheduling import InterviewScheduler, ZoomClient
+
+DEFAULT_QUEUE_PATH = os.getenv("ACTION_QUEUE_PATH", "actions.sqlite3")
+
+
+@dataclass(frozen=True)
+class OutboundConfig:
+    openai_api_key: str
+    sender_email: str
+    sender_passkey: str
+    company_name: str
+    zoom_account_id: str = ""
+    zoom_client_id: str = ""
+    zoom_client_secret: str = ""
+    smtp_host: str = field(default_factory=lambda: os.getenv("SMTP_HOST", "smtp.gmail.com"))
+    smtp_port: int = field(default_factory=lambda: int(os.getenv("SMTP_PORT", "465")))
+    smtp_security: str = field(default_factory=lambda: os.getenv("SMTP_SECURITY", "ssl"))  # ssl, starttls or none
+    zoom_api_base: str = field(default_factory=lambda: os.getenv("ZOOM_API_BASE", "https://api.zoom.us/v2"))
+    zoom_oauth_url: str = field(default_factory=lambda: os.getenv("ZOOM_OAUTH_URL", "https://zoom.us/oauth/token"))
+    # Add an LLM-written learning-resources paragraph to rejection emails
+    personalize: bool = field(default_factory=lambda: os.getenv("EMAIL_PERSONALIZATION", "1") != "0")
+
+    @property
+    def zoom_configured(self) -> bool:
+        return bool(self.zoom_account_id and self.zoom_client_id and self.zoom_client_secret)
+
+    @property
+    def tenant(self) -> str:
+        """Id of the sender the emails go out as; jobs store this instead of the credentials."""
+        return hashlib.sha256(f"{self.sender_email.lower()}\n{self.company_name}".encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_env(cls) -> "OutboundConfig":
+        return cls(
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            sender_email=os.getenv("SENDER_EMAIL", ""),
+            sender_passkey=os.getenv("EMAIL_PASSKEY", ""),
+            company_name=os.getenv("COMPANY_NAME", ""),
+            zoom_account_id=os.getenv("ZOOM_ACCOUNT_ID", ""),
+            zoom_client_id=os.getenv("ZOOM_CLIENT_ID", ""),
+            zoom_client_secret=os.getenv("ZOOM_CLIENT_SECRET", ""),
+        )
+
+
+def send_email(config: OutboundConfig, to_email: str, subject: str, body: str) -> str:
+    """Send a plain-text email and return its Message-ID."""
+    message = EmailMessage()
+    message["From"] = formataddr((config.company_name, config.sender_email))
+    message["To"] = to_email
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(body)
+
+    if config.smtp_security == "ssl":
+        server = smtplib.SMTP_SSL(config.smtp_host, config.smtp_port, timeout=30)
+    else:
+        server = smtplib.SMTP(config.smtp_host, config.smtp_port, timeout=30)
+    with server:
+        if config.smtp_security == "starttls":
+            server.starttls()
+        if config.smtp_security != "none":
+            server.login(config.sender_email, config.sender_passkey)
+        server.send_message(message)
+    return message["Message-ID"]
+
+
+def build_personalizer(openai_api_key: str) -> Agent:
+    """Creates an agent that writes the short optional personalization paragraph of an email."""
+    return Agent(
+        model=ensure_shared_transport(OpenAIChat(
+            id="gpt-4o-mini",
+            api_key=openai_api_key,
+            client_params={"http_client": http_client(sdk="openai")}
+        )),
+        description="You write one short, warm paragraph for a recruitment email.",
+        instructions=[
+            "Return only the paragraph text",
+            "Use all lowercase letters",
+            "Never include names, greetings or a signature"
+        ]
+    )
+
+
+def job_key(kind: str, tenant: str, role: str, to_email: str) -> str:
+    """Idempotency key: one action of each kind per sender, candidate and role, however often it is enqueued."""
+    return f"{kind}:{tenant}:{role}:{to_email.lower()}"
+
+
+class Outbound:
+    """Enqueues outbound actions and owns the worker threads that carry them out.
+
+    Senders are registered as tenants; the workers only claim jobs of registered tenants and
+    run each one with its tenant's config.
+    """
+
+    def __init__(self, queue_path: str = DEFAULT_QUEUE_PATH, workers: int = 2):
+        self.queue = ActionQueue(queue_path)
+        self.personalization = PersonalizationCache(queue_path)
+        self._tenants_lock = threading.Lock()
+        self._configs: Dict[str, OutboundConfig] = {}
+        self._schedulers: Dict[str, InterviewScheduler] = {}
+        # Agents keep per-run state, so each worker thread gets its own per OpenAI key
+        self._local = threading.local()
+        self.workers = ActionWorkers(self.queue, {
+            "selection_email": self._send_selection_email,
+            "rejection_email": self._send_rejection_email,
+            "schedule_interview": self._schedule_interview,
+            "interview_email": self._send_interview_email,
+        }, workers=workers, tenants=self.tenants)
+
+    def register(self, config: OutboundConfig) -> str:
+        """Make config the credentials of its tenant, for jobs queued before and after, and return the tenant."""
+        tenant = config.tenant
+        with self._tenants_lock:
+            previous = self._configs.get(tenant)
+            self._configs[tenant] = config
+            if previous is None or _zoom_settings(previous) != _zoom_settings(config):
+                zoom = ZoomClient(config.zoom_account_id, config.zoom_client_id, config.zoom_client_secret,
+                                  config.zoom_api_base, config.zoom_oauth_url)
+                self._schedulers[tenant] = InterviewScheduler(zoom)
+        return tenant
+
+    def tenants(self) -> List[str]:
+        with self._tenants_lock:
+            return list(self._configs)
+
+    def config(self, tenant: str) -> OutboundConfig:
+        with self._tenants_lock:
+            config = self._configs.get(tenant)
+        if config is None:
+            # Workers only claim registered tenants, so this is a job of a process that has since changed
+            raise LookupError(f"No outbound config registered for tenant {tenant!r}")
+        return config
+
+    def scheduler(self, tenant: str) -> InterviewScheduler:
+        self.config(tenant)
+        with self._tenants_lock:
+            return self._schedulers[tenant]
+
+    def _generate(self, openai_api_key: str, prompt: str) -> str:
+        if not hasattr(self._local, "personalizers"):
+            self._local.personalizers = {}
+        personalizer = self._local.personalizers.get(openai_api_key)
+        if personalizer is None:
+            personalizer = self._local.personalizers[openai_api_key] = build_personalizer(openai_api_key)
+        paragraph = personalizer.run(prompt).content
+        if not paragraph:
+            raise ValueError("Personalizer returned an empty paragraph")
+        return paragraph
+
+    def _personalization(self, config: OutboundConfig, role: str, missing_skills: List[str]) -> str:
+        if not config.personalize or not missing_skills or not config.openai_api_key:
+            return ""
+        return self.personalization.get_or_create(
+            role, missing_skills, lambda prompt: self._generate(config.openai_api_key, prompt))
+
+    def _send(self, kind: str, payload: Dict[str, Any], personalization: str = "", **fields: str) -> Dict[str, Any]:
+        config = self.config(payload["tenant"])
+        subject, body = render_email(kind, payload["role"], config.company_name, personalization, **fields)
+        return {"message_id": send_email(config, payload["to_email"], subject, body)}
+
+    def _enqueue(self, kind: str, tenant: str, payload: Dict[str, Any]) -> bool:
+        payload = {**payload, "tenant": tenant}
+        key = job_key(kind, tenant, payload["role"], payload["to_email"])
+        return self.queue.enqueue(kind, payload, key, tenant=tenant)[1]
+
+    def enqueue_selection_email(self, tenant: str, to_email: str, role: str) -> bool:
+        return self._enqueue("selection_email", tenant, {"to_email": to_email, "role": role})
+
+    def enqueue_rejection_email(self, tenant: str, to_email: str, role: str, feedback: str,
+                                missing_skills: Sequence[str] = ()) -> bool:
+        return self._enqueue("rejection_email", tenant, {
+            "to_email": to_email, "role": role, "feedback": feedback, "missing_skills": list(missing_skills)})
+
+    def enqueue_interview(self, tenant: str, to_email: str, role: str) -> bool:
+        """Schedules the interview; its confirmation email is enqueued once the meeting exists."""
+        return self.enqueue_interviews(tenant, [(to_email, role)]) == 1
+
+    def enqueue_interviews(self, tenant: str, candidates: Sequence[Tuple[str, str]]) -> int:
+        """Enqueue a meeting for each new (email, role) candidate without calling Zoom.
+
+        The workers allocate the slots against the scheduler's index, which is loaded from Zoom once
+        per refresh interval, so a batch of interviews still costs one listing and never overlaps.
+        Returns how many were newly enqueued; candidates already scheduled are skipped, and nothing
+        is enqueued when the tenant has no Zoom credentials.
+        """
+        if not self.config(tenant).zoom_configured:
+            logger.warning(f"Zoom is not configured for tenant {tenant}; skipping {len(candidates)} interviews")
+            return 0
+        return sum(self._enqueue("schedule_interview", tenant, {"to_email": to_email, "role": role})
+                   for to_email, role in dict.fromkeys(candidates))
+
+    def job_status(self, kind: str, tenant: str, role: str, to_email: str) -> Optional[str]:
+        job = self.queue.get(job_key(kind, tenant, role, to_email))
+        return job["status"] if job else None
+
+    # Handlers, run on worker threads
+
+    def _send_selection_email(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self._send("selection", payload)
+
+    def _send_rejection_email(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        config = self.config(payload["tenant"])
+        personalization = self._personalization(config, payload["role"], payload.get("missing_skills") or [])
+        return self._send("rejection", payload, personalization, feedback=payload["feedback"])
+
+    def _schedule_interview(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        scheduler = self.scheduler(payload["tenant"])
+        # Jobs queued by older versions carry a slot allocated when they were enqueued
+        allocated = not payload.get("start_time")
+        start = scheduler.allocate(1)[0] if allocated else datetime.fromisoformat(payload["start_time"])
+        try:
+            meeting = scheduler.zoom.create_meeting(
+                f"{role_title(payload['role'])} technical interview", start,
+                int(scheduler.duration.total_seconds() // 60), payload["to_email"]
+            )
+        except Exception:
+            # The retry allocates again, so the slot must not stay reserved
+            if allocated:
+                scheduler.release(start)
+            raise
+        self._enqueue("interview_email", payload["tenant"], {**payload, "meeting": meeting})
+        return meeting
+
+    def _send_interview_email(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        meeting = payload["meeting"]
+        start_time = datetime.fromisoformat(meeting["start_time"]).strftime("%A %d %B %Y, %I:%M %p").lower()
+        return self._send("interview", payload, start_time=start_time, duration=str(meeting["duration"]),
+                          join_url=meeting["join_url"])
+
+
+def _zoom_settings(config: OutboundConfig) -> Tuple[str, ...]:
+    return (config.zoom_account_id, config.zoom_client_id, config.zoom_client_secret,
+            config.zoom_api_base, config.zoom_oauth_url)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and process the outbound action queue.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite queue file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    status = subparsers.add_parser("status", help="Show job counts and recent jobs")
+    status.add_argument("--status", choices=["queued", "running", "done", "failed"])
+    status.add_argument("--limit", type=int, default=20)
+    subparsers.add_parser("work", help="Process queued jobs until none are left")
+    retry = subparsers.add_parser("retry", help="Re-queue a failed job")
+    retry.add_argument("job_id", type=int)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        queue = ActionQueue(args.queue)
+        print(", ".join(f"{name}: {n}" for name, n in queue.counts().items()))
+        for job in queue.jobs(args.status, args.limit):
+            print(f"#{job['id']:<5} {job['status']:<8} {job['attempts']:<5} {job['kind']:<20} {job['key']}"
+                  + (f"  [{job['last_error']}]" if job["last_error"] else ""))
+    elif args.command == "retry":
+        ActionQueue(args.queue).retry(args.job_id)
+    else:
+        outbound = Outbound(args.queue)
+        outbound.register(OutboundConfig.from_env())
+        outbound.workers.run_until_idle()
+        logger.info(f"Queue drained: {outbound.queue.counts()}, personalization cache {outbound.personalization.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Local pre-screening of resumes against ROLE_REQUIREMENTS before any LLM call.
+
+Each resume gets a score in [0, 1] that blends
+- skill coverage: the share of requirement lines with at least one matching skill or synonym
+- TF-IDF cosine similarity between the requirement text and the resume's skills, experience and
+  projects sections (the whole resume when none were recognised), so contact details and education
+  do not dilute it
+Both are computed as matrix operations over the whole batch.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from resume_parser import key_sections_text
+
+SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "python": ["django", "flask", "fastapi"],
+    "pytorch": ["torch"],
+    "tensorflow": ["tf", "keras"],
+    "machine learning": ["ml", "scikit-learn", "sklearn", "xgboost"],
+    "deep learning": ["dl", "neural network", "cnn", "rnn", "transformer"],
+    "neural networks": ["neural network", "cnn", "rnn", "transformer"],
+    "data preprocessing": ["data cleaning", "feature engineering", "etl", "pandas"],
+    "data analysis": ["pandas", "numpy", "statistics"],
+    "mlops": ["mlflow", "kubeflow", "model serving", "model monitoring"],
+    "model deployment": ["model serving", "deployed models", "inference api", "sagemaker"],
+    "rag": ["retrieval augmented generation", "retrieval-augmented", "vector database", "langchain", "llamaindex"],
+    "llm": ["large language model", "gpt", "llama", "openai"],
+    "finetuning": ["fine-tuning", "fine tuning", "lora", "peft"],
+    "prompt engineering": ["prompting", "prompt design"],
+    "react": ["react.js", "reactjs", "next.js", "nextjs"],
+    "vue.js": ["vue", "vuejs", "nuxt"],
+    "angular": ["angularjs"],
+    "html5": ["html"],
+    "css3": ["css", "sass", "scss", "tailwind"],
+    "javascript": ["js", "es6", "ecmascript"],
+    "typescript": ["ts"],
+    "responsive design": ["responsive", "mobile-first", "media queries"],
+    "state management": ["redux", "vuex", "pinia", "mobx", "zustand"],
+    "frontend testing": ["jest", "cypress", "playwright", "testing library", "vitest"],
+    "java": ["spring", "spring boot"],
+    "node.js": ["nodejs", "node", "express"],
+    "rest apis": ["rest api", "restful", "api design", "fastapi", "flask", "django"],
+    "database": ["sql", "postgresql", "postgres", "mysql", "mongodb", "redis"],
+    "system architecture": ["microservices", "distributed systems", "system design"],
+    "aws": ["amazon web services", "ec2", "s3", "lambda"],
+    "gcp": ["google cloud"],
+    "azure": ["microsoft azure"],
+    "kubernetes": ["k8s", "helm"],
+    "docker": ["containers", "containerization"],
+    "ci/cd": ["continuous integration", "github actions", "jenkins", "gitlab ci"],
+}
+
+# Requirement fragments too generic to count as a skill on their own
+GENERIC_WORDS = {"frameworks", "management", "analysis", "algorithms", "services", "design"}
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+
+
+@dataclass
+class PrefilterResult:
+    score: float
+    coverage: float
+    similarity: float
+    decision: str  # "pass", "borderline" or "reject"
+    matching_skills: List[str]
+    missing_skills: List[str]
+
+
+def parse_requirement_groups(requirements: str) -> List[List[str]]:
+    """Turn "- Python, PyTorch/TensorFlow" style lines into groups of alternative skills."""
+    groups = []
+    for line in requirements.splitlines():
+        line = line.strip()
+        if not line.startswith("-"):
+            continue
+        parts = re.split(r",|(?<!ci)/(?!cd)|\band\b|\(|\)", line.lstrip("- ").lower())
+        groups.append([p.strip() for p in parts if p.strip()])
+    return groups
+
+
+def _term_pattern(term: str) -> re.Pattern:
+    return re.compile(r"(?<![a-z0-9])" + re.escape(term) + r"(?![a-z0-9])")
+
+
+def expand_skill(skill: str) -> List[str]:
+    """Search terms for a skill: the skill itself plus any known skills it mentions and their synonyms."""
+    terms = [] if skill in GENERIC_WORDS else [skill]
+    for key, synonyms in SKILL_SYNONYMS.items():
+        if _term_pattern(key).search(skill):
+            terms.extend([key, *synonyms])
+    return list(dict.fromkeys(terms))
+
+
+class RolePrefilter:
+    def __init__(self, requirements: str, coverage_weight: float = 0.7):
+        self.requirements = requirements
+        self.coverage_weight = coverage_weight
+        self.groups = [
+            [skill for skill in group if expand_skill(skill)] for group in parse_requirement_groups(requirements)
+        ]
+        self.groups = [group for group in self.groups if group]
+        # One column per searchable term; group_matrix maps terms onto requirement lines
+        self.terms: List[str] = []
+        self.term_skill: List[str] = []
+        term_groups: List[int] = []
+        for g, skills in enumerate(self.groups):
+            for skill in skills:
+                for term in expand_skill(skill):
+                    self.terms.append(term)
+                    self.term_skill.append(skill)
+                    term_groups.append(g)
+        self.group_matrix = np.zeros((len(self.terms), len(self.groups)), dtype=np.float32)
+        self.group_matrix[np.arange(len(self.terms)), term_groups] = 1.0
+        self.skill_names = list(dict.fromkeys(self.term_skill))
+        self.skill_matrix = np.zeros((len(self.terms), len(self.skill_names)), dtype=np.float32)
+        self.skill_matrix[np.arange(len(self.terms)), [self.skill_names.index(s) for s in self.term_skill]] = 1.0
+        self._patterns = [_term_pattern(term) for term in self.terms]
+
+    def _presence(self, texts: Sequence[str]) -> np.ndarray:
+        presence = np.zeros((len(texts), len(self.terms)), dtype=np.float32)
+        for j, pattern in enumerate(self._patterns):
+            presence[:, j] = [bool(pattern.search(text)) for text in texts]
+        return presence
+
+    def _tfidf_similarity(self, texts: Sequence[str]) -> np.ndarray:
+        docs = [_TOKEN.findall(text) for text in texts] + [_TOKEN.findall(self.requirements.lower())]
+        vocabulary = {token: i for i, token in enumerate(sorted({t for doc in docs for t in doc}))}
+        counts = np.zeros((len(docs), len(vocabulary)), dtype=np.float32)
+        for i, doc in enumerate(docs):
+            np.add.at(counts[i], [vocabulary[t] for t in doc], 1.0)
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(docs)) / (1 + document_frequency)) + 1.0
+        tfidf = np.log1p(counts) * idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf = tfidf / np.where(norms == 0, 1.0, norms)
+        return tfidf[:-1] @ tfidf[-1]
+
+    def score(self, texts: Sequence[str], threshold: float = 0.35, borderline_band: float = 0.1,
+              sections: Optional[Sequence[Dict[str, str]]] = None) -> List[PrefilterResult]:
+        """Score each resume; sections, when given, are the resumes' split_sections in the same order.
+
+        Skill coverage looks at the whole resume, so a skill counts wherever it is mentioned.
+        """
+        if not texts:
+            return []
+        lowered = [text.lower() for text in texts]
+        presence = self._presence(lowered)
+        coverage = ((presence @ self.group_matrix) > 0).mean(axis=1) if self.groups else np.zeros(len(texts))
+        focused = lowered if sections is None else [
+            key_sections_text(resume_sections).lower() or text for text, resume_sections in zip(lowered, sections)
+        ]
+        similarity = self._tfidf_similarity(focused)
+        scores = self.coverage_weight * coverage + (1 - self.coverage_weight) * similarity
+        skill_hits = (presence @ self.skill_matrix) > 0
+
+        results = []
+        for i, score in enumerate(scores):
+            if score >= threshold:
+                decision = "pass"
+            elif score >= threshold - borderline_band:
+                decision = "borderline"
+            else:
+                decision = "reject"
+            results.append(PrefilterResult(
+                score=round(float(score), 4),
+                coverage=round(float(coverage[i]), 4),
+                similarity=round(float(similarity[i]), 4),
+                decision=decision,
+                matching_skills=[s for s, hit in zip(self.skill_names, skill_hits[i]) if hit],
+                missing_skills=[
+                    " / ".join(group) for g, group in enumerate(self.groups)
+                    if not (presence[i] @ self.group_matrix[:, g])
+                ],
+            ))
+        return results
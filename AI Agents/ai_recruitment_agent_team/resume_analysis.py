@@ -0,0 +1,173 @@
+"""Schema-validated parsing of resume analysis responses, with a cheap repair retry."""
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+class ResumeAnalysis(BaseModel):
+    selected: bool = Field(description="Whether the candidate should move on to the interview stage")
+    feedback: str = Field(description="Detailed feedback explaining the decision")
+    matching_skills: List[str] = Field(default_factory=list, description="Required skills the candidate has")
+    missing_skills: List[str] = Field(default_factory=list, description="Required skills the candidate lacks")
+    experience_level: str = Field(default="", description="junior, mid or senior")
+
+    @field_validator("selected", mode="before")
+    @classmethod
+    def _coerce_selected(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "yes", "selected", "1")
+        return value
+
+    @field_validator("experience_level", mode="before")
+    @classmethod
+    def _normalize_level(cls, value: Any) -> str:
+        level = str(value or "").strip().lower()
+        for name in ("junior", "mid", "senior"):
+            if name in level:
+                return name
+        return level
+
+
+def _first_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} block in text, ignoring braces inside strings."""
+    start = text.find("{")
+    while start != -1:
+        depth, in_string, escaped = 0, False, False
+        for i in range(start, len(text)):
+            char = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+        start = text.find("{", start + 1)
+    return None
+
+
+def parse_analysis(raw: Any) -> ResumeAnalysis:
+    """Accept a model instance, a dict, or text with optional code fences or surrounding prose.
+
+    Raises ValueError when no valid analysis can be recovered.
+    """
+    if isinstance(raw, ResumeAnalysis):
+        return raw
+    if isinstance(raw, BaseModel):
+        raw = raw.model_dump()
+    if isinstance(raw, str):
+        text = _FENCE.sub("", raw.strip())
+        candidate = _first_json_object(text)
+        if candidate is None:
+            raise ValueError("No JSON object found in response")
+        try:
+            raw = json.loads(candidate)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Malformed JSON in response: {e}") from e
+    try:
+        return ResumeAnalysis.model_validate(raw)
+    except ValidationError as e:
+        raise ValueError(f"Response does not match the analysis schema: {e}") from e
+
+
+def repair_prompt(bad_output: str, error: str) -> str:
+    return (
+        "The following resume analysis could not be parsed.\n"
+        f"Error: {error}\n"
+        f"JSON schema it must follow:\n{json.dumps(ResumeAnalysis.model_json_schema())}\n"
+        "Rewrite it as a single JSON object matching the schema, keeping the original decision and content. "
+        "Return only the JSON.\n\n"
+        f"Original output:\n{bad_output[:6000]}"
+    )
+
+
+class AnalysisMetrics:
+    """Thread-safe counters for how often analyses parse first time, need repair, or fail."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.analyses = 0
+            self.first_pass_ok = 0
+            self.repaired = 0
+            self.failed = 0
+            self.repair_attempts = 0
+            self.analysis_seconds: List[float] = []
+            self.repair_seconds: List[float] = []
+
+    def record(self, analysis_seconds: float, repair_seconds: List[float], ok: bool) -> None:
+        with self._lock:
+            self.analyses += 1
+            self.analysis_seconds.append(analysis_seconds)
+            self.repair_seconds.extend(repair_seconds)
+            self.repair_attempts += len(repair_seconds)
+            if not ok:
+                self.failed += 1
+            elif repair_seconds:
+                self.repaired += 1
+            else:
+                self.first_pass_ok += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            def mean(values: List[float]) -> Optional[float]:
+                return sum(values) / len(values) if values else None
+            return {
+                "analyses": self.analyses,
+                "first_pass_ok": self.first_pass_ok,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "failure_rate": self.failed / self.analyses if self.analyses else 0.0,
+                "repair_attempts": self.repair_attempts,
+                "mean_analysis_seconds": mean(self.analysis_seconds),
+                "mean_repair_seconds": mean(self.repair_seconds),
+                "max_repair_seconds": max(self.repair_seconds) if self.repair_seconds else None,
+            }
+
+
+ANALYSIS_METRICS = AnalysisMetrics()
+
+
+def run_with_repair(analyze: Callable[[], Any], repair: Optional[Callable[[str], Any]], max_repairs: int = 2,
+                    metrics: AnalysisMetrics = ANALYSIS_METRICS) -> ResumeAnalysis:
+    """Run analyze(), and if its output does not parse, ask repair(prompt) to fix it up to max_repairs times."""
+    started = time.perf_counter()
+    repair_seconds: List[float] = []
+    try:
+        output = analyze()
+    except ValueError:
+        metrics.record(time.perf_counter() - started, repair_seconds, ok=False)
+        raise
+    analysis_seconds = time.perf_counter() - started
+    try:
+        for attempt in range(max_repairs + 1):
+            try:
+                result = parse_analysis(output)
+                metrics.record(analysis_seconds, repair_seconds, ok=True)
+                return result
+            except ValueError as e:
+                if repair is None or attempt == max_repairs:
+                    raise
+                repair_started = time.perf_counter()
+                output = repair(repair_prompt(output if isinstance(output, str) else repr(output), str(e)))
+                repair_seconds.append(time.perf_counter() - repair_started)
+    except ValueError:
+        metrics.record(analysis_seconds, repair_seconds, ok=False)
+        raise
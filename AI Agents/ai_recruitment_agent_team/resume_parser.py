@@ -0,0 +1,128 @@
+"""Resume text extraction with page-parallel parsing and a content-hash disk cache."""
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import PyPDF2
+
+# Bump when the extraction or section logic changes so stale cache entries are ignored
+PARSER_VERSION = 1
+DEFAULT_CACHE_DIR = os.getenv("RESUME_CACHE_DIR", ".resume_cache")
+# Below this many pages, process start-up costs more than parsing sequentially
+PARALLEL_PAGE_THRESHOLD = 8
+
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "summary": ["summary", "profile", "objective", "about me", "professional summary"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history", "work history"],
+    "skills": ["skills", "technical skills", "core skills", "skills and tools", "technologies", "tech stack"],
+    "education": ["education", "academic background", "qualifications"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications"],
+}
+# The sections that show what a candidate can do; the prefilter and the analysis prompt focus on them
+KEY_SECTIONS = ("skills", "experience", "projects")
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+_HEADING_CLEAN = re.compile(r"[^a-z& ]+")
+
+
+@dataclass
+class ResumeText:
+    content_hash: str
+    text: str
+    page_count: int
+    sections: Dict[str, str] = field(default_factory=dict)
+
+
+def _extract_pages(data: bytes, start: int, stop: int) -> List[str]:
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Split resume text on recognised headings such as Experience, Skills and Education.
+
+    Text before the first heading is kept under "header"; repeated headings are merged.
+    """
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        stripped = line.strip()
+        key = _HEADING_CLEAN.sub("", stripped.lower()).replace("&", "and").strip()
+        if stripped and len(stripped) <= 40 and key in _HEADING_LOOKUP:
+            current = _HEADING_LOOKUP[key]
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if any(l.strip() for l in lines)}
+
+
+def key_sections_text(sections: Dict[str, str]) -> str:
+    """The KEY_SECTIONS found in sections, each under its heading; "" when none were recognised."""
+    return "\n\n".join(f"{name.title()}:\n{sections[name]}" for name in KEY_SECTIONS if sections.get(name))
+
+
+class ResumeParser:
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, workers: int = os.cpu_count() or 2):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.v{PARSER_VERSION}.json")
+
+    def _load_cached(self, content_hash: str) -> Optional[ResumeText]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(content_hash), "r", encoding="utf-8") as f:
+                return ResumeText(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _store(self, resume: ResumeText) -> None:
+        if not self.cache_dir:
+            return
+        path = self._cache_path(resume.content_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(resume), f)
+        os.replace(tmp_path, path)
+
+    def _extract_text(self, data: bytes) -> Tuple[str, int]:
+        page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+        if page_count < PARALLEL_PAGE_THRESHOLD or self.workers <= 1:
+            pages = _extract_pages(data, 0, page_count)
+        else:
+            chunk = -(-page_count // self.workers)
+            ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(_extract_pages, data, start, stop) for start, stop in ranges]
+                pages = [page for future in futures for page in future.result()]
+        return "\n".join(pages), page_count
+
+    def parse(self, data: bytes) -> ResumeText:
+        """Return the text and sections for a PDF's bytes, parsing it only on a cache miss."""
+        content_hash = hashlib.sha256(data).hexdigest()
+        cached = self._load_cached(content_hash)
+        if cached is not None:
+            return cached
+        text, page_count = self._extract_text(data)
+        resume = ResumeText(content_hash, text, page_count, split_sections(text))
+        self._store(resume)
+        return resume
+
+
+_default_parser: Optional[ResumeParser] = None
+
+
+def parse_resume(data: bytes) -> ResumeText:
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = ResumeParser()
+    return _default_parser.parse(data)
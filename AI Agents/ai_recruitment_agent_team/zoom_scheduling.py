@@ -0,0 +1,227 @@
+"""Zoom API access with a process-wide token cache, and a slot allocator for interviews."""
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+import requests
+
+INTERVIEW_TIMEZONE = "Asia/Kolkata"
+
+# Tokens are shared by every ZoomClient in the process, keyed by (oauth url, account id, client id)
+_TOKENS: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+_TOKENS_LOCK = threading.Lock()
+
+
+class ZoomClient:
+    """Minimal Zoom Server-to-Server OAuth client for listing and creating meetings."""
+
+    def __init__(self, account_id: str, client_id: str, client_secret: str,
+                 api_base: str = "https://api.zoom.us/v2", oauth_url: str = "https://zoom.us/oauth/token",
+                 refresh_margin: float = 300.0):
+        self.account_id = account_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = api_base
+        self.oauth_url = oauth_url
+        # Refresh this many seconds before expiry so no request goes out with a nearly dead token
+        self.refresh_margin = refresh_margin
+        self.session = requests.Session()
+
+    def get_access_token(self) -> str:
+        key = (self.oauth_url, self.account_id, self.client_id)
+        with _TOKENS_LOCK:
+            token, expires_at = _TOKENS.get(key, ("", 0.0))
+            now = time.time()
+            if token and now < expires_at - self.refresh_margin:
+                return token
+            try:
+                response = self.session.post(
+                    self.oauth_url,
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    data={"grant_type": "account_credentials", "account_id": self.account_id},
+                    auth=(self.client_id, self.client_secret),
+                    timeout=30,
+                )
+                response.raise_for_status()
+            except requests.RequestException:
+                # An early refresh that fails can fall back to the still-valid token
+                if token and now < expires_at:
+                    return token
+                raise
+            token_info = response.json()
+            _TOKENS[key] = (token_info["access_token"], now + token_info["expires_in"])
+            return token_info["access_token"]
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.get_access_token()}"}
+
+    def list_meetings(self) -> List[Dict[str, Any]]:
+        """All upcoming scheduled meetings of the account's user, following pagination."""
+        meetings, page_token = [], ""
+        while True:
+            response = self.session.get(
+                f"{self.api_base}/users/me/meetings",
+                headers=self._headers(),
+                params={"type": "upcoming", "page_size": 300, "next_page_token": page_token},
+                timeout=30,
+            )
+            response.raise_for_status()
+            page = response.json()
+            meetings.extend(page.get("meetings", []))
+            page_token = page.get("next_page_token")
+            if not page_token:
+                return meetings
+
+    def create_meeting(self, topic: str, start_time: datetime, duration_minutes: int, invitee: str) -> Dict[str, Any]:
+        start_time = start_time.astimezone(pytz.timezone(INTERVIEW_TIMEZONE))
+        response = self.session.post(
+            f"{self.api_base}/users/me/meetings",
+            headers=self._headers(),
+            json={
+                "topic": topic,
+                "type": 2,
+                "start_time": start_time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "duration": duration_minutes,
+                "timezone": INTERVIEW_TIMEZONE,
+                "settings": {"meeting_invitees": [{"email": invitee}]},
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        meeting = response.json()
+        return {
+            "id": meeting.get("id"),
+            "join_url": meeting.get("join_url"),
+            "start_time": start_time.isoformat(),
+            "duration": duration_minutes,
+            "timezone": INTERVIEW_TIMEZONE,
+        }
+
+
+def meeting_interval(meeting: Dict[str, Any]) -> Optional[Tuple[datetime, datetime]]:
+    """(start, end) of a Zoom meeting as aware datetimes, or None if it has no start time."""
+    raw = meeting.get("start_time")
+    if not raw:
+        return None
+    start = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    if start.tzinfo is None:
+        start = pytz.timezone(meeting.get("timezone") or INTERVIEW_TIMEZONE).localize(start)
+    return start, start + timedelta(minutes=int(meeting.get("duration") or 60))
+
+
+class IntervalIndex:
+    """Busy time intervals sorted by start, with overlap queries in O(log n + k)."""
+
+    def __init__(self):
+        self._starts: List[float] = []
+        self._intervals: List[Tuple[float, float]] = []
+        self._max_length = 0.0
+
+    def add(self, start: datetime, end: datetime) -> None:
+        s, e = start.timestamp(), end.timestamp()
+        i = bisect.bisect_left(self._starts, s)
+        self._starts.insert(i, s)
+        self._intervals.insert(i, (s, e))
+        self._max_length = max(self._max_length, e - s)
+
+    def remove(self, start: datetime, end: datetime) -> None:
+        s, e = start.timestamp(), end.timestamp()
+        i = bisect.bisect_left(self._starts, s)
+        while i < len(self._intervals) and self._starts[i] == s:
+            if self._intervals[i] == (s, e):
+                del self._starts[i], self._intervals[i]
+                return
+            i += 1
+
+    def conflict_end(self, start: datetime, end: datetime) -> Optional[float]:
+        """Latest end of any interval overlapping [start, end), or None when the range is free."""
+        s, e = start.timestamp(), end.timestamp()
+        # Only intervals starting in [s - longest interval, e) can overlap
+        lo = bisect.bisect_left(self._starts, s - self._max_length)
+        hi = bisect.bisect_left(self._starts, e)
+        ends = [ie for _, ie in self._intervals[lo:hi] if ie > s]
+        return max(ends) if ends else None
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+
+class InterviewScheduler:
+    """Allocates non-overlapping interview slots on weekdays within business hours.
+
+    Existing meetings are loaded from Zoom into an interval index (refreshed every
+    refresh_seconds); slots handed out by this process are kept in the index too.
+    """
+
+    def __init__(self, zoom: Optional[ZoomClient], duration_minutes: int = 60, buffer_minutes: int = 15,
+                 day_start: int = 9, day_end: int = 17, step_minutes: int = 30, lead_hours: float = 12.0,
+                 timezone: str = INTERVIEW_TIMEZONE, refresh_seconds: float = 600.0):
+        self.zoom = zoom
+        self.duration = timedelta(minutes=duration_minutes)
+        self.buffer = timedelta(minutes=buffer_minutes)
+        self.day_start = day_start
+        self.day_end = day_end
+        self.step = timedelta(minutes=step_minutes)
+        self.lead = timedelta(hours=lead_hours)
+        self.tz = pytz.timezone(timezone)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._index = IntervalIndex()
+        self._reserved: List[Tuple[datetime, datetime]] = []
+        self._loaded_at: Optional[float] = None
+
+    def _refresh(self) -> None:
+        if not self.zoom or (self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds):
+            return
+        index = IntervalIndex()
+        for meeting in self.zoom.list_meetings():
+            interval = meeting_interval(meeting)
+            if interval:
+                index.add(*interval)
+        # Our own reservations may not be visible in Zoom yet
+        for interval in self._reserved:
+            index.add(*interval)
+        self._index = index
+        self._loaded_at = time.monotonic()
+
+    def _align(self, moment: datetime) -> datetime:
+        """The first step boundary at or after moment where a whole interview fits a weekday's business hours."""
+        moment = moment.astimezone(self.tz)
+        day = moment.date()
+        while True:
+            day_open = self.tz.localize(datetime(day.year, day.month, day.day, self.day_start))
+            day_close = self.tz.localize(datetime(day.year, day.month, day.day, self.day_end))
+            start = day_open + -(-max(timedelta(0), moment - day_open) // self.step) * self.step
+            if day.weekday() < 5 and start + self.duration <= day_close:
+                return start
+            day += timedelta(days=1)
+
+    def allocate(self, count: int, not_before: Optional[datetime] = None) -> List[datetime]:
+        """Reserve count slots in one pass over the index and return their start times."""
+        with self._lock:
+            self._refresh()
+            candidate = self._align(not_before or datetime.now(self.tz) + self.lead)
+            slots = []
+            while len(slots) < count:
+                # Keep a buffer on both sides so back-to-back interviews do not run into each other
+                conflict = self._index.conflict_end(candidate - self.buffer, candidate + self.duration + self.buffer)
+                if conflict is None:
+                    interval = (candidate, candidate + self.duration)
+                    self._index.add(*interval)
+                    self._reserved.append(interval)
+                    slots.append(candidate)
+                    candidate = self._align(candidate + self.duration + self.buffer)
+                else:
+                    candidate = self._align(datetime.fromtimestamp(conflict, self.tz) + self.buffer)
+            return slots
+
+    def release(self, start: datetime) -> None:
+        """Give back a slot whose meeting could not be created."""
+        interval = (start, start + self.duration)
+        with self._lock:
+            if interval in self._reserved:
+                self._reserved.remove(interval)
+                self._index.remove(*interval)
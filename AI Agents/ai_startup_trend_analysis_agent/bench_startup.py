@@ -0,0 +1,115 @@
+"""Startup benchmark for the Streamlit app: time-to-first-render and per-click overhead.
+
+    python bench_startup.py              # app timings with zero-latency stubs
+    python bench_startup.py --backends   # also time building the real agents (needs agno installed)
+
+First render runs the script in a fresh interpreter each time, so module imports are paid in
+full. Clicks run against stubs with no simulated latency and the cache disabled, so what is
+left is the app's own per-click overhead; the first click includes building the backends.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "startup_trends_agent.py")
+
+_FIRST_RENDER = """
+import json, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - started
+assert not at.exception, at.exception
+print(json.dumps({{"seconds": elapsed}}))
+"""
+
+
+def first_render(runs: int) -> list:
+    env = {**os.environ, "TRENDS_STUB": "1", "TRENDS_STUB_LATENCY": "0"}
+    timings = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", _FIRST_RENDER.format(app=APP)], cwd=workdir, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            timings.append(json.loads(output.strip().splitlines()[-1])["seconds"])
+    return timings
+
+
+def clicks(count: int) -> list:
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.update({"TRENDS_STUB": "1", "TRENDS_STUB_LATENCY": "0"})
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    at.text_input[0].set_value("climate tech")
+    at.checkbox[0].uncheck()
+    at.run()
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        at.button[0].click().run()
+        timings.append(time.perf_counter() - started)
+        assert not at.exception, at.exception
+    return timings
+
+
+def backends(count: int, workers: int) -> dict:
+    """Building the agents on every click (the old behavior) against a cached lookup."""
+    import streamlit as st
+    from trend_pipeline import DEFAULT_MODEL_ID, build_backends
+
+    def build(api_key: str, model_id: str):
+        result = build_backends(api_key, model_id)
+        result.warm_up(workers)
+        return result
+
+    uncached = []
+    for _ in range(count):
+        started = time.perf_counter()
+        build("sk-ant-benchmark", DEFAULT_MODEL_ID)
+        uncached.append(time.perf_counter() - started)
+
+    cached_build = st.cache_resource(build)
+    cached = []
+    for _ in range(count + 1):
+        started = time.perf_counter()
+        cached_build("sk-ant-benchmark", DEFAULT_MODEL_ID)
+        cached.append(time.perf_counter() - started)
+    # The first cached call builds; the rest are what a click pays
+    return {"uncached": uncached, "first": cached[:1], "cached": cached[1:]}
+
+
+def _report(label: str, timings: list) -> None:
+    print(f"{label:<34} median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms   (n={len(timings)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the trend app's first render and per-click overhead.")
+    parser.add_argument("--renders", type=int, default=5, help="Cold first renders, each in a fresh process")
+    parser.add_argument("--clicks", type=int, default=10)
+    parser.add_argument("--backends", action="store_true", help="Also time building the real agents and tools")
+    parser.add_argument("--workers", type=int, default=4, help="Summary agents to build per backend set")
+    args = parser.parse_args()
+
+    _report("first render (cold process)", first_render(args.renders))
+    timings = clicks(args.clicks)
+    _report("first click (builds backends)", timings[:1])
+    if len(timings) > 1:
+        _report("later clicks (cached backends)", timings[1:])
+    if args.backends:
+        result = backends(args.clicks, args.workers)
+        _report("backends built per click", result["uncached"])
+        _report("backends, first cached build", result["first"])
+        _report("backends, cached lookup", result["cached"])
+
+
+if __name__ == "__main__":
+    main()
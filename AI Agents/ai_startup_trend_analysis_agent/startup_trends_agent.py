@@ -1,99 +1,101 @@
+import os
 import streamlit as st
-from agno.agent import Agent
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.models.anthropic import Claude
-from agno.tools.newspaper4k import Newspaper4kTools
-from agno.tools import Tool
 import logging
 
+from trend_cache import TrendCache
+from trend_pipeline import DEFAULT_MODEL_ID, ArticleResult, TrendBackends, build_backends, run_pipeline
+
 logging.basicConfig(level=logging.DEBUG)
 
+# Set TRENDS_STUB=1 to run against local stubs instead of DuckDuckGo, Newspaper4k and Claude
+USE_STUBS = os.getenv("TRENDS_STUB") == "1"
+# Scales the stubs' simulated latency; bench_startup.py sets it to 0
+STUB_LATENCY = float(os.getenv("TRENDS_STUB_LATENCY", "1"))
+
+
+# Built on the first click for a given key and model, then reused by every rerun and session.
+# agno, its tools and newspaper are only imported inside build_backends, so the first render
+# does not pay for them.
+@st.cache_resource(show_spinner="Loading models and tools...")
+def get_backends(anthropic_api_key: str, model_id: str = DEFAULT_MODEL_ID) -> TrendBackends:
+    if USE_STUBS:
+        from trend_stubs import build_stub_backends
+        return build_stub_backends(latency=STUB_LATENCY)
+    return build_backends(anthropic_api_key, model_id)
+
+
+@st.cache_resource
+def get_cache() -> TrendCache:
+    return TrendCache()
+
+
 # Setting up Streamlit app
 st.title("AI Startup Trend Analysis Agent 📈")
 st.caption("Get the latest trend analysis and startup opportunities based on your topic of interest in a click!.")
 
 topic = st.text_input("Enter the area of interest for your Startup:")
 anthropic_api_key = st.sidebar.text_input("Enter Anthropic API Key", type="password")
+with st.sidebar.expander("Pipeline settings"):
+    max_articles = st.slider("Articles to analyze", 3, 20, 8)
+    max_workers = st.slider("Articles processed in parallel", 1, 8, 4)
+    article_timeout = st.number_input("Per-article timeout (seconds)", min_value=10, value=60)
+    use_cache = st.checkbox("Reuse cached searches, articles and summaries", value=True,
+                            help="Stored in trend_cache.sqlite3; syndicated copies of a story are summarized once")
+if USE_STUBS:
+    st.sidebar.info("Running against local stubs (TRENDS_STUB=1).")
 
 if st.button("Generate Analysis"):
-    if not anthropic_api_key:
+    if not anthropic_api_key and not USE_STUBS:
         st.warning("Please enter the required API key.")
     else:
-        with st.spinner("Processing your request..."):
-            try:
-                # Initialize Anthropic model
-                anthropic_model = Claude(id ="claude-3-5-sonnet-20240620",api_key=anthropic_api_key)
-
-                # Define News Collector Agent - Duckduckgo_search tool enables an Agent to search the web for information.
-                search_tool = DuckDuckGoTools(search=True, news=True, fixed_max_results=5)
-                news_collector = Agent(
-                    name="News Collector",
-                    role="Collects recent news articles on the given topic",
-                    tools=[search_tool],
-                    model=anthropic_model,
-                    instructions=["Gather latest articles on the topic"],
-                    show_tool_calls=True,
-                    markdown=True,
-                )
-
-                # Define Summary Writer Agent
-                news_tool = Newspaper4kTools(read_article=True, include_summary=True)
-                summary_writer = Agent(
-                    name="Summary Writer",
-                    role="Summarizes collected news articles",
-                    tools=[news_tool],
-                    model=anthropic_model,
-                    instructions=["Provide concise summaries of the articles"],
-                    show_tool_calls=True,
-                    markdown=True,
-                )
-
-                # Define Trend Analyzer Agent
-                trend_analyzer = Agent(
-                    name="Trend Analyzer",
-                    role="Analyzes trends from summaries",
-                    model=anthropic_model,
-                    instructions=["Identify emerging trends and startup opportunities"],
-                    show_tool_calls=True,
-                    markdown=True,
-                )
-
-                # The multi agent Team setup of phidata:
-                agent_team = Agent(
-                    agents=[news_collector, summary_writer, trend_analyzer],
-                    instructions=[
-                        "First, search DuckDuckGo for recent news articles related to the user's specified topic.",
-                        "Then, provide the collected article links to the summary writer.",
-                        "Important: you must ensure that the summary writer receives all the article links to read.",
-                        "Next, the summary writer will read the articles and prepare concise summaries of each.",
-                        "After summarizing, the summaries will be passed to the trend analyzer.",
-                        "Finally, the trend analyzer will identify emerging trends and potential startup opportunities based on the summaries provided in a detailed Report form so that any young entreprenur can get insane value reading this easily"
-                    ],
-                    show_tool_calls=True,
-                    markdown=True,
-                )
-
-                # Executing the workflow
-                # Step 1: Collect news
-                news_response = news_collector.run(f"Collect recent news on {topic}")
-                articles = news_response.content
-
-                # Step 2: Summarize articles
-                summary_response = summary_writer.run(f"Summarize the following articles:\n{articles}")
-                summaries = summary_response.content
-
-                # Step 3: Analyze trends
-                trend_response = trend_analyzer.run(f"Analyze trends from the following summaries:\n{summaries}")
-                analysis = trend_response.content
-
-                # Display results - if incase you want to use this furthur, you can uncomment the below 2 lines to get the summaries too!
-                # st.subheader("News Summaries")
-                # # st.write(summaries)
-
-                st.subheader("Trend Analysis and Potential Startup Opportunities")
-                st.write(analysis)
-
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
+        try:
+            backends = get_backends("" if USE_STUBS else anthropic_api_key)
+            if backends.warm_up:
+                # A no-op once the pool has max_workers agents
+                backends.warm_up(max_workers)
+
+            status = st.status("Searching for recent articles...", expanded=True)
+            progress = st.progress(0.0)
+            st.subheader("News Summaries")
+            summaries_area = st.container()
+            state = {"total": 0, "done": 0}
+
+            def show_links(links) -> None:
+                state["total"] = len(links)
+                status.update(label=f"Reading and summarizing {len(links)} articles...")
+
+            # Summaries stream in as each article finishes, in completion order
+            def show_article(result: ArticleResult) -> None:
+                state["done"] += 1
+                progress.progress(state["done"] / max(1, state["total"]),
+                                  text=f"{state['done']}/{state['total']} articles processed")
+                with summaries_area:
+                    if result.error:
+                        st.caption(f"⚠️ Skipped [{result.title or result.url}]({result.url}): {result.error}")
+                    else:
+                        origin = "cached" if result.cached else f"{result.seconds:.1f}s"
+                        with st.expander(f"{result.title or result.url} ({origin})"):
+                            st.markdown(f"[{result.source or 'Source'}]({result.url})")
+                            if result.duplicate_of:
+                                st.caption(f"Near-duplicate of {result.duplicate_of}; summary reused.")
+                            st.write(result.summary)
+                if state["done"] == state["total"]:
+                    status.update(label="Analyzing trends across the summaries...")
+
+            report = run_pipeline(topic, backends, max_articles, max_workers, article_timeout,
+                                  get_cache() if use_cache else None,
+                                  on_links=show_links, on_article=show_article)
+            stats = report.stats
+            status.update(label=f"Done in {stats['total_seconds']:.1f}s", state="complete", expanded=False)
+            st.caption(f"{stats['summarized']}/{stats['articles']} articles summarized in {stats['map_seconds']:.1f}s "
+                       f"(vs ~{stats['sequential_map_seconds']:.1f}s one at a time), "
+                       f"trend analysis in {stats['reduce_seconds']:.1f}s"
+                       + (f"; {stats['cached']} from cache, {stats['near_duplicates']} near-duplicates" if use_cache else ""))
+
+            st.subheader("Trend Analysis and Potential Startup Opportunities")
+            st.write(report.analysis)
+
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
 else:
     st.info("Enter the topic and API keys, then click 'Generate Analysis' to start.")
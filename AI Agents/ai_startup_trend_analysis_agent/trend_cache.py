@@ -0,0 +1,214 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from trend_pipeline import FetchedArticle
+
+# Fingerprints within this many differing bits (of 64) are treated as the same story
+NEAR_DUPLICATE_BITS = 3
+_BANDS = 4  # pigeonhole: two fingerprints within 3 bits agree exactly on at least one 16-bit band
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash over word shingles; syndicated copies of a story land a few bits apart."""
+    words = _WORD.findall(text.lower())
+    features = [" ".join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    width = 64 // _BANDS
+    return [(band, fingerprint >> (band * width) & ((1 << width) - 1)) for band in range(_BANDS)]
+
+
+class TrendCache:
+    """Persistent SQLite cache for the trend pipeline.
+
+    - search results by (query, max results), expiring after ``search_ttl``
+    - article text by URL; after ``article_ttl`` the article is revalidated with its
+      ETag/Last-Modified instead of downloaded again
+    - summaries by (URL, content hash, model), plus a SimHash index so that a near-duplicate
+      of an already summarized article reuses that summary
+    """
+
+    def __init__(self, path: str = "trend_cache.sqlite3", search_ttl: float = 6 * 3600,
+                 article_ttl: float = 24 * 3600):
+        self.search_ttl = search_ttl
+        self.article_ttl = article_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS searches (
+                    query TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (query, max_results)
+                );
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS summaries (
+                    url TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    simhash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (url, content_hash, model)
+                );
+                """
+            )
+        # model -> band -> urls; loaded lazily per model from the summaries table
+        self._band_index: Dict[str, Dict[Tuple[int, int], Set[str]]] = {}
+        self._fingerprints: Dict[Tuple[str, str], int] = {}
+        # Summaries being written right now, so concurrent duplicates wait instead of repeating the call
+        self._inflight: Dict[Tuple[str, str], threading.Event] = {}
+        self.stats = {"search_hits": 0, "article_hits": 0, "revalidated": 0, "summary_hits": 0, "near_duplicates": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    # Search
+
+    def search(self, topic: str, max_results: int, searcher: Callable[[str, int], List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        query = topic.strip().lower()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, fetched_at FROM searches WHERE query = ? AND max_results = ?", (query, max_results)
+            ).fetchone()
+        if row and time.time() - row[1] < self.search_ttl:
+            self._count("search_hits")
+            return json.loads(row[0])
+        results = searcher(topic, max_results)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                               (query, max_results, json.dumps(results), time.time()))
+        return results
+
+    # Articles
+
+    def fetch(self, url: str, fetcher: Callable[..., FetchedArticle]) -> Tuple[str, str, bool]:
+        """Return (text, content hash, served from cache), revalidating stale entries conditionally."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, content_hash, etag, last_modified, fetched_at FROM articles WHERE url = ?", (url,)
+            ).fetchone()
+        if row and time.time() - row[4] < self.article_ttl:
+            self._count("article_hits")
+            return row[0], row[1], True
+        if row:
+            fetched = fetcher(url, etag=row[2], last_modified=row[3])
+            if fetched.not_modified:
+                self._count("revalidated")
+                with self._lock, self._conn:
+                    self._conn.execute("UPDATE articles SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                return row[0], row[1], True
+        else:
+            fetched = fetcher(url)
+        content_hash = hashlib.sha256(fetched.text.encode()).hexdigest()
+        if fetched.text.strip():
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, fetched.text, content_hash, fetched.etag, fetched.last_modified, time.time()),
+                )
+        return fetched.text, content_hash, False
+
+    # Summaries
+
+    def _index_for(self, model: str) -> Dict[Tuple[int, int], Set[str]]:
+        """Band index for a model; the caller holds the lock."""
+        if model not in self._band_index:
+            index: Dict[Tuple[int, int], Set[str]] = {}
+            for url, fingerprint in self._conn.execute("SELECT url, simhash FROM summaries WHERE model = ?", (model,)):
+                self._add_fingerprint(index, model, url, int(fingerprint, 16))
+            self._band_index[model] = index
+        return self._band_index[model]
+
+    def _add_fingerprint(self, index: Dict[Tuple[int, int], Set[str]], model: str, url: str, fingerprint: int) -> None:
+        self._fingerprints[(model, url)] = fingerprint
+        for band in _bands(fingerprint):
+            index.setdefault(band, set()).add(url)
+
+    def _near_duplicate(self, model: str, url: str, fingerprint: int) -> Optional[str]:
+        """A different URL whose fingerprint is within NEAR_DUPLICATE_BITS; the caller holds the lock."""
+        index = self._index_for(model)
+        candidates = set().union(*(index.get(band, set()) for band in _bands(fingerprint))) - {url}
+        for candidate in sorted(candidates):
+            if bin(self._fingerprints[(model, candidate)] ^ fingerprint).count("1") <= NEAR_DUPLICATE_BITS:
+                return candidate
+        return None
+
+    def _latest_summary(self, url: str, model: str, content_hash: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            if content_hash:
+                row = self._conn.execute(
+                    "SELECT summary FROM summaries WHERE url = ? AND content_hash = ? AND model = ?",
+                    (url, content_hash, model),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT summary FROM summaries WHERE url = ? AND model = ? ORDER BY created_at DESC LIMIT 1",
+                    (url, model),
+                ).fetchone()
+        return row[0] if row else None
+
+    def summarize(self, url: str, title: str, text: str, content_hash: str, model: str,
+                  summarizer: Callable[[str, str], str], wait_seconds: float = 120.0) -> Tuple[str, bool, str]:
+        """Return (summary, served from cache, URL of the near-duplicate it was copied from or "")."""
+        cached = self._latest_summary(url, model, content_hash)
+        if cached is not None:
+            self._count("summary_hits")
+            return cached, True, ""
+
+        fingerprint = simhash(text)
+        with self._lock:
+            original = self._near_duplicate(model, url, fingerprint)
+            if original is None:
+                self._add_fingerprint(self._index_for(model), model, url, fingerprint)
+                done = self._inflight[(model, url)] = threading.Event()
+            else:
+                waiting_on = self._inflight.get((model, original))
+        if original is not None:
+            if waiting_on is not None:
+                waiting_on.wait(wait_seconds)
+            summary = self._latest_summary(original, model)
+            if summary is not None:
+                self._count("near_duplicates")
+                return summary, True, original
+            # The original failed to summarize; do it ourselves
+            with self._lock:
+                self._add_fingerprint(self._index_for(model), model, url, fingerprint)
+                done = self._inflight[(model, url)] = threading.Event()
+
+        try:
+            summary = summarizer(title, text)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, content_hash, model, f"{fingerprint:016x}", summary, time.time()),
+                )
+            return summary, False, ""
+        finally:
+            with self._lock:
+                self._inflight.pop((model, url), None)
+            done.set()
@@ -0,0 +1,330 @@
+"""Map-reduce trend analysis: search for articles, fetch and summarize each one concurrently,
+then reduce the summaries into a single trend report.
+
+Every external call goes through TrendBackends, so the pipeline runs the same way against
+DuckDuckGo/Newspaper4k/Claude or against the local stubs in trend_stubs.py:
+
+    python trend_pipeline.py "climate tech" --stub
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+
+if TYPE_CHECKING:
+    from trend_cache import TrendCache
+
+DEFAULT_MODEL_ID = "claude-3-5-sonnet-20240620"
+USER_AGENT = "Mozilla/5.0 (compatible; startup-trends-agent)"
+
+
+@dataclass
+class ArticleResult:
+    url: str
+    title: str = ""
+    source: str = ""
+    summary: str = ""
+    error: str = ""
+    seconds: float = 0.0
+    cached: bool = False
+    duplicate_of: str = ""
+
+
+@dataclass
+class FetchedArticle:
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when the server answered 304 to a conditional request; text is then empty
+    not_modified: bool = False
+
+
+@dataclass
+class TrendBackends:
+    # search(topic, max_results) -> [{"title", "url", "source", "body"}]
+    search: Callable[[str, int], List[Dict[str, str]]]
+    # fetch(url, etag=None, last_modified=None) -> FetchedArticle with the cleaned article text
+    fetch: Callable[..., FetchedArticle]
+    # summarize(title, text) -> short summary
+    summarize: Callable[[str, str], str]
+    # analyze(topic, summaries) -> trend report in markdown
+    analyze: Callable[[str, List[ArticleResult]], str]
+    # Part of the summary cache key, so switching models does not reuse old summaries
+    model_id: str = ""
+    # warm_up(workers) builds the agents a run with that many workers will need, ahead of time
+    warm_up: Optional[Callable[[int], None]] = None
+
+
+@dataclass
+class TrendReport:
+    topic: str
+    articles: List[ArticleResult]
+    analysis: str
+    stats: Dict[str, float] = field(default_factory=dict)
+
+
+class AgentPool:
+    """Agents reused across runs; each agent is handed to one thread at a time.
+
+    Agents keep per-run state, so concurrent calls need separate instances, but building
+    a fresh one per call (or per thread) throws away the model client every time.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._idle: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @contextmanager
+    def agent(self) -> Iterator[Any]:
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            agent = self._factory()
+            with self._lock:
+                self.created += 1
+        try:
+            yield agent
+        finally:
+            self._idle.put(agent)
+
+    def warm(self, count: int) -> None:
+        """Make sure at least count agents exist."""
+        while self.created < count:
+            agent = self._factory()
+            with self._lock:
+                self.created += 1
+            self._idle.put(agent)
+
+
+def build_backends(anthropic_api_key: str, model_id: str = DEFAULT_MODEL_ID) -> TrendBackends:
+    """Backends that use DuckDuckGo news search, Newspaper4k and Claude.
+
+    The agno and newspaper imports happen here rather than at module level, so importing
+    this module (and rendering the app) stays fast. Build once per key and model and reuse.
+    """
+    from agno.agent import Agent
+    from agno.models.anthropic import Claude
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    from llm_client import ensure_shared_transport, http_client
+    from newspaper import Article
+
+    search_tool = DuckDuckGoTools(search=True, news=True)
+    session = requests.Session()
+    client_params = {"http_client": http_client(sdk="anthropic")}
+    summary_writers = AgentPool(lambda: Agent(
+        name="Summary Writer",
+        role="Summarizes collected news articles",
+        model=ensure_shared_transport(Claude(id=model_id, api_key=anthropic_api_key, client_params=client_params)),
+        instructions=["Provide a concise summary of the article in 3-5 sentences, keeping names, numbers and dates"],
+        markdown=True,
+    ))
+    trend_analyzers = AgentPool(lambda: Agent(
+        name="Trend Analyzer",
+        role="Analyzes trends from summaries",
+        model=ensure_shared_transport(Claude(id=model_id, api_key=anthropic_api_key, client_params=client_params)),
+        instructions=[
+            "Identify emerging trends and startup opportunities",
+            "Write a detailed report so that any young entrepreneur can get real value reading it easily"
+        ],
+        markdown=True,
+    ))
+
+    def search(topic: str, max_results: int) -> List[Dict[str, str]]:
+        hits = json.loads(search_tool.duckduckgo_news(query=topic, max_results=max_results))
+        return [
+            {"title": hit.get("title", ""), "url": hit.get("url") or hit.get("href", ""),
+             "source": hit.get("source", ""), "body": hit.get("body", "")}
+            for hit in hits if hit.get("url") or hit.get("href")
+        ]
+
+    def fetch(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchedArticle:
+        headers = {"User-Agent": USER_AGENT}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:
+            return FetchedArticle("", etag, last_modified, not_modified=True)
+        response.raise_for_status()
+        # Newspaper4k only cleans the HTML here; the download above is ours so it can be conditional
+        article = Article(url)
+        article.download(input_html=response.text)
+        article.parse()
+        return FetchedArticle(article.text or "", response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def summarize(title: str, text: str) -> str:
+        with summary_writers.agent() as summary_writer:
+            return summary_writer.run(f"Summarize this article.\nTitle: {title}\n\n{text[:12000]}").content
+
+    def analyze(topic: str, summaries: List[ArticleResult]) -> str:
+        digest = "\n\n".join(f"### {a.title or a.url}\nSource: {a.url}\n{a.summary}" for a in summaries)
+        with trend_analyzers.agent() as trend_analyzer:
+            return trend_analyzer.run(f"Analyze trends about '{topic}' from the following article summaries:\n\n{digest}").content
+
+    def warm_up(workers: int) -> None:
+        summary_writers.warm(workers)
+        trend_analyzers.warm(1)
+
+    return TrendBackends(search, fetch, summarize, analyze, model_id, warm_up)
+
+
+def iter_article_summaries(links: List[Dict[str, str]], backends: TrendBackends, max_workers: int = 4,
+                           timeout: float = 60.0, cache: Optional["TrendCache"] = None) -> Iterator[ArticleResult]:
+    """Fetch and summarize articles concurrently, yielding each result as soon as it finishes.
+
+    timeout applies per article, counted from when a worker picks it up; articles that fail
+    or time out are yielded with an error instead of aborting the run.
+    """
+    started_at = {}
+
+    def run(link: Dict[str, str]) -> ArticleResult:
+        url, title = link["url"], link.get("title", "")
+        started_at[url] = time.monotonic()
+        result = ArticleResult(url, title, link.get("source", ""))
+        if cache:
+            text, content_hash, _ = cache.fetch(url, backends.fetch)
+        else:
+            text = backends.fetch(url).text
+        if not text.strip():
+            # Fall back to the search snippet when the page has no extractable text
+            text = link.get("body", "")
+            content_hash = hashlib.sha256(text.encode()).hexdigest()
+        if not text.strip():
+            raise ValueError("no article text")
+        if cache:
+            result.summary, result.cached, result.duplicate_of = cache.summarize(
+                url, title, text, content_hash, backends.model_id, backends.summarize
+            )
+        else:
+            result.summary = backends.summarize(title, text)
+        result.seconds = time.monotonic() - started_at[url]
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(links) or 1)))
+    try:
+        pending = {executor.submit(run, link): link for link in links}
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                link = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield ArticleResult(link["url"], link.get("title", ""), link.get("source", ""), error=str(e),
+                                        seconds=time.monotonic() - started_at.get(link["url"], time.monotonic()))
+
+            now = time.monotonic()
+            for future, link in list(pending.items()):
+                if link["url"] in started_at and now - started_at[link["url"]] > timeout:
+                    # The worker thread cannot be interrupted; stop waiting on it instead
+                    del pending[future]
+                    yield ArticleResult(link["url"], link.get("title", ""), link.get("source", ""),
+                                        error=f"timed out after {timeout:.0f}s", seconds=timeout)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_pipeline(topic: str, backends: TrendBackends, max_articles: int = 8, max_workers: int = 4,
+                 timeout: float = 60.0, cache: Optional["TrendCache"] = None, on_links: Optional[Callable[[List[Dict[str, str]]], None]] = None,
+                 on_article: Optional[Callable[[ArticleResult], None]] = None) -> TrendReport:
+    """Collect links, map fetch+summarize over them, and reduce the summaries into a trend analysis.
+
+    on_links and on_article are called from the calling thread as results become available.
+    """
+    started = time.perf_counter()
+    seen = set()
+    links = []
+    for link in (cache.search(topic, max_articles, backends.search) if cache else backends.search(topic, max_articles)):
+        if link["url"] not in seen:
+            seen.add(link["url"])
+            links.append(link)
+    links = links[:max_articles]
+    search_seconds = time.perf_counter() - started
+    if on_links:
+        on_links(links)
+
+    articles = []
+    for result in iter_article_summaries(links, backends, max_workers, timeout, cache):
+        articles.append(result)
+        if on_article:
+            on_article(result)
+    map_seconds = time.perf_counter() - started - search_seconds
+
+    summarized = [a for a in articles if a.summary]
+    if not summarized:
+        raise RuntimeError(f"None of the {len(links)} articles could be summarized")
+    analysis = backends.analyze(topic, summarized)
+    total = time.perf_counter() - started
+    return TrendReport(topic, articles, analysis, {
+        "articles": len(links),
+        "summarized": len(summarized),
+        "failed": len(articles) - len(summarized),
+        "search_seconds": search_seconds,
+        "map_seconds": map_seconds,
+        "reduce_seconds": total - search_seconds - map_seconds,
+        "total_seconds": total,
+        # Time the map stage would have taken one article at a time
+        "sequential_map_seconds": sum(a.seconds for a in articles),
+        "cached": sum(a.cached and not a.duplicate_of for a in articles),
+        "near_duplicates": sum(bool(a.duplicate_of) for a in articles),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the startup trend pipeline from the command line.")
+    parser.add_argument("topic")
+    parser.add_argument("--max-articles", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-article fetch+summarize timeout in seconds")
+    parser.add_argument("--stub", action="store_true", help="Use local stubs instead of search and model APIs")
+    parser.add_argument("--cache", default="trend_cache.sqlite3", help="Cache file for searches, articles and summaries")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if args.stub:
+        from trend_stubs import build_stub_backends
+        backends = build_stub_backends()
+    else:
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            parser.error("Set ANTHROPIC_API_KEY or pass --stub")
+        backends = build_backends(api_key)
+
+    cache = None
+    if not args.no_cache:
+        from trend_cache import TrendCache
+        cache = TrendCache(args.cache)
+
+    def show(result: ArticleResult) -> None:
+        if result.error:
+            status = f"error: {result.error}"
+        elif result.duplicate_of:
+            status = f"near-duplicate of {result.duplicate_of}"
+        else:
+            status = f"{len(result.summary)} chars" + (", cached" if result.cached else "")
+        print(f"[{result.seconds:5.1f}s] {result.title or result.url} ({status})", flush=True)
+
+    report = run_pipeline(args.topic, backends, args.max_articles, args.workers, args.timeout, cache, on_article=show)
+    print("\n" + report.analysis + "\n")
+    s = report.stats
+    print(f"{s['summarized']}/{s['articles']} articles summarized in {s['total_seconds']:.1f}s "
+          f"(search {s['search_seconds']:.1f}s, map {s['map_seconds']:.1f}s vs {s['sequential_map_seconds']:.1f}s "
+          f"sequential, reduce {s['reduce_seconds']:.1f}s)")
+    if cache:
+        print(f"{s['cached']} summaries from cache, {s['near_duplicates']} near-duplicates reused; cache {cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
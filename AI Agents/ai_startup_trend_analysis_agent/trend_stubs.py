@@ -0,0 +1,74 @@
+"""Offline stand-ins for news search, article download and the model, with simulated latency.
+
+Used by `python trend_pipeline.py <topic> --stub` and by the app when TRENDS_STUB=1.
+"""
+import hashlib
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from trend_pipeline import ArticleResult, FetchedArticle, TrendBackends
+
+_THEMES = [
+    ("funding", "Investors poured new money into {topic} startups this quarter, with seed rounds growing fastest."),
+    ("regulation", "Regulators are drafting rules for {topic}, creating demand for compliance tooling."),
+    ("infrastructure", "Teams building {topic} products report that data infrastructure is the main bottleneck."),
+    ("talent", "Hiring for {topic} specialists remains tight, pushing companies toward managed services."),
+    ("enterprise", "Large enterprises are moving {topic} pilots into production, favoring vendors with clear ROI."),
+    ("open source", "Open-source {topic} projects are gaining contributors and commercial backing."),
+]
+
+
+def build_stub_backends(fetch_seconds: float = 0.4, model_seconds: float = 0.6, jitter: float = 0.5,
+                        hang_every: int = 0, seed: int = 7, latency: float = 1.0) -> TrendBackends:
+    """hang_every=N makes every Nth article's fetch hang for a minute, to exercise timeouts.
+
+    latency scales every simulated delay; 0 leaves only the pipeline's and the app's own overhead.
+    """
+    fetch_seconds *= latency
+    model_seconds *= latency
+
+    def delay(key: str, base: float) -> None:
+        # Deterministic per key, so repeated runs see the same latencies
+        time.sleep(base * (1 + random.Random(f"{seed}:{key}").uniform(-jitter, jitter)))
+
+    def search(topic: str, max_results: int) -> List[Dict[str, str]]:
+        time.sleep(fetch_seconds / 2)
+        slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")
+        return [
+            {"title": f"{topic.title()} {_THEMES[i % len(_THEMES)][0]} report #{i + 1}",
+             "url": f"https://news.example/{slug}/{i + 1}", "source": "Example News", "body": ""}
+            for i in range(max_results)
+        ]
+
+    def fetch(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchedArticle:
+        index = int(url.rsplit("/", 1)[-1]) - 1
+        if hang_every and (index + 1) % hang_every == 0:
+            time.sleep(60)
+        topic = url.split("/")[-2].replace("-", " ")
+        # Articles sharing a theme are syndicated copies of one story
+        theme, sentence = _THEMES[index % len(_THEMES)]
+        text = " ".join([sentence.format(topic=topic)] + [
+            f"Paragraph {p} discusses {theme} in {topic} with examples from several companies." for p in range(1, 6)
+        ])
+        current_etag = '"' + hashlib.sha256(text.encode()).hexdigest()[:16] + '"'
+        if etag == current_etag:
+            # A 304 is still a round trip, just a much cheaper one
+            delay(f"revalidate:{url}", fetch_seconds / 4)
+            return FetchedArticle("", etag, last_modified, not_modified=True)
+        delay(f"fetch:{url}", fetch_seconds)
+        return FetchedArticle(text, current_etag)
+
+    def summarize(title: str, text: str) -> str:
+        delay(f"summarize:{title}", model_seconds)
+        return " ".join(re.split(r"(?<=\.)\s+", text)[:2])
+
+    def analyze(topic: str, summaries: List[ArticleResult]) -> str:
+        time.sleep(model_seconds)
+        lines = [f"## Trend analysis: {topic}", ""]
+        lines += [f"- **{a.title}**: {a.summary.split('.')[0]}." for a in summaries]
+        lines += ["", f"_Stub analysis of {len(summaries)} article summaries._"]
+        return "\n".join(lines)
+
+    return TrendBackends(search, fetch, summarize, analyze, model_id="stub")
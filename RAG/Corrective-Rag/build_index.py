@@ -0,0 +1,203 @@
+"""Build the Corrective RAG corpus into a persisted Chroma collection.
+
+Sources are fetched concurrently, split and embedded once, and written to a Chroma directory
+together with a manifest.json recording what was indexed. Re-running only embeds URLs that are
+new (or, with --refresh, whose content changed), so adding a URL costs one page of embeddings:
+
+    python build_index.py                              # the notebook's three blog posts
+    python build_index.py --url https://example.com/post --refresh
+    python build_index.py --urls-file sources.txt --prune
+
+The notebook's retrieve node then opens the collection with open_vectorstore(), which only
+reads the directory and takes milliseconds.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+DEFAULT_URLS = [
+    "https://lilianweng.github.io/posts/2023-06-23-agent/",
+    "https://lilianweng.github.io/posts/2023-03-15-prompt-engineering/",
+    "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
+]
+DEFAULT_PERSIST_DIR = "crag_index"
+DEFAULT_COLLECTION = "rag-chroma"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+CHUNK_SIZE = 250
+CHUNK_OVERLAP = 0
+MANIFEST = "manifest.json"
+
+
+def default_embeddings(model: str = DEFAULT_EMBEDDING_MODEL):
+    from langchain_openai import OpenAIEmbeddings
+    from llm_client import http_client
+    return OpenAIEmbeddings(model=model, http_client=http_client(sdk="openai"))
+
+
+def open_vectorstore(persist_dir: str = DEFAULT_PERSIST_DIR, collection: str = DEFAULT_COLLECTION,
+                     embeddings: Any = None):
+    """Open a collection built by this script; raises FileNotFoundError if it has not been built."""
+    from langchain_community.vectorstores import Chroma
+
+    manifest = load_manifest(persist_dir)
+    if not manifest:
+        raise FileNotFoundError(f"No index in {persist_dir}; run `python build_index.py` first")
+    return Chroma(
+        collection_name=collection,
+        embedding_function=embeddings or default_embeddings(manifest["embedding_model"]),
+        persist_directory=persist_dir,
+    )
+
+
+def load_manifest(persist_dir: str) -> Dict[str, Any]:
+    path = os.path.join(persist_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(persist_dir: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(persist_dir, MANIFEST)
+    # Write-then-rename, so an interrupted build never leaves a half-written manifest
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def fetch(url: str) -> List[Any]:
+    from langchain_community.document_loaders import WebBaseLoader
+    return WebBaseLoader(url).load()
+
+
+def fetch_all(urls: List[str], workers: int = 8) -> Dict[str, Any]:
+    """{url: [Document, ...] or the exception it raised}, fetched concurrently."""
+    results: Dict[str, Any] = {}
+    if not urls:
+        return results
+    with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as executor:
+        futures = {executor.submit(fetch, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                results[url] = e
+    return results
+
+
+def content_hash(documents: List[Any]) -> str:
+    return hashlib.sha256("\n".join(d.page_content for d in documents).encode()).hexdigest()
+
+
+def chunk_ids(url: str, chunks: List[Any]) -> List[str]:
+    return [hashlib.sha256(f"{url}|{i}|{c.page_content}".encode()).hexdigest()[:32] for i, c in enumerate(chunks)]
+
+
+def build(urls: List[str], persist_dir: str = DEFAULT_PERSIST_DIR, collection: str = DEFAULT_COLLECTION,
+          embedding_model: str = DEFAULT_EMBEDDING_MODEL, embeddings: Any = None, refresh: bool = False,
+          prune: bool = False, workers: int = 8) -> Dict[str, Any]:
+    """Bring the persisted collection up to date with urls and return build stats.
+
+    Raises ValueError when the existing index was built with a different embedding model or
+    chunking, since its vectors could not be mixed with new ones; delete the directory to rebuild.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
+
+    started = time.perf_counter()
+    os.makedirs(persist_dir, exist_ok=True)
+    settings = {"collection": collection, "embedding_model": embedding_model,
+                "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+    manifest = load_manifest(persist_dir)
+    if manifest:
+        changed = {k: (manifest.get(k), v) for k, v in settings.items() if manifest.get(k) != v}
+        if changed:
+            raise ValueError(f"Index in {persist_dir} was built with different settings {changed}; "
+                             "remove the directory to rebuild it")
+    else:
+        manifest = {**settings, "sources": {}}
+    sources: Dict[str, Dict[str, Any]] = manifest["sources"]
+
+    store = Chroma(collection_name=collection, embedding_function=embeddings or default_embeddings(embedding_model),
+                   persist_directory=persist_dir)
+    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "failed": 0, "chunks_embedded": 0}
+
+    to_fetch = [url for url in urls if refresh or url not in sources]
+    stats["unchanged"] = len(urls) - len(to_fetch)
+    fetch_started = time.perf_counter()
+    fetched = fetch_all(to_fetch, workers)
+    stats["fetch_seconds"] = time.perf_counter() - fetch_started
+
+    for url in to_fetch:
+        documents = fetched[url]
+        if isinstance(documents, Exception):
+            print(f"failed to fetch {url}: {documents}")
+            stats["failed"] += 1
+            continue
+        digest = content_hash(documents)
+        previous = sources.get(url)
+        if previous and previous["content_hash"] == digest:
+            stats["unchanged"] += 1
+            continue
+        chunks = splitter.split_documents(documents)
+        ids = chunk_ids(url, chunks)
+        if previous:
+            store.delete(ids=previous["ids"])
+        if chunks:
+            store.add_documents(chunks, ids=ids)
+        stats["chunks_embedded"] += len(chunks)
+        stats["updated" if previous else "added"] += 1
+        sources[url] = {"content_hash": digest, "chunks": len(chunks), "ids": ids, "indexed_at": time.time()}
+        # Saved after every source, so an interrupted build resumes where it stopped
+        save_manifest(persist_dir, manifest)
+
+    if prune:
+        for url in [u for u in sources if u not in urls]:
+            store.delete(ids=sources.pop(url)["ids"])
+            stats["removed"] += 1
+
+    manifest["built_at"] = time.time()
+    save_manifest(persist_dir, manifest)
+    stats["chunks"] = sum(s["chunks"] for s in sources.values())
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def read_urls(path: Optional[str], extra: List[str]) -> List[str]:
+    urls = []
+    if path:
+        with open(path) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    urls += extra
+    # Keep order, drop repeats
+    return list(dict.fromkeys(urls or DEFAULT_URLS))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or update the persisted Corrective RAG index.")
+    parser.add_argument("--url", action="append", default=[], help="Source URL (repeatable)")
+    parser.add_argument("--urls-file", help="File with one source URL per line")
+    parser.add_argument("--persist-dir", default=DEFAULT_PERSIST_DIR)
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--embedding-model", default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch indexed URLs and re-embed changed ones")
+    parser.add_argument("--prune", action="store_true", help="Remove indexed URLs that are no longer listed")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls_file, args.url)
+    stats = build(urls, args.persist_dir, args.collection, args.embedding_model,
+                  refresh=args.refresh, prune=args.prune, workers=args.workers)
+    print(f"{stats['added']} added, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed, {stats['failed']} failed; embedded {stats['chunks_embedded']} chunks "
+          f"({stats['chunks']} in the index) in {stats['seconds']:.1f}s (fetch {stats['fetch_seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Relevance grading for the Corrective RAG graph.
+
+The notebook's grade_documents node used to call the LLM grader once per retrieved document,
+one after another. DocumentGrader grades all of them in one step instead:
+
+1. An embedding-similarity pre-grade accepts or rejects the clear cases locally.
+2. The remaining documents go to the LLM, either in a single batched call (all documents in one
+   prompt) or as concurrent per-document calls with bounded parallelism.
+
+    grader = DocumentGrader(build_retrieval_grader(llm), build_batch_grader(llm), FastEmbedEmbeddings())
+    result = grader.grade(question, documents)
+"""
+import hashlib
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+
+GRADE_SYSTEM = """You are a grader assessing relevance of a retrieved document to a user question. \n
+    If the document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
+    Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
+
+BATCH_GRADE_SYSTEM = """You are a grader assessing relevance of retrieved documents to a user question. \n
+    Each document is numbered. If a document contains keyword(s) or semantic meaning related to the question,
+    grade it as relevant. Return one grade per document, with its number and a binary score 'yes' or 'no'."""
+
+# Each document is cut to this many characters in the batched prompt
+BATCH_DOCUMENT_CHARS = 2000
+
+
+class GradeDocuments(BaseModel):
+    """Binary score for relevance check on retrieved documents."""
+
+    binary_score: str = Field(description="Documents are relevant to the question, 'yes' or 'no'")
+
+
+class DocumentGrade(BaseModel):
+    """Binary relevance score for one numbered document."""
+
+    index: int = Field(description="Number of the document being graded")
+    binary_score: str = Field(description="Document is relevant to the question, 'yes' or 'no'")
+
+
+class BatchGrades(BaseModel):
+    """Binary relevance scores for every numbered document."""
+
+    grades: List[DocumentGrade] = Field(description="One grade per document")
+
+
+def build_retrieval_grader(llm: Any):
+    """The per-document grader chain: {question, document} -> GradeDocuments."""
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", GRADE_SYSTEM),
+            ("human", "Retrieved document: \n\n {document} \n\n User question: {question}"),
+        ]
+    )
+    return prompt | llm.with_structured_output(GradeDocuments)
+
+
+def build_batch_grader(llm: Any):
+    """The batched grader chain: {question, documents} -> BatchGrades, documents pre-numbered."""
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", BATCH_GRADE_SYSTEM),
+            ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+        ]
+    )
+    return prompt | llm.with_structured_output(BatchGrades)
+
+
+def _score(value: Any) -> str:
+    return "yes" if str(value).strip().lower().startswith("y") else "no"
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class GradingResult:
+    documents: List[Document]
+    # "yes"/"no" per input document, in input order
+    grades: List[str]
+    # How each grade was decided: "accepted" or "rejected" by the pre-grade, or "llm"
+    decided_by: List[str]
+    similarities: List[Optional[float]]
+    seconds: float = 0.0
+    llm_calls: int = 0
+
+    @property
+    def all_relevant(self) -> bool:
+        return all(grade == "yes" for grade in self.grades)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.grades),
+            "relevant": self.grades.count("yes"),
+            "pre_accepted": self.decided_by.count("accepted"),
+            "pre_rejected": self.decided_by.count("rejected"),
+            "llm_graded": self.decided_by.count("llm"),
+            "llm_calls": self.llm_calls,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+@dataclass
+class DocumentGrader:
+    """Grades retrieved documents for one question in a single step.
+
+    embeddings is any LangChain Embeddings object; a local model such as FastEmbedEmbeddings
+    keeps the pre-grade cheap. Similarity at or above accept_above is relevant and below
+    reject_below is irrelevant without asking the LLM. The defaults suit bge-small-en; set
+    embeddings=None to send every document to the LLM.
+
+    With batch_grader set, the undecided documents are graded in one LLM call, falling back to
+    per-document calls for any grade the batch answer leaves out. Otherwise grader runs once per
+    document, at most max_concurrency at a time.
+    """
+
+    grader: Any
+    batch_grader: Any = None
+    embeddings: Any = None
+    accept_above: float = 0.80
+    reject_below: float = 0.55
+    max_concurrency: int = 4
+    _vectors: Dict[str, List[float]] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _document_vectors(self, documents: List[Document]) -> List[List[float]]:
+        # Retrieval keeps returning the same chunks, so their vectors are kept between questions
+        keys = [hashlib.sha256(d.page_content.encode()).hexdigest() for d in documents]
+        with self._lock:
+            missing = {key: d.page_content for key, d in zip(keys, documents) if key not in self._vectors}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            with self._lock:
+                self._vectors.update(zip(missing, vectors))
+        with self._lock:
+            return [self._vectors[key] for key in keys]
+
+    def similarities(self, question: str, documents: List[Document]) -> List[Optional[float]]:
+        if self.embeddings is None or not documents:
+            return [None] * len(documents)
+        query = self.embeddings.embed_query(question)
+        return [_cosine(query, vector) for vector in self._document_vectors(documents)]
+
+    def _pregrade(self, similarity: Optional[float]) -> Optional[str]:
+        if similarity is None:
+            return None
+        if similarity >= self.accept_above:
+            return "yes"
+        if similarity < self.reject_below:
+            return "no"
+        return None
+
+    def _grade_each(self, question: str, documents: List[Document]) -> List[str]:
+        inputs = [{"question": question, "document": d.page_content} for d in documents]
+        scores = self.grader.batch(inputs, config={"max_concurrency": self.max_concurrency})
+        return [_score(score.binary_score) for score in scores]
+
+    def _grade_batch(self, question: str, documents: List[Document]) -> Dict[int, str]:
+        numbered = "\n\n".join(
+            f"[{i}] {d.page_content[:BATCH_DOCUMENT_CHARS]}" for i, d in enumerate(documents)
+        )
+        answer = self.batch_grader.invoke({"question": question, "documents": numbered})
+        return {g.index: _score(g.binary_score) for g in answer.grades if 0 <= g.index < len(documents)}
+
+    def grade(self, question: str, documents: List[Document]) -> GradingResult:
+        started = time.perf_counter()
+        similarities = self.similarities(question, documents)
+        grades: List[Optional[str]] = [self._pregrade(s) for s in similarities]
+        decided_by = [{"yes": "accepted", "no": "rejected"}.get(g, "llm") for g in grades]
+
+        undecided = [i for i, g in enumerate(grades) if g is None]
+        llm_calls = 0
+        if undecided and self.batch_grader is not None:
+            answered = self._grade_batch(question, [documents[i] for i in undecided])
+            llm_calls += 1
+            for position, i in enumerate(undecided):
+                grades[i] = answered.get(position)
+            undecided = [i for i in undecided if grades[i] is None]
+        if undecided:
+            for i, grade in zip(undecided, self._grade_each(question, [documents[i] for i in undecided])):
+                grades[i] = grade
+            llm_calls += len(undecided)
+
+        return GradingResult(
+            documents=[d for d, g in zip(documents, grades) if g == "yes"],
+            grades=grades,
+            decided_by=decided_by,
+            similarities=similarities,
+            seconds=time.perf_counter() - started,
+            llm_calls=llm_calls,
+        )
+
+
+def timed(name: str, node: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Wrap a graph node so its update carries node_seconds, which shows up in app.stream()."""
+    def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        update = node(state)
+        return {**update, "node_seconds": time.perf_counter() - started}
+
+    run.__name__ = name
+    return run
@@ -0,0 +1,145 @@
+"""Speculative web search for the Corrective RAG graph.
+
+In the plain graph the web-search branch runs grade_documents, transform_query and
+web_search_node back to back. SpeculativeCorrector starts the query rewrite and the web search
+in the background as soon as grading starts. When grading keeps every document the speculative
+work is discarded; otherwise its results are already there (or nearly) when grading finishes:
+
+    corrector = SpeculativeCorrector(document_grader, question_rewriter, web_search_tool, SearchCache())
+    update = corrector.run(question, documents)
+
+Search results are cached per rewritten query with a TTL. StubSearch stands in for Tavily
+offline, with a fixed latency.
+"""
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from crag_grading import DocumentGrader
+
+
+def _normalize(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class SearchCache:
+    """In-memory search results per normalized query, expiring after ttl seconds."""
+
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, query: str, search_tool: Any) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return (results, served from cache); search_tool is called as in the notebook's web_search node."""
+        key = _normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1], True
+        results = search_tool.invoke({"query": query})
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (time.monotonic(), results)
+        return results, False
+
+
+class StubSearch:
+    """Offline stand-in for TavilySearchResults: deterministic results after a fixed latency."""
+
+    def __init__(self, latency: float = 1.0, k: int = 3):
+        self.latency = latency
+        self.k = k
+        self.calls = 0
+
+    def invoke(self, inputs: Dict[str, str]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        query = inputs["query"]
+        return [
+            {"url": f"https://search.example/{i}", "content": f"Result {i + 1} for '{query}': background on {query}."}
+            for i in range(self.k)
+        ]
+
+
+def web_results_document(results: List[Dict[str, Any]]) -> Document:
+    return Document(page_content="\n".join(d["content"] for d in results))
+
+
+class SpeculativeCorrector:
+    """Grading plus the corrective web search, overlapped.
+
+    With speculative=False the same steps run one after another, which gives the baseline
+    the saved time is measured against.
+    """
+
+    def __init__(self, grader: DocumentGrader, rewriter: Any, search_tool: Any,
+                 cache: Optional[SearchCache] = None, speculative: bool = True, max_workers: int = 4):
+        self.grader = grader
+        self.rewriter = rewriter
+        self.search_tool = search_tool
+        self.cache = cache
+        self.speculative = speculative
+        # Shared across requests; a discarded speculation finishes in the background
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crag-speculate")
+
+    def _rewrite_and_search(self, question: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        better_question = self.rewriter.invoke({"question": question})
+        rewritten = time.perf_counter()
+        if self.cache:
+            results, cached = self.cache.search(better_question, self.search_tool)
+        else:
+            results, cached = self.search_tool.invoke({"query": better_question}), False
+        return {
+            "question": better_question,
+            "results": results,
+            "search_cached": cached,
+            "rewrite_seconds": rewritten - started,
+            "search_seconds": time.perf_counter() - rewritten,
+        }
+
+    def run(self, question: str, documents: List[Document]) -> Dict[str, Any]:
+        """Graph state update: graded documents, plus web results and the rewritten question when needed."""
+        started = time.perf_counter()
+        future: Optional[Future] = None
+        if self.speculative:
+            future = self._executor.submit(self._rewrite_and_search, question)
+
+        result = self.grader.grade(question, documents)
+        grading_seconds = time.perf_counter() - started
+        update: Dict[str, Any] = {"documents": result.documents, "question": question, "web_search": "No",
+                                  "grading": result.summary()}
+        speculation = {"speculative": self.speculative, "used": False, "grading_seconds": grading_seconds}
+
+        if result.all_relevant:
+            if future is not None:
+                # Cancelled if it has not started yet; otherwise its result is simply dropped
+                future.cancel()
+                speculation["discarded"] = True
+            speculation["saved_seconds"] = 0.0
+        else:
+            search = future.result() if future is not None else self._rewrite_and_search(question)
+            update["documents"] = result.documents + [web_results_document(search["results"])]
+            update["question"] = search["question"]
+            update["web_search"] = "Yes"
+            elapsed = time.perf_counter() - started
+            sequential = grading_seconds + search["rewrite_seconds"] + search["search_seconds"]
+            speculation.update(
+                used=True,
+                rewrite_seconds=search["rewrite_seconds"],
+                search_seconds=search["search_seconds"],
+                search_cached=search["search_cached"],
+                # The sequential path's time minus what this request actually waited
+                saved_seconds=max(0.0, sequential - elapsed),
+            )
+        speculation["seconds"] = time.perf_counter() - started
+        update["speculation"] = speculation
+        return update
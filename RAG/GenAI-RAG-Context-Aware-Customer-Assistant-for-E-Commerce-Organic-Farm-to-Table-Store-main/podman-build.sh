@@ -1,27 +1,30 @@
-# Build stage
-podman build -t build-stage -f - . << EOF
+# Build stage (the context is the repository root, for the shared llm_client package)
+ROOT="$(cd "$(dirname "$0")/../.." && pwd)"
+podman build -t build-stage -f - "$ROOT" << EOF
 FROM python:3.8-alpine AS build
 
-WORKDIR /app
+WORKDIR /src/RAG/GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main
 
-COPY requirements.txt requirements.txt
+COPY llm_client /src/llm_client
+COPY RAG/GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main/requirements.txt requirements.txt
 RUN apk add --no-cache build-base && \
     pip3 install --user --no-cache-dir -r requirements.txt
 
-COPY . .
+COPY RAG/GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main .
 EOF
 
 # Save the build-stage container ID.
 build_container_id=$(podman ps -a | grep build-stage | awk '{print $1}')
 
 # Production stage
-podman build -t production-stage -f - . << EOF
+podman build -t production-stage -f - "$ROOT" << EOF
 FROM python:3.8-alpine AS production
 
-WORKDIR /app
+WORKDIR /src/RAG/GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main
 
 COPY --from=$build_container_id /root/.local /root/.local
-COPY . .
+COPY llm_client /src/llm_client
+COPY RAG/GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main .
 
 ENV PATH=/root/.local/bin:$PATH
 
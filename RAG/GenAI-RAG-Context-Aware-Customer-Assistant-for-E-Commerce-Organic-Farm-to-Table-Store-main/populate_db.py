@@ -2,13 +2,11 @@ import os
 import json
 import argparse
 from server.rag_chatbot import RAGChatbot
+from server.logs import configure_logging
 from dotenv import load_dotenv
 from docx import Document
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
 # Load environment variables from .env file
 load_dotenv()
 
@@ -16,6 +14,9 @@ load_dotenv()
 with open('config.json', 'r') as config_file:
     config = json.load(config_file)
 
+# Configure logging
+configure_logging(config.get('logging', {}))
+
 # Load API key from environment variable
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -46,13 +47,21 @@ def split_text(text, max_chunk_size=1000):
         chunks.append(' '.join(current_chunk))
     return chunks
 
+def add_documents(chatbot, documents):
+    logging.info(f"Adding or updating {len(documents)} documents in ChromaDB...")
+    for doc in documents:
+        logging.debug(f"Adding/updating document: {doc['text'][:50]}... (Source: {doc['source']})")
+        chatbot.add_or_update_documents([doc])
+    logging.info("Documents processed successfully in ChromaDB.")
+
 def main(clear_collection=False, max_chunk_size=None):
     # Initialize the RAG chatbot
     chatbot = RAGChatbot(
         OPENAI_API_KEY,
         collection_name=config['chroma_db']['collection_name'],
         persist_directory=config['chroma_db']['persist_directory'],
-        system_prompt_file=config.get('system_prompt_file', None)  # Add this line if you have a system prompt file
+        system_prompt_file=config.get('system_prompt_file', None),  # Add this line if you have a system prompt file
+        vector_store=config.get('vector_store')
     )
 
     if clear_collection:
@@ -109,11 +118,7 @@ def main(clear_collection=False, max_chunk_size=None):
     logging.info(f"Total documents (including predefined): {len(documents)}")
 
     # Add or update the documents in the ChromaDB collection
-    logging.info(f"Adding or updating {len(documents)} documents in ChromaDB...")
-    for doc in documents:
-        logging.debug(f"Adding/updating document: {doc['text'][:50]}... (Source: {doc['source']})")
-        chatbot.add_or_update_documents([doc])
-    logging.info("Documents processed successfully in ChromaDB.")
+    add_documents(chatbot, documents)
 
     # Validate the database
     all_docs = chatbot.get_all_documents()
@@ -1,15 +1,15 @@
 from server.app import create_app
 from server.website import Website
 from server.backend import Backend_Api
+from server.logs import configure_logging
 from json import load
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
 if __name__ == '__main__':
     try:
         config = load(open('config.json', 'r'))
+        # JSON lines written from a background thread, with levels from config.json
+        configure_logging(config.get('logging', {}))
         site_config = config['site_config']
         
         # Create the app without registering routes
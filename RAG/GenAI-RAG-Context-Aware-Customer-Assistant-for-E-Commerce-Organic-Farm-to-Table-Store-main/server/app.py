@@ -23,7 +23,8 @@ def create_app(config, register_routes=True):
             openai_api_key=OPENAI_API_KEY,
             collection_name=config['chroma_db']['collection_name'],
             persist_directory=config['chroma_db']['persist_directory'],
-            system_prompt_file=os.path.join(os.path.dirname(__file__), '..', 'system_prompt.txt')
+            system_prompt_file=os.path.join(os.path.dirname(__file__), '..', 'system_prompt.txt'),
+            vector_store=config.get('vector_store')
         )
         app.logger.info("RAG chatbot initialized successfully")
     except Exception as e:
@@ -1,15 +1,26 @@
 from flask import request, jsonify
-from datetime import datetime
-from requests import get, post
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import os
 import logging
 import json
+import time
 from .rag_chatbot import RAGChatbot
+from .coalescing import SingleFlight, normalize_question
+from .routing import ModelRouter
+from .web_search import WebSearch, merge_context, web_documents
+from .logs import logging_stats
 import requests
+from llm_client import METRICS, requests_session
 
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def chat_completions_url(api_base: str) -> str:
+    # OPENAI_API_BASE is usually given with the /v1 suffix (as the openai SDK expects), config.json without it
+    base = api_base.rstrip('/')
+    if not base.endswith('/v1'):
+        base += '/v1'
+    return f'{base}/chat/completions'
 
 class Backend_Api:
     def __init__(self, app, config: dict) -> None:
@@ -18,17 +29,35 @@ class Backend_Api:
         self.openai_key = os.getenv("OPENAI_API_KEY") or config['openai_key']
         self.openai_api_base = os.getenv("OPENAI_API_BASE") or config['openai_api_base']
         self.proxy = config['proxy']
+        self.session = requests_session()
+        # Identical questions asked at the same moment (e.g. during a promotion) share one RAG query
+        self.single_flight = SingleFlight()
         
         # Initialize RAGChatbot
         self.chatbot = RAGChatbot(
             openai_api_key=self.openai_key,
             collection_name=config["chroma_db"]["collection_name"],
             persist_directory=config["chroma_db"]["persist_directory"],
-            system_prompt_file=os.path.join(os.path.dirname(__file__), '..', 'system_prompt.txt')
+            system_prompt_file=os.path.join(os.path.dirname(__file__), '..', 'system_prompt.txt'),
+            vector_store=config.get('vector_store')
         )
+        # Easy questions go to a small model, hard ones to a large model; slow calls are hedged
+        self.router = ModelRouter(config.get('routing', {}), self.chatbot.retrieval_similarity)
+        # Internet mode searches the web and the local store at the same time
+        web_search_config = config.get('web_search', {})
+        self.web_search = WebSearch(web_search_config, self.session)
+        self.retrieval_timeout = web_search_config.get('retrieval_timeout_seconds', 5.0)
+        self.context_max_tokens = web_search_config.get('context_max_tokens', 1500)
+        self.context_pool = ThreadPoolExecutor(max_workers=web_search_config.get('max_workers', 32),
+                                               thread_name_prefix='context')
         
         self.routes = {
             '/health': {'function': self.health_check, 'methods': ['GET']},
+            '/llm-metrics': {'function': self.llm_metrics, 'methods': ['GET']},
+            '/coalescing-metrics': {'function': self.coalescing_metrics, 'methods': ['GET']},
+            '/routing-metrics': {'function': self.routing_metrics, 'methods': ['GET']},
+            '/search-metrics': {'function': self.search_metrics, 'methods': ['GET']},
+            '/logging-metrics': {'function': self.logging_metrics, 'methods': ['GET']},
             '/webhook': {'function': self.webhook, 'methods': ['POST']},
             '/backend-api/v2/conversation': {'function': self.conversation, 'methods': ['POST']},
             '/create-thread': {'function': self.create_thread, 'methods': ['POST']},
@@ -55,57 +84,106 @@ class Backend_Api:
             all_docs = self.chatbot.get_all_documents()
             return jsonify({'status': 'Chatbot is initialized', 'document_count': len(all_docs)}), 200
         except Exception as e:
-            logging.error(f"Error fetching documents: {e}", exc_info=True)
+            logger.error(f"Error fetching documents: {e}", exc_info=True)
             return jsonify({'status': 'Error fetching documents', 'error': str(e)}), 500
 
+    def llm_metrics(self):
+        return jsonify(METRICS.snapshot()), 200
+
+    def coalescing_metrics(self):
+        return jsonify(self.single_flight.stats()), 200
+
+    def routing_metrics(self):
+        return jsonify(self.router.stats()), 200
+
+    def search_metrics(self):
+        return jsonify(self.web_search.stats()), 200
+
+    def logging_metrics(self):
+        return jsonify(logging_stats()), 200
+
+    def internet_context(self, user_message):
+        """Web results and local documents, fetched concurrently and merged into one context.
+
+        Internet mode adds max(search, retrieval) to a question instead of their sum; either side
+        that fails or runs out of time is left out. None when both come back empty, so the chain
+        retrieves as usual.
+        """
+        started = time.perf_counter()
+        search = self.context_pool.submit(self.web_search.search, user_message)
+        local = self.context_pool.submit(self.chatbot.retrieve, user_message)
+
+        def result(future, timeout, name):
+            try:
+                return future.result(timeout=max(0.0, started + timeout - time.perf_counter()))
+            except TimeoutError:
+                logger.warning(f"{name} took longer than {timeout}s; answering without it")
+            except Exception as e:
+                logger.error(f"{name} failed: {e}", exc_info=True)
+            return []
+
+        # The search request has its own timeout; the margin covers connecting and reading the body
+        web = web_documents(result(search, self.web_search.timeout + 1.0, "Web search"))
+        local_documents = result(local, self.retrieval_timeout, "Local retrieval")
+        if not web and not local_documents:
+            return None
+        documents = merge_context(local_documents, web, self.chatbot.count_tokens, self.context_max_tokens)
+        logger.debug("Internet context: %d of %d local and %d web documents in %.3fs", len(documents),
+                     len(local_documents), len(web), time.perf_counter() - started)
+        return documents
+
+    def ask(self, user_message, requested_model=None, internet_access=False):
+        def answer():
+            if self.chatbot.is_greeting(user_message):
+                return self.chatbot.greet(), [], None
+            documents = self.internet_context(user_message) if internet_access else None
+            decision = self.router.classify(user_message, requested_model)
+            logger.debug("Routed to %s (%s): %s", decision.route, decision.model, decision.reasons or 'easy')
+            rag_answer, source_documents = self.chatbot.query(
+                user_message, model=decision.model, run=self.router.runner(decision), documents=documents)
+            return rag_answer, source_documents, decision
+
+        # With routing on the router picks the model from the question alone, so /webhook (no model) and
+        # /conversation (the UI's pick) share answers; with routing off the picked model answers, so it is part of the key
+        model_key = None if self.router.enabled else requested_model
+        (answer, source_documents, decision), shared = self.single_flight.do(
+            (normalize_question(user_message), model_key, internet_access), answer)
+        if shared:
+            logger.debug("Shared an in-flight answer for: %s", user_message)
+        return answer, source_documents, decision
+
     def webhook(self):
         if self.chatbot is None:
             return jsonify({'message': 'Chatbot is not initialized. Please check the logs.'}), 500
 
         data = request.json
         user_message = data.get('message', '').strip()
-        logging.debug(f"Received message for webhook: {user_message}")
+        logger.debug("Received message for webhook: %s", user_message)
         try:
-            answer, source_documents = self.chatbot.query(user_message)
-            logging.debug(f"Response from chatbot: {answer}")
+            answer, source_documents, _ = self.ask(user_message)
+            logger.debug("Response from chatbot: %s", answer)
             return jsonify({'message': answer})
         except Exception as e:
-            logging.error(f"Error processing message: {e}", exc_info=True)
+            logger.error(f"Error processing message: {e}", exc_info=True)
             return jsonify({'message': 'Error processing your request.'}), 500
 
     def conversation(self):
         try:
             data = request.json
-            logging.debug(f"Received data for conversation: {data}")
+            logger.debug("Received data for conversation", extra={"payload": data})
             user_message = data.get('message', '').strip()
             selected_model = data.get('model', 'gpt-3.5-turbo')  # Get selected model from frontend
-            logging.debug(f"Extracted user message: '{user_message}'")
+            logger.debug("Extracted user message: '%s'", user_message)
 
             if not user_message:
-                logging.debug("User message is empty, returning greeting response.")
+                logger.debug("User message is empty, returning greeting response.")
                 return jsonify({'response': self.chatbot.greet()})
 
             jailbreak = data.get('jailbreak', False)
             internet_access = data.get('meta', {}).get('content', {}).get('internet_access', False)
             _conversation = data.get('meta', {}).get('content', {}).get('conversation', [])
             prompt = data.get('meta', {}).get('content', {}).get('parts', [{}])[0]
-            current_date = datetime.now().strftime("%Y-%m-%d")
             system_message = 'You are a helpful assistant.'
-
-            extra = []
-            if internet_access:
-                search = get('https://ddg-api.herokuapp.com/search', params={
-                    'query': prompt.get("content", ""),
-                    'limit': 3,
-                })
-
-                blob = ''
-                for index, result in enumerate(search.json()):
-                    blob += f'[{index}] "{result["snippet"]}"\nURL:{result["link"]}\n\n'
-
-                date = datetime.now().strftime('%d/%m/%y')
-                blob += f'current date: {date}\n\nInstructions: Using the provided web search results, write a comprehensive report...\n'
-                extra.append({'role': 'system', 'content': blob})
             
             # messages = [{'role': 'system', 'content': system_message}]
 
@@ -128,9 +206,9 @@ class Backend_Api:
             # logging.debug(f"RAG Answer: {rag_answer}")
            
             # Use RAG pipeline for local knowledge
-            logging.debug(f"Using RAG pipeline for: {user_message}")
-            rag_answer, source_documents = self.chatbot.query(user_message)
-            logging.debug(f"RAG Answer: {rag_answer}")
+            logger.debug("Using RAG pipeline for: %s", user_message)
+            rag_answer, source_documents, decision = self.ask(user_message, selected_model, internet_access)
+            logger.debug("RAG Answer: %s", rag_answer)
 
             # If RAG answer is successful, return it without calling OpenAI API
             if rag_answer != "There was an error processing your request.":
@@ -143,28 +221,33 @@ class Backend_Api:
                 {'role': 'assistant', 'content': f"Local knowledge base information: {rag_answer}"}
             ]
 
-            # Make the API call to OpenAI
+            # Make the API call to OpenAI, with the model the question was routed to
+            fallback_model = (decision.model if decision else None) or selected_model
             try:
-                response = requests.post(
-                    'https://api.openai.com/v1/chat/completions',
+                response = self.session.post(
+                    chat_completions_url(self.openai_api_base),
                     headers={'Authorization': f'Bearer {self.openai_key}'},
                     json={
-                        'model': selected_model,
+                        'model': fallback_model,
                         'messages': messages
                     },
                     timeout=30
                 )
                 response.raise_for_status()
             except requests.exceptions.RequestException as e:
-                logging.error(f"Error calling OpenAI API: {e}")
+                logger.error(f"Error calling OpenAI API: {e}")
                 return jsonify({'response': rag_answer}), 200  # Fall back to RAG answer if API call fails
 
             if response.status_code == 200:
                 gpt_resp = response.json()
+                if decision:
+                    usage = gpt_resp.get('usage', {})
+                    self.router.record(decision, usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0),
+                                       fallback=True)
                 choices = gpt_resp.get('choices', [])
                 if choices:
                     message_content = choices[0].get('message', {}).get('content', '')
-                    logging.debug(f"GPT response: {message_content}")
+                    logger.debug("GPT response: %s", message_content)
                     return jsonify({'response': message_content}), 200
                 else:
                     raise ValueError("No choices found in GPT response")
@@ -175,11 +258,11 @@ class Backend_Api:
                 }), response.status_code
 
         except Exception as e:
-            logging.error(f"Error in conversation: {e}", exc_info=True)
+            logger.error(f"Error in conversation: {e}", exc_info=True)
             return jsonify({'message': 'Error processing your request.', 'error': str(e)}), 500
         
     def create_thread(self):
-        response = post(
+        response = self.session.post(
             'https://api.openai.com/v1/threads',
             headers={
                 'Authorization': f'Bearer {self.openai_key}',
@@ -197,7 +280,7 @@ class Backend_Api:
         if not thread_id or not message:
             return jsonify({'error': 'Missing thread_id or message'}), 400
 
-        response = post(
+        response = self.session.post(
             f'https://api.openai.com/v1/threads/{thread_id}/messages',
             json={
                 'role': 'user',
@@ -218,7 +301,7 @@ class Backend_Api:
         if not thread_id:
             return jsonify({'error': 'Missing thread_id'}), 400
 
-        run_response = post(
+        run_response = self.session.post(
             f'https://api.openai.com/v1/threads/{thread_id}/runs',
             json={'assistant_id': 'asst_CfpSBa7E3rqGcOAVsSDTheiy'},
             headers={
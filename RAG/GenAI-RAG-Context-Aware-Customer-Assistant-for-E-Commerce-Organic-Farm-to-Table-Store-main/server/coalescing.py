@@ -0,0 +1,77 @@
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and spacing differences don't change the question."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", question.lower())).strip()
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    The first caller for a key runs the call in its own thread, so it waits no longer than
+    it would have without coalescing. Callers that arrive with the same key while that call
+    is running wait for it and get the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.max_in_flight = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(result, shared): shared is True when the result came from another caller's call."""
+        with self._lock:
+            self.requests += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self._waiters[key] = 0
+                self.executed += 1
+                self.max_in_flight = max(self.max_in_flight, len(self._in_flight))
+            else:
+                self.coalesced += 1
+                self._waiters[key] += 1
+                self.max_waiters = max(self.max_waiters, self._waiters[key])
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = call()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result, False
+
+    def _finish(self, key: Hashable) -> None:
+        # Callers arriving from here on start a fresh call; the waiters already holding the future still get its result
+        with self._lock:
+            del self._in_flight[key]
+            del self._waiters[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / self.requests if self.requests else 0.0,
+                "in_flight": len(self._in_flight),
+                "max_in_flight": self.max_in_flight,
+                "max_waiters": self.max_waiters,
+            }
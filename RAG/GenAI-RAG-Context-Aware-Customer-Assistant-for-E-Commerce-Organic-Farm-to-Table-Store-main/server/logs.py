@@ -0,0 +1,139 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+DEFAULT_LEVELS = {
+    "openai": "WARNING",
+    "urllib3": "WARNING",
+    "chromadb": "WARNING",
+    "werkzeug": "INFO",
+}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the logging thread without formatting them, and drops them rather than
+    blocking the request when the queue is full.
+
+    Messages and payloads are formatted later, on the logging thread, so log a snapshot of
+    anything the request goes on to change.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class PayloadSampler(logging.Filter):
+    """Keeps a fraction of the records that carry a payload (logged with extra={"payload": ...});
+    plain messages always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "payload") or random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, thread, message, and the payload and
+    exception when there are any. Messages and payloads longer than max_chars are cut."""
+
+    def __init__(self, max_chars: int = 2000):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": _truncate(record.getMessage(), self.max_chars),
+        }
+        if hasattr(record, "payload"):
+            payload = json.dumps(record.payload, default=str)
+            # Small payloads keep their structure; large ones become a cut-off string
+            entry["payload"] = record.payload if len(payload) <= self.max_chars else _truncate(payload, self.max_chars)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(config: dict) -> QueueListener:
+    """Route every logger through a queue to a background thread that writes JSON lines.
+
+    config is the "logging" section of config.json: the root "level", per-logger levels under
+    "loggers", the "file" to write to (stderr when unset), "queue_size", "payload_sample_rate" and
+    "max_payload_chars". Calling it again replaces the previous setup.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=config.get("queue_size", 10000))
+    output = logging.FileHandler(config["file"]) if config.get("file") else logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter(config.get("max_payload_chars", 2000)))
+
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(PayloadSampler(config.get("payload_sample_rate", 0.01)))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(config.get("level", "INFO"))
+    for name, level in {**DEFAULT_LEVELS, **config.get("loggers", {})}.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Write out whatever is still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, int]:
+    if _queue_handler is None:
+        return {"dropped": 0, "sampled_out": 0, "queued": 0}
+    sampler = next((f for f in _queue_handler.filters if isinstance(f, PayloadSampler)), None)
+    return {
+        "dropped": _queue_handler.dropped,
+        "sampled_out": sampler.sampled_out if sampler else 0,
+        "queued": _queue_handler.queue.qsize(),
+    }
+
+
+atexit.register(stop_logging)
@@ -1,6 +1,12 @@
+import os
+import threading
+from collections import OrderedDict
+
 import chromadb
+import openai
 from chromadb.config import Settings
 from langchain.embeddings import OpenAIEmbeddings
+from langchain.embeddings.base import Embeddings
 from langchain.vectorstores import Chroma
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import ConversationalRetrievalChain, LLMChain
@@ -8,22 +14,76 @@ from langchain.chains.question_answering import load_qa_chain
 from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from typing import Dict, Any 
+from langchain.schema import Document
+from typing import Dict, Any, List, Optional
 import logging
+from llm_client import requests_session
+from .vector_store import QuantizedVectorStore
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 class CustomConversationBufferMemory(ConversationBufferMemory):
     def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
         # Only save the 'answer' part of the output
         super().save_context(inputs, {"response": outputs["answer"]})
 
+class QueryEmbeddingCache(Embeddings):
+    """Remembers recent query embeddings, so the router's retrieval probe and the chain's own
+    retrieval of the same question embed it once."""
+
+    def __init__(self, embeddings: Embeddings, size: int = 256):
+        self.embeddings = embeddings
+        self.size = size
+        self._lock = threading.Lock()
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+                return vector
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._vectors[text] = vector
+            if len(self._vectors) > self.size:
+                self._vectors.popitem(last=False)
+        return vector
+
+class SerializedChroma(Chroma):
+    """Chroma whose searches take turns. The duckdb+parquet backend runs every query on one DuckDB
+    connection, which fails when Flask's request threads search at the same time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._query_lock = threading.Lock()
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        # Embed outside the lock; with QueryEmbeddingCache the search below finds the vector cached
+        self._embedding_function.embed_query(query)
+        with self._query_lock:
+            return super().similarity_search_with_score(query, k, filter=filter, **kwargs)
+
+class ContextRetrievalChain(ConversationalRetrievalChain):
+    """Answers from the documents passed as "context_documents" when there are any (internet mode
+    gathers local and web results itself), and retrieves as usual otherwise."""
+
+    def _get_docs(self, question: str, inputs: Dict[str, Any]) -> List[Document]:
+        documents = inputs.get("context_documents")
+        if documents is None:
+            return super()._get_docs(question, inputs)
+        return documents
+
 class RAGChatbot:
-    def __init__(self, openai_api_key, collection_name, persist_directory, system_prompt_file):
+    def __init__(self, openai_api_key, collection_name, persist_directory, system_prompt_file, vector_store=None):
         self.openai_api_key = openai_api_key
         self.collection_name = collection_name
         self.persist_directory = persist_directory
+        # The "vector_store" section of config.json; Chroma unless it names a quantized mode
+        self.vector_store_config = vector_store or {}
         self.load_system_prompt(system_prompt_file)
         self.setup_langchain()
 
@@ -31,42 +91,60 @@ class RAGChatbot:
         try:
             with open(system_prompt_file, 'r') as file:
                 self.system_prompt = file.read().strip()
-            logging.info(f"System prompt loaded from {system_prompt_file}")
+            logger.info(f"System prompt loaded from {system_prompt_file}")
         except FileNotFoundError:
-            logging.error(f"System prompt file not found: {system_prompt_file}")
+            logger.error(f"System prompt file not found: {system_prompt_file}")
             self.system_prompt = "You are a helpful assistant."
 
     def setup_langchain(self):
         try:
+            # Route the openai SDK (and so every LangChain call) through the shared, metered session
+            openai.requestssession = requests_session()
+
             # Initialize the embedding model
             self.embedding_function = OpenAIEmbeddings(openai_api_key=self.openai_api_key)
-            logging.info("Embedding function initialized.")
-
-            # Initialize Chroma client
-            self.chroma_client = chromadb.Client(Settings(
-                chroma_db_impl="duckdb+parquet",
-                persist_directory=self.persist_directory
-            ))
-            logging.info("Chroma client initialized.")
-
-            # Get or create collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name=self.collection_name,
-                embedding_function=self.embedding_function.embed_documents
-            )
-            logging.info("Collection initialized or retrieved.")
+            logger.info("Embedding function initialized.")
 
-            # Initialize Chroma with the embedding function and existing collection
-            self.vectorstore = Chroma(
-                client=self.chroma_client,
-                collection_name=self.collection_name,
-                embedding_function=self.embedding_function,
-            )
-            logging.info("Vectorstore initialized.")
+            store_mode = self.vector_store_config.get("mode", "chroma")
+            if store_mode == "chroma":
+                # Initialize Chroma client
+                self.chroma_client = chromadb.Client(Settings(
+                    chroma_db_impl="duckdb+parquet",
+                    persist_directory=self.persist_directory
+                ))
+                logger.info("Chroma client initialized.")
+
+                # Get or create collection
+                self.collection = self.chroma_client.get_or_create_collection(
+                    name=self.collection_name,
+                    embedding_function=self.embedding_function.embed_documents
+                )
+                logger.info("Collection initialized or retrieved.")
+
+                # Initialize Chroma with the embedding function and existing collection
+                self.vectorstore = SerializedChroma(
+                    client=self.chroma_client,
+                    collection_name=self.collection_name,
+                    embedding_function=QueryEmbeddingCache(self.embedding_function),
+                )
+            else:
+                # Quantized codes in array files; switching between quantized modes re-encodes the
+                # stored float32 vectors, switching from Chroma means running populate_db.py again
+                self.chroma_client = self.collection = None
+                self.vectorstore = QuantizedVectorStore(
+                    os.path.join(self.persist_directory, f"{self.collection_name}.vectors"),
+                    QueryEmbeddingCache(self.embedding_function),
+                    mode=store_mode,
+                    pca_dim=self.vector_store_config.get("pca_dim"),
+                    rescore=self.vector_store_config.get("rescore", True),
+                    oversample=self.vector_store_config.get("oversample", 4),
+                )
+            logger.info("Vectorstore initialized (%s).", store_mode)
 
             # Initialize ChatOpenAI
             self.llm = ChatOpenAI(temperature=0.7, openai_api_key=self.openai_api_key)
-            logging.info("ChatOpenAI initialized.")
+            logger.info("ChatOpenAI initialized.")
+            self.llms = {}
 
             # Initialize custom ConversationBufferMemory
             self.memory = CustomConversationBufferMemory(
@@ -74,10 +152,10 @@ class RAGChatbot:
                 input_key="question",
                 return_messages=True
             )
-            logging.info("CustomConversationBufferMemory initialized.")
+            logger.info("CustomConversationBufferMemory initialized.")
 
             # Create a custom prompt
-            custom_prompt = PromptTemplate(
+            self.custom_prompt = PromptTemplate(
                 template="""
                 System: {system_prompt}
 
@@ -93,26 +171,58 @@ class RAGChatbot:
                 input_variables=["system_prompt", "chat_history", "question", "context"]
             )
 
+            # One chain per model the router picks, all sharing the retriever and the memory
+            self._chains_lock = threading.Lock()
+            self.qa_chains = {}
+            self.qa_chain = self.chain_for(None)
+            logger.info("Custom ConversationalRetrievalChain initialized successfully.")
+        except Exception as e:
+            logger.error(f"Error in setup_langchain: {e}", exc_info=True)
+            raise
+
+    def chain_for(self, model: Optional[str]) -> ConversationalRetrievalChain:
+        """The chain answering with the given model; None is ChatOpenAI's default model."""
+        with self._chains_lock:
+            chain = self.qa_chains.get(model)
+            if chain is not None:
+                return chain
+            llm = self.llm if model is None else ChatOpenAI(
+                model_name=model, temperature=0.7, openai_api_key=self.openai_api_key)
+
             # Create the question generator and QA chains
-            question_generator = LLMChain(llm=self.llm, prompt=CONDENSE_QUESTION_PROMPT)
-            doc_chain = load_qa_chain(self.llm, chain_type="stuff", prompt=custom_prompt)
+            question_generator = LLMChain(llm=llm, prompt=CONDENSE_QUESTION_PROMPT)
+            doc_chain = load_qa_chain(llm, chain_type="stuff", prompt=self.custom_prompt)
 
-            # Create the final chain
-            self.qa_chain = ConversationalRetrievalChain(
+            # Create the final chain. The memory is read and written by query(), not by the chain,
+            # so a hedged call that runs twice records the turn once
+            chain = self.qa_chains[model] = ContextRetrievalChain(
                 retriever=self.vectorstore.as_retriever(),
                 combine_docs_chain=doc_chain,
                 question_generator=question_generator,
                 return_source_documents=True,
-                memory=self.memory
             )
-            logging.info("Custom ConversationalRetrievalChain initialized successfully.")
-        except Exception as e:
-            logging.error(f"Error in setup_langchain: {e}", exc_info=True)
-            raise
+            return chain
+
+    def retrieve(self, question: str, k: int = 4) -> List[Document]:
+        return self.vectorstore.similarity_search(question, k=k)
+
+    def count_tokens(self, text: str) -> int:
+        return self.llm.get_num_tokens(text)
+
+    def retrieval_similarity(self, question: str) -> Optional[float]:
+        """Cosine similarity of the closest stored document, None when the collection is empty."""
+        results = self.vectorstore.similarity_search_with_score(question, k=1)
+        if not results:
+            return None
+        # Both stores return squared L2 distances; for unit-length embeddings (OpenAI's are) that is 2 - 2 * cosine
+        return 1 - results[0][1] / 2
 
     def clear_collection(self):
-        self.collection.delete(where={})
-        logging.info("Collection cleared.")
+        if self.collection is None:
+            self.vectorstore.delete_all()
+        else:
+            self.collection.delete(where={})
+        logger.info("Collection cleared.")
 
     def add_or_update_documents(self, documents):
         texts = [doc["text"] for doc in documents]
@@ -123,6 +233,9 @@ class RAGChatbot:
         embeddings = self.embedding_function.embed_documents(texts)
         
         # Add documents to the collection
+        if self.collection is None:
+            self.vectorstore.add_texts(texts, metadatas, ids=ids, embeddings=embeddings)
+            return
         self.collection.add(
             documents=texts,
             metadatas=metadatas,
@@ -130,50 +243,55 @@ class RAGChatbot:
             embeddings=embeddings
         )
 
-    def query(self, user_message):
+    def is_greeting(self, user_message):
         # List of common greetings
         greetings = ["hi", "hello", "hey", "greetings", "good morning", "good afternoon", "good evening"]
-        
+        return any(greet in user_message.lower().strip() for greet in greetings)
+
+    def query(self, user_message, model=None, run=None, documents=None):
+        """Answer with the chain for model. run, when given, makes the chain call (the router uses it to hedge);
+        documents, when given, are the context instead of what the chain would retrieve."""
         # Log the incoming user message
-        logging.debug(f"Received user message: {user_message}")
+        logger.debug("Received user message: %s", user_message)
         
         # Check if the user message is a greeting
-        if any(greet in user_message.lower().strip() for greet in greetings):
-            logging.debug("Recognized as a greeting message.")
+        if self.is_greeting(user_message):
+            logger.debug("Recognized as a greeting message.")
             return self.greet(), []
 
-        logging.debug("Not a greeting message, proceeding with qa_chain.")
+        logger.debug("Not a greeting message, proceeding with qa_chain.")
         
         try:
             # Prepare inputs for the qa_chain
             inputs = {
                 "question": user_message,
-                "chat_history": [],  # implement chat history if needed
-                "system_prompt": self.system_prompt  # Include the system prompt
+                "chat_history": list(self.memory.load_memory_variables({})["chat_history"]),
+                "system_prompt": self.system_prompt,  # Include the system prompt
+                "context_documents": documents,
 
             }
 
             # Log the inputs to the qa_chain
-            logging.debug(f"Inputs to qa_chain: {inputs}")
+            logger.debug("Inputs to qa_chain", extra={"payload": inputs})
 
             # Ensure qa_chain is called and response is received
-            response = self.qa_chain(inputs)
-            logging.debug(f"Response from qa_chain: {response}")
+            chain = self.chain_for(model)
+            response = run(lambda: chain(inputs)) if run else chain(inputs)
+            logger.debug("Response from qa_chain", extra={"payload": response})
             
             # Extract answer and source documents from response
             answer = response.get('answer', 'No answer found')
             source_documents = response.get('source_documents', [])
             
             # Log the response from the qa_chain
-            logging.debug(f"Answer from qa_chain: {answer}")
+            logger.debug("Answer from qa_chain: %s", answer)
             
             # Log the source documents
-            for i, doc in enumerate(source_documents):
-                source = doc.metadata.get('source', 'unknown')
-                content = doc.page_content[:100]  # First 100 characters
-                logging.info(f"Document {i+1}:")
-                logging.info(f"  Source: {source}")
-                logging.info(f"  Content preview: {content}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Source documents", extra={"payload": [
+                    {"source": doc.metadata.get('source', 'unknown'), "preview": doc.page_content[:100]}
+                    for doc in source_documents
+                ]})
             
             # Update memory
             self.memory.chat_memory.add_user_message(user_message)
@@ -181,12 +299,12 @@ class RAGChatbot:
 
             return answer, source_documents
         except Exception as e:
-            logging.error(f"Error in qa_chain processing: {e}", exc_info=True)
+            logger.error(f"Error in qa_chain processing: {e}", exc_info=True)
             return "There was an error processing your request.", []
     
 
     def get_all_documents(self):
-        results = self.collection.get()
+        results = self.vectorstore.get() if self.collection is None else self.collection.get()
         documents = []
         for i in range(len(results['ids'])):
             documents.append({
@@ -200,7 +318,8 @@ class RAGChatbot:
         texts = [doc["text"] for doc in documents]
         metadatas = [{"source": doc["source"]} for doc in documents]
         self.vectorstore.add_texts(texts=texts, metadatas=metadatas)
-        self.chroma_client.persist()
+        if self.chroma_client is not None:
+            self.chroma_client.persist()
 
     def greet(self):
         return ("Hello! Welcome to Desi Bazar Agro Ltd - your trusted local farm-to-table organic food producer! I am a GPT-based AI with custom knowledge about this business. "
@@ -0,0 +1,239 @@
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from langchain.callbacks import get_openai_callback
+
+# Questions that ask the model to reason, weigh options or plan, rather than look something up
+_HARD_INTENT = re.compile(
+    r"\b(why|explain|compare|comparison|differences?|versus|vs|recommend\w*|suggest\w*|plan|should|"
+    r"pros and cons|better|best|calculate|step by step)\b",
+    re.IGNORECASE,
+)
+
+DEFAULT_ROUTES = {
+    "small": {"model": "gpt-4o-mini", "input_cost_per_1k": 0.00015, "output_cost_per_1k": 0.0006},
+    "large": {"model": "gpt-4o", "input_cost_per_1k": 0.0025, "output_cost_per_1k": 0.01},
+}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class Route:
+    name: str
+    model: Optional[str]
+    input_cost_per_1k: float = 0.0
+    output_cost_per_1k: float = 0.0
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.input_cost_per_1k + completion_tokens * self.output_cost_per_1k) / 1000
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    model: Optional[str]
+    reasons: List[str] = field(default_factory=list)
+    similarity: Optional[float] = None
+
+
+class RouteStats:
+    """Latency, hedging and spend for one route. Both attempts of a hedged request are paid for."""
+
+    def __init__(self, window: int):
+        self.lock = threading.Lock()
+        self.latencies: Deque[float] = deque(maxlen=window)          # per request, as the user saw it
+        self.attempt_latencies: Deque[float] = deque(maxlen=window)  # per model call; the hedge delay comes from these
+        self.requests = 0
+        self.errors = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+
+class ModelRouter:
+    """Sends easy questions to a small, fast model and hard ones to a larger model.
+
+    The decision is local and cheap: question length, how many questions are asked at once,
+    whether the wording asks for reasoning (compare, explain, recommend, ...), and how close the
+    best document in the knowledge base is. A weak match means the answer has to come from the
+    model rather than the context, so it goes to the large model too.
+
+    Requests can be hedged: when a call has not returned after the route's p95 latency, a second
+    identical call is sent and whichever finishes first is used. The call must be free of side
+    effects, since the slower one still runs to completion.
+    """
+
+    def __init__(self, config: dict, retrieval_similarity: Callable[[str], Optional[float]]):
+        self.enabled = config.get("enabled", True)
+        self.routes = {
+            name: Route(name, **{**defaults, **config.get(name, {})}) for name, defaults in DEFAULT_ROUTES.items()
+        }
+        self.max_easy_words = config.get("max_easy_words", 25)
+        self.min_retrieval_similarity = config.get("min_retrieval_similarity", 0.78)
+        self.retrieval_similarity = retrieval_similarity
+
+        hedge = config.get("hedge", {})
+        self.hedge_enabled = hedge.get("enabled", True)
+        self.hedge_percentile = hedge.get("percentile", 0.95)
+        self.hedge_min_samples = hedge.get("min_samples", 20)
+        # Used until a route has seen min_samples calls; null disables hedging until then
+        self.hedge_initial_delay = hedge.get("initial_delay_seconds", 10.0)
+        self.window = config.get("latency_window", 500)
+        self._pool = ThreadPoolExecutor(max_workers=hedge.get("max_workers", 64), thread_name_prefix="hedge")
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, RouteStats] = {}
+
+    def route(self, name: str, model: Optional[str]) -> Route:
+        route = self.routes.get(name)
+        return route if route is not None else Route(name, model)
+
+    def classify(self, question: str, requested_model: Optional[str] = None) -> RouteDecision:
+        if not self.enabled:
+            # The model the client picked, or the chain's default when it did not pick one
+            return RouteDecision("client", requested_model, ["routing disabled"])
+
+        reasons = []
+        if len(question.split()) > self.max_easy_words:
+            reasons.append("long question")
+        if question.count("?") > 1:
+            reasons.append("several questions")
+        intent = _HARD_INTENT.search(question)
+        if intent:
+            reasons.append(f"intent: {intent.group(0).lower()}")
+        # Only worth an embedding when nothing above has decided already
+        similarity = None
+        if not reasons:
+            similarity = self.retrieval_similarity(question)
+            if similarity is None or similarity < self.min_retrieval_similarity:
+                reasons.append("weak retrieval")
+
+        route = self.routes["large" if reasons else "small"]
+        return RouteDecision(route.name, route.model, reasons, similarity)
+
+    def _route_stats(self, name: str) -> RouteStats:
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = RouteStats(self.window)
+            return stats
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        stats = self._route_stats(name)
+        with stats.lock:
+            if len(stats.attempt_latencies) < self.hedge_min_samples:
+                return self.hedge_initial_delay
+            return _percentile(list(stats.attempt_latencies), self.hedge_percentile)
+
+    def record(self, decision: RouteDecision, prompt_tokens: int, completion_tokens: int,
+               seconds: Optional[float] = None, fallback: bool = False) -> None:
+        """Counts the tokens and spend of a model call; calls made outside run(), such as the
+        backend's fallback completion, pass no seconds so they stay out of the hedge delay."""
+        stats = self._route_stats(decision.route)
+        route = self.route(decision.route, decision.model)
+        with stats.lock:
+            stats.fallbacks += fallback
+            if seconds is not None:
+                stats.attempt_latencies.append(seconds)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += route.cost(prompt_tokens, completion_tokens)
+
+    def _attempt(self, decision: RouteDecision, call: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        with get_openai_callback() as usage:
+            try:
+                result = call()
+            except Exception:
+                # Failures are still paid for, but how fast they fail says nothing about the p95
+                self.record(decision, usage.prompt_tokens, usage.completion_tokens)
+                raise
+        self.record(decision, usage.prompt_tokens, usage.completion_tokens, time.perf_counter() - started)
+        return result
+
+    def run(self, decision: RouteDecision, call: Callable[[], Any]) -> Any:
+        """Run call() for the routed request, hedging it once it is slower than the route's p95."""
+        stats = self._route_stats(decision.route)
+        started = time.perf_counter()
+        try:
+            delay = self.hedge_delay(decision.route)
+            if delay is None:
+                result = self._attempt(decision, call)
+            else:
+                result = self._hedged(decision, call, delay, stats)
+        except Exception:
+            with stats.lock:
+                stats.requests += 1
+                stats.errors += 1
+            raise
+        with stats.lock:
+            stats.requests += 1
+            stats.latencies.append(time.perf_counter() - started)
+        return result
+
+    def _hedged(self, decision: RouteDecision, call: Callable[[], Any], delay: float, stats: RouteStats) -> Any:
+        primary = self._pool.submit(self._attempt, decision, call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        backup = self._pool.submit(self._attempt, decision, call)
+        with stats.lock:
+            stats.hedged += 1
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in done if future.exception() is None]
+            # A failed attempt only counts when the other one has failed as well
+            if succeeded or not pending:
+                future = succeeded[0] if succeeded else done.pop()
+                if future is backup and succeeded:
+                    with stats.lock:
+                        stats.hedge_wins += 1
+                return future.result()
+
+    def runner(self, decision: RouteDecision) -> Callable[[Callable[[], Any]], Any]:
+        return lambda call: self.run(decision, call)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            routes = dict(self._stats)
+        report = {"enabled": self.enabled, "routes": {}}
+        for name, stats in routes.items():
+            route = self.routes.get(name)
+            with stats.lock:
+                latencies = list(stats.latencies)
+                report["routes"][name] = {
+                    "model": route.model if route else None,
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "hedged": stats.hedged,
+                    "hedge_wins": stats.hedge_wins,
+                    "fallbacks": stats.fallbacks,
+                    "mean_latency": statistics.mean(latencies) if latencies else 0.0,
+                    "p50_latency": _percentile(latencies, 0.50),
+                    "p95_latency": _percentile(latencies, 0.95),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost_usd": round(stats.cost, 6),
+                    "cost_per_request_usd": round(stats.cost / stats.requests, 6) if stats.requests else 0.0,
+                }
+            report["routes"][name]["hedge_delay"] = self.hedge_delay(name)
+        return report
@@ -0,0 +1,437 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from langchain.vectorstores.base import VectorStore
+
+logger = logging.getLogger(__name__)
+
+MODES = ("float32", "float16", "int8")
+# Rows decoded to float32 at a time while scanning: a block that stays in cache is two to three times
+# faster than large ones, and a query never holds a float32 copy of the whole index
+SCAN_ROWS = 1024
+# PCA and the int8 scales are fitted on at most this many vectors
+CALIBRATION_SAMPLE = 20000
+# Codes are rebuilt with a fresh calibration once the index has grown this much since the last one
+RECALIBRATE_GROWTH = 2.0
+
+REPORT_SETTINGS = [
+    ("float32", None), ("float16", None), ("int8", None),
+    ("float16", 256), ("int8", 256), ("int8", 128),
+]
+
+
+class QuantizedIndex:
+    """Embeddings in flat array files, searched through compact codes and rescored exactly.
+
+    The directory holds the float32 vectors (full.f32) and their squared norms (norms.f32), both
+    append-only, and the codes the search scans (codes.<mode>): the vectors centred, optionally
+    projected onto their top pca_dim principal components, and stored as float16 or as int8 with
+    one scale per dimension. Only the codes and norms are loaded into memory; the float32 file is
+    memory-mapped, and a search reads just the rows of its oversample * k best candidates from it
+    to rank them exactly.
+
+    The codes are derived from full.f32, so they are brought up to date on the next search after
+    vectors are added, and rebuilt from scratch when the mode or pca_dim changes or the index has
+    doubled since the PCA and scales were fitted.
+    """
+
+    def __init__(self, path: str, mode: str = "int8", pca_dim: Optional[int] = None,
+                 rescore: bool = True, oversample: int = 4):
+        if mode not in MODES:
+            raise ValueError(f"Unknown embedding store mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.pca_dim = pca_dim
+        self.rescore = rescore
+        self.oversample = oversample
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.count = 0
+        meta = self._file("index.json")
+        if os.path.exists(meta):
+            with open(meta) as f:
+                stored = json.load(f)
+            self.dim, self.count = stored["dim"], stored["count"]
+            # Rows past the recorded count are from an add that did not finish
+            self._truncate("full.f32", self.count * self.dim * 4)
+            self._truncate("norms.f32", self.count * 4)
+
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self._calibrated_count = 0
+        self._codes: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        self._load_calibration()
+        if self.count:
+            with self._lock:
+                self._refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _truncate(self, name: str, size: int) -> None:
+        path = self._file(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    @property
+    def _codes_file(self) -> str:
+        return self._file(f"codes.{self.mode}")
+
+    @property
+    def _code_dtype(self) -> np.dtype:
+        return np.dtype(self.mode)
+
+    @property
+    def code_dim(self) -> int:
+        return self.pca_dim or self.dim
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, vectors: Sequence[Sequence[float]]) -> None:
+        """Append vectors; they are searchable once the codes catch up on the next search."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return
+        with self._lock:
+            if self.dim is None:
+                if self.pca_dim is not None and self.pca_dim >= vectors.shape[1]:
+                    raise ValueError(f"pca_dim {self.pca_dim} must be smaller than the embedding size {vectors.shape[1]}")
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embeddings have {vectors.shape[1]} dimensions, the index has {self.dim}")
+            with open(self._file("full.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._file("norms.f32"), "ab") as f:
+                f.write(np.einsum("ij,ij->i", vectors, vectors).astype(np.float32).tobytes())
+            self.count += len(vectors)
+            self._write_json("index.json", {"dim": self.dim, "count": self.count})
+            self._full = None
+
+    def _write_json(self, name: str, value: Dict[str, Any]) -> None:
+        # Written last and replaced atomically: the count in index.json is what a reopened index trusts
+        temporary = self._file(name + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(value, f)
+        os.replace(temporary, self._file(name))
+
+    def _load_calibration(self) -> None:
+        path = self._file("calibration.npz")
+        if not os.path.exists(path):
+            return
+        with np.load(path) as stored:
+            if str(stored["mode"]) != self.mode or int(stored["pca_dim"]) != (self.pca_dim or 0):
+                return  # fitted for other settings; _refresh rebuilds the codes
+            self._mean = stored["mean"]
+            self._components = stored["components"] if self.pca_dim else None
+            self._scale = stored["scale"] if self.mode == "int8" else None
+            self._calibrated_count = int(stored["count"])
+
+    def _calibrate(self, full: np.ndarray) -> None:
+        if len(full) > CALIBRATION_SAMPLE:
+            rows = np.sort(np.random.default_rng(0).choice(len(full), CALIBRATION_SAMPLE, replace=False))
+            sample = np.asarray(full[rows], dtype=np.float64)
+        else:
+            sample = np.asarray(full, dtype=np.float64)
+        self._mean = sample.mean(axis=0).astype(np.float32)
+        centred = sample - self._mean
+        self._components = None
+        if self.pca_dim:
+            # Top eigenvectors of the covariance: a dim x dim problem however large the corpus is
+            _, eigenvectors = np.linalg.eigh(centred.T @ centred)
+            self._components = np.ascontiguousarray(eigenvectors[:, ::-1][:, :self.pca_dim].T, dtype=np.float32)
+        self._scale = None
+        if self.mode == "int8":
+            projected = centred @ self._components.T if self._components is not None else centred
+            self._scale = np.maximum(np.abs(projected).max(axis=0), 1e-12).astype(np.float32)
+        self._calibrated_count = len(full)
+        np.savez(self._file("calibration.npz"), mode=self.mode, pca_dim=self.pca_dim or 0,
+                 count=self._calibrated_count, mean=self._mean,
+                 components=self._components if self._components is not None else np.zeros(0, np.float32),
+                 scale=self._scale if self._scale is not None else np.zeros(0, np.float32))
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        projected = np.asarray(vectors, dtype=np.float32) - self._mean
+        if self._components is not None:
+            projected = projected @ self._components.T
+        if self.mode == "int8":
+            return np.clip(np.rint(projected / self._scale * 127), -127, 127).astype(np.int8)
+        return projected.astype(self._code_dtype)
+
+    def _stored_codes(self) -> int:
+        path = self._codes_file
+        if self._mean is None or not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // (self.code_dim * self._code_dtype.itemsize)
+
+    def _refresh(self) -> None:
+        """Bring codes.<mode> up to date with full.f32 and load it. Called with the lock held."""
+        full = np.memmap(self._file("full.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        encoded = self._stored_codes()
+        if self._mean is None or self.count >= RECALIBRATE_GROWTH * self._calibrated_count or encoded > self.count:
+            started = time.perf_counter()
+            self._calibrate(full)
+            temporary = self._codes_file + ".tmp"
+            with open(temporary, "wb") as f:
+                for start in range(0, self.count, SCAN_ROWS):
+                    f.write(self._encode(full[start:start + SCAN_ROWS]).tobytes())
+            os.replace(temporary, self._codes_file)
+            for mode in MODES:
+                if mode != self.mode and os.path.exists(self._file(f"codes.{mode}")):
+                    os.remove(self._file(f"codes.{mode}"))  # left from before a mode change
+            logger.info("Encoded %d embeddings as %s%s in %.2fs", self.count, self.mode,
+                        f" (PCA {self.pca_dim})" if self.pca_dim else "", time.perf_counter() - started)
+        elif encoded < self.count:
+            self._truncate(f"codes.{self.mode}", encoded * self.code_dim * self._code_dtype.itemsize)
+            with open(self._codes_file, "ab") as f:
+                for start in range(encoded, self.count, SCAN_ROWS):
+                    f.write(self._encode(full[start:min(start + SCAN_ROWS, self.count)]).tobytes())
+
+        self._codes = np.fromfile(self._codes_file, dtype=self._code_dtype).reshape(self.count, self.code_dim)
+        self._norms = np.fromfile(self._file("norms.f32"), dtype=np.float32, count=self.count)
+        self._full = full
+
+    def _snapshot(self) -> tuple:
+        with self._lock:
+            if self.count and (self._full is None or self._codes is None or len(self._codes) != self.count):
+                self._refresh()
+            return self.count, self._codes, self._norms, self._full, self._mean, self._components, self._scale
+
+    def search(self, query: Sequence[float], k: int = 4,
+               rescore: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers of the k nearest vectors and their squared L2 distances, nearest first.
+
+        Chroma's default space is squared L2 as well, so scores mean the same with either store."""
+        count, codes, norms, full, mean, components, scale = self._snapshot()
+        if not count:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rescore = self.rescore if rescore is None else rescore
+        q = np.asarray(query, dtype=np.float32)
+
+        # q.v = q.mean + (C q).z for the centred, projected code z of v; scaled for int8
+        weights = components @ q if components is not None else q
+        if scale is not None:
+            weights = weights * scale / 127
+        dots = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCAN_ROWS):
+            dots[start:start + SCAN_ROWS] = codes[start:start + SCAN_ROWS].astype(np.float32, copy=False) @ weights
+        dots += float(q @ mean)
+
+        # Nearest in L2 is largest q.v - |v|^2 / 2
+        candidates = min(count, k * self.oversample if rescore else k)
+        ranking = dots - norms / 2
+        rows = np.argpartition(-ranking, candidates - 1)[:candidates] if candidates < count else np.arange(count)
+        if rescore:
+            rows = np.sort(rows)  # reads the memory-mapped rows in file order
+            candidate_dots = np.asarray(full[rows]) @ q
+        else:
+            candidate_dots = dots[rows]
+        distances = np.maximum(float(q @ q) + norms[rows] - 2 * candidate_dots, 0)
+        order = np.argsort(distances, kind="stable")[:k]
+        return rows[order], distances[order]
+
+    def vectors(self) -> np.ndarray:
+        """All stored vectors at full precision, memory-mapped."""
+        if not self.count:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self._file("full.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+    def memory(self) -> Dict[str, int]:
+        """Bytes held in memory for searching (codes, norms, calibration) and on disk."""
+        count, codes, norms, _, mean, components, scale = self._snapshot()
+        ram = sum(array.nbytes for array in (codes, norms, mean, components, scale) if array is not None)
+        disk = sum(os.path.getsize(self._file(name)) for name in os.listdir(self.path))
+        return {"vectors": count, "ram_bytes": ram, "disk_bytes": disk}
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in os.listdir(self.path):
+                if name.startswith(("full.", "norms.", "codes.", "calibration.", "index.")):
+                    os.remove(self._file(name))
+            self.dim, self.count = None, 0
+            self._mean = self._components = self._scale = None
+            self._codes = self._norms = self._full = None
+            self._calibrated_count = 0
+
+
+class QuantizedVectorStore(VectorStore):
+    """A LangChain vector store on a QuantizedIndex, with the texts and metadata in documents.jsonl
+    next to it. Scores are squared L2 distances, as from Chroma, so it can replace Chroma under the
+    retriever unchanged. Ids that are already stored are skipped when added again."""
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings, mode: str = "int8",
+                 pca_dim: Optional[int] = None, rescore: bool = True, oversample: int = 4):
+        self._embedding_function = embedding_function
+        self.index = QuantizedIndex(persist_directory, mode, pca_dim, rescore, oversample)
+        self._documents_file = os.path.join(persist_directory, "documents.jsonl")
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        if os.path.exists(self._documents_file):
+            with open(self._documents_file) as f:
+                lines = f.readlines()
+            if len(lines) < len(self.index):
+                raise ValueError(f"{self._documents_file} has {len(lines)} documents, the index has {len(self.index)}")
+            for line in lines[:len(self.index)]:
+                entry = json.loads(line)
+                self._ids.append(entry["id"])
+                self._texts.append(entry["text"])
+                self._metadatas.append(entry["metadata"])
+            if len(lines) > len(self.index):
+                # Written by an add whose vectors never made it into the index
+                with open(self._documents_file, "w") as f:
+                    f.writelines(lines[:len(self.index)])
+        self._positions = {id_: i for i, id_ in enumerate(self._ids)}
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, embeddings: Optional[List[List[float]]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        # Embed outside the lock, so searches are not held up by the embeddings request
+        if embeddings is None:
+            embeddings = self._embedding_function.embed_documents(texts)
+        with self._lock:
+            new = [i for i, id_ in enumerate(ids) if id_ not in self._positions]
+            if len(new) < len(ids):
+                logger.debug("Skipping %d documents that are already stored", len(ids) - len(new))
+            if not new:
+                return ids
+            with open(self._documents_file, "a") as f:
+                for i in new:
+                    f.write(json.dumps({"id": ids[i], "text": texts[i], "metadata": metadatas[i]}) + "\n")
+            self.index.add([embeddings[i] for i in new])
+            for i in new:
+                self._positions[ids[i]] = len(self._ids)
+                self._ids.append(ids[i])
+                self._texts.append(texts[i])
+                self._metadatas.append(metadatas[i])
+        return ids
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        rows, distances = self.index.search(embedding, k)
+        with self._lock:
+            return [(Document(page_content=self._texts[row], metadata=self._metadatas[row]), float(distance))
+                    for row, distance in zip(rows, distances)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding_function.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                 **kwargs: Any) -> List[Tuple[Document, float]]:
+        # Unit-length embeddings: squared L2 distance 0..4 maps to cosine 1..-1
+        return [(doc, 1 - distance / 2) for doc, distance in self.similarity_search_with_score(query, k)]
+
+    def get(self) -> Dict[str, List[Any]]:
+        """Every stored document, shaped like Chroma's collection.get()."""
+        with self._lock:
+            return {"ids": list(self._ids), "documents": list(self._texts), "metadatas": list(self._metadatas)}
+
+    def delete_all(self) -> None:
+        with self._lock:
+            self.index.clear()
+            if os.path.exists(self._documents_file):
+                os.remove(self._documents_file)
+            self._ids, self._texts, self._metadatas = [], [], []
+            self._positions = {}
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   persist_directory: Optional[str] = None, **kwargs: Any) -> "QuantizedVectorStore":
+        if persist_directory is None:
+            raise ValueError("QuantizedVectorStore needs a persist_directory")
+        ids = kwargs.pop("ids", None)
+        store = cls(persist_directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+def _exact_distances(vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Squared L2 distance from every query to every vector, up to each query's own |q|^2."""
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    return np.stack([norms - 2 * (vectors @ q) for q in queries])
+
+
+def _recall(found: np.ndarray, distances: np.ndarray, k: int) -> float:
+    # A hit is any row as close as the exact k-th neighbour, so ties (duplicate chunks) count either way
+    threshold = np.partition(distances, k - 1)[k - 1]
+    return min(int(np.sum(distances[found] <= threshold + 1e-6)), k) / k
+
+
+def _list_bytes(vector: np.ndarray) -> int:
+    """What one embedding costs as a Python list of floats, the way it is handed to Chroma."""
+    values = vector.astype(np.float64).tolist()
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+def evaluate(vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+             settings: Sequence[Tuple[str, Optional[int]]] = REPORT_SETTINGS,
+             oversample: int = 4) -> List[Dict[str, Any]]:
+    """Recall@k against exact search, memory per vector and query time for each (mode, pca_dim)
+    setting, with and without rescoring. The first row is the float64 list baseline."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(vectors))
+    exact = _exact_distances(vectors, queries)
+    rows: List[Dict[str, Any]] = [{
+        "mode": "float64 list", "pca_dim": None, "rescore": None, "recall": 1.0,
+        "ram_bytes_per_vector": _list_bytes(vectors[0]), "disk_bytes_per_vector": None, "query_seconds": None,
+    }]
+    for mode, pca_dim in settings:
+        if pca_dim is not None and pca_dim >= vectors.shape[1]:
+            continue
+        with tempfile.TemporaryDirectory() as path:
+            index = QuantizedIndex(path, mode, pca_dim, oversample=oversample)
+            index.add(vectors)
+            memory = index.memory()
+            for rescore in (False, True):
+                found, started = [], time.perf_counter()
+                for q in queries:
+                    found.append(index.search(q, k, rescore=rescore)[0])
+                seconds = (time.perf_counter() - started) / len(queries)
+                recall = np.mean([_recall(hits, distances, k) for hits, distances in zip(found, exact)])
+                rows.append({
+                    "mode": mode, "pca_dim": pca_dim, "rescore": rescore, "recall": float(recall),
+                    "ram_bytes_per_vector": memory["ram_bytes"] / len(vectors),
+                    "disk_bytes_per_vector": memory["disk_bytes"] / len(vectors),
+                    "query_seconds": seconds,
+                })
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]], k: int) -> str:
+    lines = [f"{'mode':<13} {'pca':>5} {'rescore':>8} {'recall@' + str(k):>10} {'RAM B/vec':>10} "
+             f"{'disk B/vec':>11} {'query ms':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['mode']:<13} {row['pca_dim'] or '-':>5} {'-' if row['rescore'] is None else 'yes' if row['rescore'] else 'no':>8} "
+            f"{row['recall']:>10.3f} {row['ram_bytes_per_vector']:>10.0f} "
+            f"{'-' if row['disk_bytes_per_vector'] is None else format(row['disk_bytes_per_vector'], '.0f'):>11} "
+            f"{'-' if row['query_seconds'] is None else format(row['query_seconds'] * 1000, '.2f'):>9}")
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import requests
+from langchain.schema import Document
+
+from .coalescing import normalize_question
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_URL = 'https://ddg-api.herokuapp.com/search'
+
+
+class WebSearch:
+    """Web search for internet mode: one bounded request per query, and results cached per query.
+
+    Failures and timeouts return no results rather than raising, so a slow or broken search
+    engine costs at most `timeout_seconds` and the answer falls back to local documents.
+    """
+
+    def __init__(self, config: dict, session: requests.Session):
+        self.url = os.getenv("WEB_SEARCH_URL") or config.get("url", DEFAULT_SEARCH_URL)
+        self.limit = config.get("limit", 3)
+        self.timeout = config.get("timeout_seconds", 3.0)
+        self.cache_ttl = config.get("cache_ttl_seconds", 600)
+        self.cache_size = config.get("cache_size", 1024)
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        self._latencies: Deque[float] = deque(maxlen=500)
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    def _cached(self, key: str) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            self.requests += 1
+            entry = self._cache.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.cache_ttl:
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry[1]
+
+    def search(self, query: str) -> List[Dict[str, str]]:
+        """[{'snippet': ..., 'link': ...}, ...] for query, at most `limit` of them."""
+        key = normalize_question(query)
+        results = self._cached(key)
+        if results is not None:
+            return results
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.url, params={'query': query, 'limit': self.limit},
+                                        timeout=self.timeout)
+            response.raise_for_status()
+            results = [{'snippet': result.get('snippet', ''), 'link': result.get('link', '')}
+                       for result in response.json()[:self.limit]]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Web search failed for {query!r}: {e}")
+            with self._lock:
+                self.errors += 1
+            return []
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+            self._cache[key] = (time.monotonic(), results)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "cache_hit_rate": self.cache_hits / self.requests if self.requests else 0.0,
+                "errors": self.errors,
+                "cached_queries": len(self._cache),
+                "mean_latency": statistics.mean(latencies) if latencies else 0.0,
+                "p95_latency": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0,
+            }
+
+
+def web_documents(results: List[Dict[str, str]]) -> List[Document]:
+    return [Document(page_content=f"{result['snippet']}\nURL: {result['link']}", metadata={'source': result['link']})
+            for result in results]
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(normalize_question(text).split())
+
+
+def merge_context(local: List[Document], web: List[Document], count_tokens: Callable[[str], int],
+                  max_tokens: int, max_overlap: float = 0.8) -> List[Document]:
+    """Local documents and web results as one context: alternated by rank so both sources are
+    represented, with near-duplicates dropped and documents that would go over max_tokens left out."""
+    ranked = [doc for pair in zip(local, web) for doc in pair]
+    ranked += local[len(web):] + web[len(local):]
+
+    merged: List[Document] = []
+    seen: List[frozenset] = []
+    tokens = 0
+    for doc in ranked:
+        words = _words(doc.page_content)
+        # Jaccard overlap: a snippet that restates a stored document adds nothing but tokens
+        if not words or any(len(words & other) / len(words | other) >= max_overlap for other in seen):
+            continue
+        size = count_tokens(doc.page_content)
+        if tokens + size > max_tokens:
+            continue
+        merged.append(doc)
+        seen.append(words)
+        tokens += size
+    return merged
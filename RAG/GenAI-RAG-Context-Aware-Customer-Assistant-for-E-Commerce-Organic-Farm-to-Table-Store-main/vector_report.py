@@ -0,0 +1,73 @@
+import os
+import json
+import argparse
+import numpy as np
+from server.rag_chatbot import RAGChatbot
+from server.logs import configure_logging
+from server.vector_store import REPORT_SETTINGS, evaluate, format_report
+from dotenv import load_dotenv
+import logging
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Load configuration
+with open('config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+# Configure logging
+configure_logging(config.get('logging', {}))
+
+# Load API key from environment variable
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+if not OPENAI_API_KEY:
+    raise ValueError("No OpenAI API key found. Please set the OPENAI_API_KEY environment variable.")
+
+def stored_embeddings(chatbot):
+    """The embeddings and texts of every document in the configured store."""
+    if chatbot.collection is None:
+        texts = [doc["content"] for doc in chatbot.get_all_documents()]
+        return np.asarray(chatbot.vectorstore.index.vectors()), texts
+    results = chatbot.collection.get(include=["embeddings", "documents"])
+    return np.asarray(results["embeddings"], dtype=np.float32), results["documents"]
+
+def query_texts(texts, count, words=12, seed=0):
+    # The opening words of random documents: questions whose answer is known to be in the store
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(texts), min(count, len(texts)), replace=False)
+    return [" ".join(texts[i].split()[:words]) for i in picked]
+
+def main(queries=200, k=10, json_path=None):
+    chatbot = RAGChatbot(
+        OPENAI_API_KEY,
+        collection_name=config['chroma_db']['collection_name'],
+        persist_directory=config['chroma_db']['persist_directory'],
+        system_prompt_file=config.get('system_prompt_file', None),
+        vector_store=config.get('vector_store')
+    )
+    vectors, texts = stored_embeddings(chatbot)
+    if not len(vectors):
+        raise SystemExit("The store is empty; run populate_db.py first.")
+    logging.info(f"Evaluating {len(vectors)} stored embeddings of {vectors.shape[1]} dimensions")
+
+    questions = query_texts(texts, queries)
+    query_vectors = np.asarray(chatbot.embedding_function.embed_documents(questions), dtype=np.float32)
+    oversample = (config.get('vector_store') or {}).get('oversample', 4)
+    rows = evaluate(vectors, query_vectors, k, REPORT_SETTINGS, oversample)
+
+    print(f"{len(vectors)} documents, {len(questions)} queries, oversample {oversample}")
+    print(format_report(rows, min(k, len(vectors))))
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({"documents": len(vectors), "dimensions": int(vectors.shape[1]), "queries": len(questions),
+                       "k": k, "oversample": oversample, "rows": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall and memory of the quantized embedding store modes on the stored documents.")
+    parser.add_argument('--queries', type=int, default=200, help='Number of documents whose opening words are used as queries')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours compared with exact search')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    main(queries=args.queries, k=args.k, json_path=args.json)
@@ -21,7 +21,9 @@ if not OPENAI_API_KEY:
 chatbot = RAGChatbot(
     OPENAI_API_KEY,
     collection_name=config['chroma_db']['collection_name'],
-    persist_directory=config['chroma_db']['persist_directory']
+    persist_directory=config['chroma_db']['persist_directory'],
+    system_prompt_file=config.get('system_prompt_file'),
+    vector_store=config.get('vector_store')
 )
 
 # View all documents
@@ -0,0 +1,396 @@
+"""Local stand-in for the OpenAI and Anthropic APIs, so the projects can be benchmarked offline.
+
+    python benchmarks/stub_llm_server.py --port 8900 --latency 0.3 --tokens-per-second 80
+    OPENAI_API_BASE=http://127.0.0.1:8900/v1 OPENAI_BASE_URL=http://127.0.0.1:8900/v1 \
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900 WEB_SEARCH_URL=http://127.0.0.1:8900/search python run.py
+
+Serves /v1/chat/completions (plain and streamed), /v1/completions, /v1/embeddings and
+/v1/messages, plus a DuckDuckGo-style GET /search for the RAG server's internet mode. A reply takes `latency` seconds plus completion_tokens / tokens_per_second,
+so the timings behave like a real model's. Everything is deterministic:
+
+- Replies echo the end of the prompt, padded with filler words. A request with a json_schema response_format
+  gets an object that matches the schema. A ReAct prompt that asks for a "Final Answer:" gets
+  one straight away, so agent frameworks finish without calling tools.
+- Search results repeat the query's words in each snippet and take `search_latency` seconds.
+- Embeddings hash each word into a fixed dimension; token ids are decoded to words first when
+  tiktoken is installed. The same text always gets the same vector, and texts that share words
+  get similar ones, so retrieval still returns sensible neighbours.
+
+GET /_stats returns request and token counts per endpoint, and POST /_stats/reset clears them.
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, quote
+
+_WORD = re.compile(r"\w+")
+_FILLER = ("the stub model answers every question with the same steady stream of plain words so "
+           "that timings depend only on the configured latency and token rate").split()
+
+
+@dataclass
+class StubConfig:
+    # Seconds before the first token of a chat or completion reply
+    latency: float = 0.2
+    # Generation speed after the first token; 0 returns the whole reply at once
+    tokens_per_second: float = 100.0
+    # Length of every reply in words, unless the request's max_tokens is smaller
+    completion_tokens: int = 64
+    embedding_latency: float = 0.05
+    embedding_dim: int = 1536
+    # Seconds per GET /search request
+    search_latency: float = 0.3
+
+
+def count_tokens(text: str) -> int:
+    # Roughly four characters per token, like the OpenAI tokenizers on English text
+    return max(1, len(text) // 4)
+
+
+def _text_of(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return "" if content is None else str(content)
+
+
+def embed(features: List[Any], dim: int) -> List[float]:
+    """Signed feature hashing of words or token ids, L2-normalised."""
+    vector = [0.0] * dim
+    for feature in features:
+        digest = hashlib.blake2b(str(feature).encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [round(v / norm, 6) for v in vector]
+
+
+def _words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def _token_features(ids: List[int]) -> List[Any]:
+    # LangChain sends documents as cl100k token ids but queries as plain strings; decoding the ids
+    # puts both in the same feature space, so query-to-document similarity means something
+    try:
+        import tiktoken
+
+        return _words(tiktoken.get_encoding("cl100k_base").decode(ids))
+    except Exception:
+        return list(ids)
+
+
+def _embedding_inputs(value: Any) -> List[List[Any]]:
+    """The OpenAI embeddings API takes a string, a list of strings, token ids or lists of token ids."""
+    if isinstance(value, str):
+        return [_words(value)]
+    if value and all(isinstance(v, int) for v in value):
+        return [_token_features(value)]
+    return [_words(v) if isinstance(v, str) else _token_features(v) for v in value]
+
+
+def from_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """The simplest value that validates against a JSON schema (objects, arrays, enums, $ref, anyOf)."""
+    if "$ref" in schema:
+        return from_schema(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), defs)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return from_schema(options[0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {name: from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [from_schema(schema.get("items", {}), defs)]
+    return {"string": "stub", "integer": 1, "number": 1.0, "boolean": True, "null": None}.get(kind, "stub")
+
+
+class StubModel:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"config": asdict(self.config), "endpoints": json.loads(json.dumps(self._stats))}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def reply(self, prompt: str, body: Dict[str, Any]) -> str:
+        """Deterministic reply text for a request whose conversation text is prompt."""
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            return json.dumps(from_schema(schema, {**schema.get("definitions", {}), **schema.get("$defs", {})}))
+        if response_format.get("type") == "json_object":
+            return json.dumps({"answer": "stub"})
+        limit = min(self.config.completion_tokens, body.get("max_tokens") or body.get("max_completion_tokens")
+                    or self.config.completion_tokens)
+        words = [w.lower() for w in _WORD.findall(prompt)][-8:]
+        words += [_FILLER[i % len(_FILLER)] for i in range(max(0, limit - len(words)))]
+        text = " ".join(words[:limit]).capitalize() + "."
+        if "Final Answer:" in prompt:
+            text = f"Thought: I now know the final answer\nFinal Answer: {text}"
+        return text
+
+    def generation_seconds(self, completion_tokens: int) -> float:
+        rate = self.config.tokens_per_second
+        return self.config.latency + (completion_tokens / rate if rate > 0 else 0.0)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients with connection pools reuse their connections like they would upstream
+    protocol_version = "HTTP/1.1"
+    model: StubModel
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:
+        path, _, query = self.path.partition("?")
+        path = path.rstrip("/")
+        if path == "/_stats":
+            self._send_json(self.model.stats())
+        elif path.endswith("/search"):
+            self._search(parse_qs(query))
+        elif path.endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        try:
+            body = self._read_json()
+        except ValueError:
+            self._send_json({"error": {"message": "Request body is not JSON"}}, 400)
+            return
+        if path == "/_stats/reset":
+            self.model.reset()
+            self._send_json({"ok": True})
+        elif path.endswith("/chat/completions"):
+            self._chat(body)
+        elif path.endswith("/completions"):
+            self._completion(body)
+        elif path.endswith("/embeddings"):
+            self._embeddings(body)
+        elif path.endswith("/messages"):
+            self._anthropic_messages(body)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+    def _search(self, params: Dict[str, List[str]]) -> None:
+        query = params.get("query", [""])[0]
+        limit = int(params.get("limit", ["3"])[0])
+        self.model.record("search", 0, 0)
+        time.sleep(self.model.config.search_latency)
+        self._send_json([
+            {"title": f"{query} ({i + 1})", "link": f"https://search.example/{quote(query)}/{i + 1}",
+             "snippet": f"Result {i + 1} about {query}: " + " ".join(_FILLER[i:i + 12])}
+            for i in range(limit)
+        ])
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        prompt = "\n".join(_text_of(m.get("content")) for m in body.get("messages", []))
+        text = self.model.reply(prompt, body)
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.model.record("chat", usage["prompt_tokens"], usage["completion_tokens"])
+        model = body.get("model", "stub")
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._stream_chat(model, text, usage if include_usage else None)
+            return
+        time.sleep(self.model.generation_seconds(usage["completion_tokens"]))
+        self._send_json({
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream_chat(self, model: str, text: str, usage: Optional[Dict[str, int]]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        time.sleep(self.model.config.latency)
+        words = text.split(" ")
+        rate = self.model.config.tokens_per_second
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        for i, word in enumerate(words):
+            delta = {"role": "assistant", "content": word} if i == 0 else {"content": " " + word}
+            self._event({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            if rate > 0:
+                time.sleep(count_tokens(word) / rate)
+        self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if usage:
+            self._event({**base, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _event(self, payload: Dict[str, Any]) -> None:
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def _completion(self, body: Dict[str, Any]) -> None:
+        prompt = _text_of(body.get("prompt"))
+        text = self.model.reply(prompt, body)
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.model.record("completions", usage["prompt_tokens"], usage["completion_tokens"])
+        time.sleep(self.model.generation_seconds(usage["completion_tokens"]))
+        self._send_json({
+            "id": "cmpl-stub", "object": "text_completion", "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "text": text, "finish_reason": "stop"}], "usage": usage,
+        })
+
+    def _embeddings(self, body: Dict[str, Any]) -> None:
+        inputs = _embedding_inputs(body.get("input", ""))
+        prompt_tokens = sum(max(1, len(features)) for features in inputs)
+        self.model.record("embeddings", prompt_tokens, 0)
+        time.sleep(self.model.config.embedding_latency)
+        dim = body.get("dimensions") or self.model.config.embedding_dim
+        self._send_json({
+            "object": "list", "model": body.get("model", "stub"),
+            "data": [{"object": "embedding", "index": i, "embedding": embed(features, dim)}
+                     for i, features in enumerate(inputs)],
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        })
+
+    def _anthropic_messages(self, body: Dict[str, Any]) -> None:
+        prompt = "\n".join([_text_of(body.get("system"))] + [_text_of(m.get("content")) for m in body.get("messages", [])])
+        text = self.model.reply(prompt, body)
+        usage = {"input_tokens": count_tokens(prompt), "output_tokens": count_tokens(text)}
+        self.model.record("messages", usage["input_tokens"], usage["output_tokens"])
+        time.sleep(self.model.generation_seconds(usage["output_tokens"]))
+        self._send_json({
+            "id": "msg_stub", "type": "message", "role": "assistant", "model": body.get("model", "stub"),
+            "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": usage,
+        })
+
+
+class StubServer:
+    """The stub on a background thread; port=0 picks a free port.
+
+        with StubServer(StubConfig(latency=0.1)) as stub:
+            os.environ.update(stub.environ())
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.model = StubModel(config or StubConfig())
+        handler = type("Handler", (StubHandler,), {"model": self.model})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self) -> Dict[str, str]:
+        """Environment that points the OpenAI SDKs (old and new), LangChain, Anthropic and web search at the stub."""
+        return {
+            "OPENAI_API_BASE": f"{self.url}/v1",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPENAI_API_KEY": "sk-stub",
+            "ANTHROPIC_BASE_URL": self.url,
+            "ANTHROPIC_API_KEY": "sk-ant-stub",
+            "WEB_SEARCH_URL": f"{self.url}/search",
+        }
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = StubConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds to the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second,
+                        help="Generation speed; 0 returns whole replies at once")
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens, help="Reply length")
+    parser.add_argument("--embedding-latency", type=float, default=defaults.embedding_latency)
+    parser.add_argument("--embedding-dim", type=int, default=defaults.embedding_dim)
+    parser.add_argument("--search-latency", type=float, default=defaults.search_latency,
+                        help="Seconds per web search request")
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(args.latency, args.tokens_per_second, args.completion_tokens, args.embedding_latency,
+                      args.embedding_dim, args.search_latency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline OpenAI/Anthropic-compatible stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubServer(config_from_args(args), args.host, args.port)
+    for name, value in server.environ().items():
+        print(f"export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,550 @@
+"""Offline end-to-end benchmarks for the TinkerLab projects, run against the stub LLM server.
+
+    python benchmarks/suite.py list
+    python benchmarks/suite.py run                           # every case, compared with the baseline
+    python benchmarks/suite.py run --cases rag.query rag.conversation --quick
+    python benchmarks/suite.py run --python rag=/path/to/rag-venv/bin/python
+    python benchmarks/suite.py run --save-baseline           # this run becomes the new baseline
+    python benchmarks/suite.py compare                       # latest run in the history against the baseline
+
+Each case runs in its own interpreter, from its project's directory, with the OpenAI and
+Anthropic SDKs pointed at a stub server started for the run (see stub_llm_server.py). A case
+whose project dependencies are not installed in that interpreter is reported as skipped.
+Because the projects pin different library versions, --python can pick another interpreter
+for every case whose name starts with a given prefix.
+
+Runs are appended to results/history.json. Metrics ending in _seconds are lower-is-better and
+metrics ending in _per_second are higher-is-better; either one moving the wrong way by more
+than --tolerance against results/baseline.json is a regression, and the run exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RESULTS = os.path.join(HERE, "results")
+HISTORY_PATH = os.path.join(RESULTS, "history.json")
+BASELINE_PATH = os.path.join(RESULTS, "baseline.json")
+RAG_SERVER = os.path.join(ROOT, "RAG", "GenAI-RAG-Context-Aware-Customer-Assistant-for-E-Commerce-Organic-Farm-to-Table-Store-main")
+AGENTS = os.path.join(ROOT, "AI Agents")
+
+# A case prints its metrics on a line starting with this, after whatever the project logs
+RESULT_MARKER = "BENCH_RESULT "
+CASE_TIMEOUT = 900
+
+PRODUCTS = ["tomatoes", "spinach", "carrots", "strawberries", "honey", "eggs", "basil", "potatoes", "apples",
+            "lentils", "goat cheese", "sourdough"]
+TOPICS = [
+    "{product} are grown without synthetic pesticides on partner farms within fifty miles of the store.",
+    "Weekend home delivery of {product} runs from 3 PM to 10 PM, and orders close on Friday night.",
+    "Customers can order {product} online and pick them up at the farm stand on Saturday mornings.",
+    "Our {product} are harvested the day before delivery and packed in compostable boxes.",
+    "The cooking class this month shows three seasonal recipes built around {product}.",
+    "Prices for {product} follow the harvest, and members get ten percent off every order.",
+]
+# None of these contain a greeting (the chatbot answers "hi", "hey", ... anywhere in a message with a greeting)
+QUESTIONS = [
+    "When are deliveries made?",
+    "Are your tomatoes grown without pesticides?",
+    "Can I order spinach online?",
+    "Do members get a discount on honey?",
+    "What do you cook in the class about basil?",
+    "How are the strawberries packed?",
+    "Where do your carrots come from?",
+    "Can I pick up eggs at the farm stand?",
+]
+# The stub's hashed embeddings score matching documents lower than OpenAI's do (0.3-0.6 rather
+# than 0.8 and up), so the RAG server's router gets a threshold on that scale
+STUB_MIN_RETRIEVAL_SIMILARITY = 0.3
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_metrics(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "mean_seconds": statistics.mean(latencies) if latencies else 0.0,
+        "p50_seconds": percentile(latencies, 0.50),
+        "p95_seconds": percentile(latencies, 0.95),
+    }
+
+
+def synthetic_documents(count: int) -> List[Dict[str, str]]:
+    return [
+        {"text": TOPICS[i % len(TOPICS)].format(product=PRODUCTS[(i // len(TOPICS)) % len(PRODUCTS)].capitalize())
+         + f" (note {i})", "source": f"bench_{i}"}
+        for i in range(count)
+    ]
+
+
+# Cases. Each runs inside the child interpreter with its project directory as the working directory
+# and first sys.path entry, and returns a flat dict of metrics.
+
+def _rag_chatbot(persist_directory: str, **kwargs: Any):
+    from server.rag_chatbot import RAGChatbot
+
+    return RAGChatbot(os.environ["OPENAI_API_KEY"], "benchmark", persist_directory,
+                      os.path.join(RAG_SERVER, "system_prompt.txt"), **kwargs)
+
+
+def rag_ingest(quick: bool) -> Dict[str, Any]:
+    """populate_db.py ingestion: embed and store documents the way the populate run does."""
+    import populate_db
+
+    with tempfile.TemporaryDirectory() as persist_directory:
+        chatbot = _rag_chatbot(persist_directory)
+        corpus = " ".join(doc["text"] for doc in synthetic_documents(60 if quick else 300))
+        chunk_size = populate_db.config["rag_config"].get("max_chunk_size", 1000)
+        documents = [{"text": chunk, "source": f"bench_chunk_{i}"}
+                     for i, chunk in enumerate(populate_db.split_text(corpus, chunk_size))]
+        documents += synthetic_documents(20 if quick else 100)
+        started = time.perf_counter()
+        populate_db.add_documents(chatbot, documents)
+        seconds = time.perf_counter() - started
+        stored = len(chatbot.get_all_documents())
+    return {"documents": len(documents), "stored": stored, "total_seconds": seconds,
+            "documents_per_second": len(documents) / seconds}
+
+
+def rag_query(quick: bool) -> Dict[str, Any]:
+    """RAGChatbot.query latency, one question at a time."""
+    with tempfile.TemporaryDirectory() as persist_directory:
+        chatbot = _rag_chatbot(persist_directory)
+        chatbot.add_or_update_documents(synthetic_documents(36))
+        latencies, errors = [], 0
+        for i in range(8 if quick else 40):
+            started = time.perf_counter()
+            answer, _ = chatbot.query(QUESTIONS[i % len(QUESTIONS)])
+            latencies.append(time.perf_counter() - started)
+            errors += answer == "There was an error processing your request."
+    return {"queries": len(latencies), "errors": errors, **latency_metrics(latencies)}
+
+
+def rag_logging(quick: bool) -> Dict[str, Any]:
+    """RAGChatbot.query with logging set up the way run.py sets it up: CPU time per request on the
+    request thread, and in the whole process including the logging thread."""
+    try:
+        from server.logs import configure_logging, stop_logging
+    except ImportError:
+        # Trees from before server/logs.py configure synchronous DEBUG logging when imported
+        configure_logging = stop_logging = None
+
+    with open("config.json") as config_file:
+        config = json.load(config_file)
+    with tempfile.TemporaryDirectory() as persist_directory:
+        chatbot = _rag_chatbot(persist_directory)
+        if configure_logging:
+            configure_logging(config.get("logging", {}))
+        chatbot.add_or_update_documents(synthetic_documents(36))
+        queries = 8 if quick else 40
+        latencies, thread_cpu = [], []
+        process_started = time.process_time()
+        for i in range(queries):
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            chatbot.query(QUESTIONS[i % len(QUESTIONS)])
+            thread_cpu.append(time.thread_time() - cpu_started)
+            latencies.append(time.perf_counter() - started)
+        if stop_logging:
+            stop_logging()  # the queued records are part of the cost
+        process_cpu = time.process_time() - process_started
+    return {"queries": queries, "request_cpu_seconds": statistics.mean(thread_cpu),
+            "process_cpu_seconds": process_cpu / queries, **latency_metrics(latencies)}
+
+
+def rag_vectors(quick: bool) -> Dict[str, Any]:
+    """Retrieval from Chroma and from the int8 store over the same documents, and recall@10 against
+    exact search with RAM per vector for each quantized setting (rescored)."""
+    import numpy as np
+    from server.vector_store import evaluate
+
+    documents = synthetic_documents(1000 if quick else 4000)
+    queries = [QUESTIONS[i % len(QUESTIONS)] + f" (note {i * 37 % len(documents)})" for i in range(50)]
+    metrics: Dict[str, Any] = {"documents": len(documents)}
+    with tempfile.TemporaryDirectory() as persist_directory:
+        for mode in ("chroma", "int8"):
+            chatbot = _rag_chatbot(os.path.join(persist_directory, mode), vector_store={"mode": mode})
+            for start in range(0, len(documents), 500):
+                chatbot.add_or_update_documents(documents[start:start + 500])
+            for query in queries:
+                chatbot.retrieve(query)  # embeds the query once; the timed searches find it cached
+            started = time.perf_counter()
+            for query in queries:
+                chatbot.retrieve(query)
+            metrics[f"{mode}_retrieve_seconds"] = (time.perf_counter() - started) / len(queries)
+            if mode != "chroma":
+                vectors = np.asarray(chatbot.vectorstore.index.vectors())
+                query_vectors = np.asarray(chatbot.embedding_function.embed_documents(queries), dtype=np.float32)
+    for row in evaluate(vectors, query_vectors, 10):
+        if row["rescore"] is False:
+            continue
+        label = row["mode"].replace(" ", "_") + (f"_pca{row['pca_dim']}" if row["pca_dim"] else "")
+        metrics[f"{label}_recall"] = round(row["recall"], 3)
+        metrics[f"{label}_ram_bytes"] = round(row["ram_bytes_per_vector"])
+    return metrics
+
+
+def _conversation_load(questions: List[str], requests_total: int, concurrency: int,
+                       internet_access: bool = False) -> Dict[str, Any]:
+    """POST questions[i % len(questions)] to /backend-api/v2/conversation from concurrent clients."""
+    import requests
+    from werkzeug.serving import make_server
+    from server.app import create_app
+    from server.backend import Backend_Api
+
+    with open("config.json") as config_file:
+        config = json.load(config_file)
+    with tempfile.TemporaryDirectory() as persist_directory:
+        config["chroma_db"]["persist_directory"] = persist_directory
+        config.setdefault("routing", {})["min_retrieval_similarity"] = STUB_MIN_RETRIEVAL_SIMILARITY
+        app = create_app(config, register_routes=False)
+        backend_api = Backend_Api(app, config)
+        backend_api.chatbot.add_or_update_documents(synthetic_documents(36))
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        url = f"http://127.0.0.1:{server.server_port}/backend-api/v2/conversation"
+        with ThreadPoolExecutor(max_workers=1) as serving:
+            serving.submit(server.serve_forever)
+            try:
+                requests.post(url, json={"message": QUESTIONS[-1]}, timeout=120)  # warm-up, not counted
+
+                meta = {"content": {"internet_access": internet_access}}
+
+                def ask(i: int) -> Tuple[float, bool]:
+                    started = time.perf_counter()
+                    response = requests.post(url, json={"message": questions[i % len(questions)], "meta": meta},
+                                             timeout=120)
+                    return time.perf_counter() - started, response.status_code == 200
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                    results = list(clients.map(ask, range(requests_total)))
+                wall = time.perf_counter() - started
+            finally:
+                server.shutdown()
+        coalescing = backend_api.single_flight.stats() if hasattr(backend_api, "single_flight") else {}
+        routes = backend_api.router.stats()["routes"] if hasattr(backend_api, "router") else {}
+        search = backend_api.web_search.stats() if internet_access and hasattr(backend_api, "web_search") else {}
+    latencies = [seconds for seconds, _ in results]
+    extra = {}
+    for name, route in routes.items():
+        extra[f"{name}_requests"] = route["requests"]
+        extra[f"{name}_hedged"] = route["hedged"]
+        extra[f"{name}_cost_usd"] = route["cost_usd"]
+    if search:
+        extra["search_cache_hits"] = search["cache_hits"]
+        extra["search_errors"] = search["errors"]
+    return {"requests": requests_total, "concurrency": concurrency, "errors": sum(not ok for _, ok in results),
+            "coalesced": coalescing.get("coalesced", 0), **extra, "total_seconds": wall,
+            "requests_per_second": requests_total / wall, **latency_metrics(latencies)}
+
+
+def rag_conversation(quick: bool) -> Dict[str, Any]:
+    """/backend-api/v2/conversation under concurrent load, served the way run.py serves it."""
+    return _conversation_load(QUESTIONS, *((24, 4) if quick else (120, 8)))
+
+
+def rag_internet(quick: bool) -> Dict[str, Any]:
+    """rag.conversation in internet mode: every question also searches the web (the stub's /search)."""
+    return _conversation_load(QUESTIONS, *((24, 4) if quick else (120, 8)), internet_access=True)
+
+
+def rag_promotion(quick: bool) -> Dict[str, Any]:
+    """A burst of customers asking the same two questions at once, worded slightly differently."""
+    burst = ["When are deliveries made?", "when are deliveries made", "Can I order spinach online?",
+             "can i order spinach online ?"]
+    return _conversation_load(burst, *((32, 16) if quick else (160, 32)))
+
+
+def agents_trends(quick: bool) -> Dict[str, Any]:
+    """Trend pipeline with the real Claude agents; news search and article download are the offline stubs."""
+    from dataclasses import replace
+    from trend_pipeline import DEFAULT_MODEL_ID, build_backends, run_pipeline
+    from trend_stubs import build_stub_backends
+
+    stubs = build_stub_backends()
+    backends = replace(build_backends(os.environ["ANTHROPIC_API_KEY"], DEFAULT_MODEL_ID),
+                       search=stubs.search, fetch=stubs.fetch)
+    articles = 4 if quick else 8
+    started = time.perf_counter()
+    report = run_pipeline("climate tech", backends, max_articles=articles, max_workers=4)
+    seconds = time.perf_counter() - started
+    return {"articles": len(report.articles), "failed": sum(bool(a.error) for a in report.articles),
+            "total_seconds": seconds, "articles_per_second": len(report.articles) / seconds}
+
+
+def agents_recruitment(quick: bool) -> Dict[str, Any]:
+    """The batch screener's analyze stage over synthetic resumes."""
+    from batch_screening import ScreeningStore, analyze_stage
+
+    count = 6 if quick else 24
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ScreeningStore(os.path.join(workdir, "screening.sqlite3"))
+        for i in range(count):
+            text = (f"Candidate {i}, candidate{i}@example.com. Machine learning engineer with {i % 8 + 1} years of "
+                    "Python, PyTorch, TensorFlow and MLOps experience; shipped recommendation and NLP systems.")
+            store.add_extracted(f"bench-{i}", "ai_ml_engineer", f"resume_{i}.pdf", text)
+        started = time.perf_counter()
+        stats = analyze_stage(store, "ai_ml_engineer", os.environ["OPENAI_API_KEY"], workers=4,
+                              calls_per_minute=100000)
+        seconds = time.perf_counter() - started
+    return {"resumes": stats["calls"], "failed": stats["quality"]["failed"], "total_seconds": seconds,
+            "resume_mean_seconds": stats["mean_latency"], "resumes_per_second": stats["calls"] / seconds}
+
+
+def agents_financial(quick: bool) -> Dict[str, Any]:
+    """The financial crew's task graph; the stub answers ReAct prompts directly, so no tool is called."""
+    from financial_crew import run_crew
+
+    inputs = {"stock_selection": "IBM", "initial_capital": "10000", "risk_tolerance": "Medium",
+              "trading_strategy_preference": "Day Trading", "news_impact_consideration": True}
+    report = run_crew(inputs, "gpt-4o-mini", cache=None, max_workers=4)
+    stats = report.stats
+    return {"tasks": len(report.results), "failed": stats["failed"], "total_seconds": stats["total_seconds"],
+            "sequential_seconds": stats["sequential_seconds"]}
+
+
+@dataclass
+class Case:
+    run: Callable[[bool], Dict[str, Any]]
+    cwd: str
+    description: str
+
+
+CASES: Dict[str, Case] = {
+    "rag.ingest": Case(rag_ingest, RAG_SERVER, "populate_db.py ingestion throughput"),
+    "rag.query": Case(rag_query, RAG_SERVER, "RAGChatbot.query latency"),
+    "rag.logging": Case(rag_logging, RAG_SERVER, "CPU per request spent around RAGChatbot.query, logging included"),
+    "rag.vectors": Case(rag_vectors, RAG_SERVER, "retrieval, recall and memory of the quantized vector store"),
+    "rag.conversation": Case(rag_conversation, RAG_SERVER, "/backend-api/v2/conversation under concurrency"),
+    "rag.internet": Case(rag_internet, RAG_SERVER, "the same load with web search merged into the context"),
+    "rag.promotion": Case(rag_promotion, RAG_SERVER, "the same few questions from many clients at once"),
+    "agents.trends": Case(agents_trends, os.path.join(AGENTS, "ai_startup_trend_analysis_agent"),
+                          "startup trend pipeline with the Claude agents"),
+    "agents.recruitment": Case(agents_recruitment, os.path.join(AGENTS, "ai_recruitment_agent_team"),
+                               "batch resume screening, analyze stage"),
+    "agents.financial": Case(agents_financial, os.path.join(AGENTS, "AI-Financial-Analysis-Agent"),
+                             "financial crew task graph"),
+}
+
+
+def run_case_here(name: str, quick: bool) -> None:
+    """Child side: run one case in this interpreter and print its metrics."""
+    case = CASES[name]
+    os.chdir(case.cwd)
+    sys.path.insert(0, case.cwd)
+    try:
+        result = case.run(quick)
+    except ImportError as e:
+        result = {"skipped": f"missing dependency: {e}"}
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+# Parent side
+
+def _python_for(name: str, interpreters: Dict[str, str]) -> str:
+    matches = [prefix for prefix in interpreters if name.startswith(prefix)]
+    return interpreters[max(matches, key=len)] if matches else sys.executable
+
+
+def run_case(name: str, quick: bool, python: str, env: Dict[str, str]) -> Dict[str, Any]:
+    command = [python, os.path.abspath(__file__), "case", name] + (["--quick"] if quick else [])
+    try:
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, timeout=CASE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {CASE_TIMEOUT}s"}
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    tail = (completed.stderr or completed.stdout).strip().splitlines()[-5:]
+    return {"error": f"exit status {completed.returncode}: " + " | ".join(tail)}
+
+
+def _stub_requests(stub_url: str) -> Dict[str, int]:
+    from urllib.request import urlopen
+
+    with urlopen(f"{stub_url}/_stats") as response:
+        endpoints = json.load(response)["endpoints"]
+    return {f"llm_{endpoint}_requests": stats["requests"] for endpoint, stats in endpoints.items()}
+
+
+def _reset_stub(stub_url: str) -> None:
+    from urllib.request import Request, urlopen
+
+    urlopen(Request(f"{stub_url}/_stats/reset", data=b"{}", method="POST")).close()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(names: List[str], quick: bool, stub_config: Any, interpreters: Dict[str, str],
+              llm_cache: bool = False) -> Dict[str, Any]:
+    from stub_llm_server import StubServer
+
+    results: Dict[str, Any] = {}
+    with StubServer(stub_config) as stub:
+        # LLM_CACHE off by default: a warm response cache would hide the latency being measured
+        env = {**os.environ, **stub.environ(), "LLM_CACHE": "1" if llm_cache else "0",
+               "LLM_CACHE_PATH": os.path.join(tempfile.gettempdir(), "bench_llm_cache.sqlite3")}
+        for name in names:
+            _reset_stub(stub.url)
+            print(f"{name:<20} ...", end="", flush=True)
+            result = run_case(name, quick, _python_for(name, interpreters), env)
+            if "skipped" not in result and "error" not in result:
+                result.update(_stub_requests(stub.url))
+            results[name] = result
+            print("\r" + format_result(name, result), flush=True)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "quick": quick,
+        "llm_cache": llm_cache,
+        "stub": asdict(stub_config),
+        "cases": results,
+    }
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"{name:<20} skipped ({result['skipped']})"
+    if "error" in result:
+        return f"{name:<20} ERROR {result['error']}"
+    shown = [f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}" for key, value in result.items()]
+    return f"{name:<20} " + " ".join(shown)
+
+
+def direction(metric: str) -> int:
+    """+1 when higher is better, -1 when lower is better, 0 for counts that are not compared."""
+    if metric.endswith("_per_second"):
+        return 1
+    if metric.endswith("_seconds"):
+        return -1
+    return 0
+
+
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print every compared metric and return the regressions."""
+    for key in ("quick", "stub", "llm_cache"):
+        if run.get(key) != baseline.get(key):
+            print(f"warning: {key} differs from the baseline ({run.get(key)} vs {baseline.get(key)})")
+    regressions = []
+    print(f"\nAgainst baseline {baseline.get('commit') or '?'} ({baseline.get('timestamp')}), "
+          f"tolerance {tolerance:.0%}:")
+    for name, result in run["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if not before or "skipped" in result or "error" in result or "skipped" in before or "error" in before:
+            continue
+        for metric, value in result.items():
+            sign = direction(metric)
+            old = before.get(metric)
+            if not sign or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            regressed = change * sign < -tolerance
+            flag = "REGRESSION" if regressed else ("improved" if change * sign > tolerance else "")
+            print(f"  {name:<20} {metric:<22} {old:>10.3f} -> {value:>10.3f} {change:+7.1%} {flag}")
+            if regressed:
+                regressions.append(f"{name} {metric} {change:+.1%}")
+    return regressions
+
+
+def load_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(path: str, value: Any) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(value, f, indent=2)
+        f.write("\n")
+
+
+def main() -> None:
+    sys.path.insert(0, HERE)
+    from stub_llm_server import add_config_arguments, config_from_args
+
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks against the stub LLM server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the cases")
+
+    run_parser = commands.add_parser("run", help="Run cases, append them to the history and compare with the baseline")
+    run_parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    run_parser.add_argument("--quick", action="store_true", help="Smaller workloads, for a fast smoke run")
+    run_parser.add_argument("--python", action="append", default=[], metavar="PREFIX=PATH",
+                            help="Interpreter for the cases whose names start with PREFIX, e.g. rag=venv/bin/python")
+    run_parser.add_argument("--llm-cache", action="store_true", help="Leave the llm_client response cache on")
+    run_parser.add_argument("--save-baseline", action="store_true")
+    run_parser.add_argument("--tolerance", type=float, default=0.2)
+    run_parser.add_argument("--history", default=HISTORY_PATH)
+    run_parser.add_argument("--baseline", default=BASELINE_PATH)
+    add_config_arguments(run_parser)
+
+    compare_parser = commands.add_parser("compare", help="Compare the latest run in the history with the baseline")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2)
+    compare_parser.add_argument("--history", default=HISTORY_PATH)
+    compare_parser.add_argument("--baseline", default=BASELINE_PATH)
+
+    case_parser = commands.add_parser("case", help=argparse.SUPPRESS)
+    case_parser.add_argument("name", choices=sorted(CASES))
+    case_parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, case in CASES.items():
+            print(f"{name:<20} {case.description}")
+        return
+    if args.command == "case":
+        run_case_here(args.name, args.quick)
+        return
+
+    if args.command == "run":
+        interpreters = dict(item.split("=", 1) for item in args.python)
+        run = run_suite(args.cases, args.quick, config_from_args(args), interpreters, args.llm_cache)
+        history = load_json(args.history, [])
+        history.append(run)
+        save_json(args.history, history)
+        if args.save_baseline:
+            save_json(args.baseline, run)
+            print(f"\nSaved as the baseline in {args.baseline}")
+            return
+    else:
+        history = load_json(args.history, [])
+        if not history:
+            sys.exit(f"No runs in {args.history} yet")
+        run = history[-1]
+
+    baseline: Optional[Dict[str, Any]] = load_json(args.baseline, None)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; save one with `run --save-baseline`")
+        return
+    regressions = compare(run, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): " + "; ".join(regressions))
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
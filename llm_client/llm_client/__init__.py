@@ -0,0 +1,36 @@
+"""Shared LLM client layer for the TinkerLab projects.
+
+    from llm_client import http_client, requests_session, ensure_shared_transport, ChatClient, METRICS
+
+    model = OpenAIChat(id="gpt-4o-mini", api_key=key,
+                       client_params={"http_client": http_client(sdk="openai")})             # agno / phidata
+    model = Claude(id=model_id, api_key=key, client_params={"http_client": http_client(sdk="anthropic")})
+    ensure_shared_transport(model)                                        # raises if the wrapper bypasses it
+    ChatOpenAI(model="gpt-3.5-turbo", http_client=http_client(sdk="openai"))          # langchain-openai
+    openai.requestssession = requests_session()                                       # openai<1 / old langchain
+    ChatClient(key, "together").chat(model, messages)                                 # plain REST
+
+Set LLM_CACHE=1 to cache deterministic responses on disk (LLM_CACHE_PATH, LLM_CACHE_TTL), and
+read METRICS.snapshot() for per-model call counts, tokens and latency.
+"""
+from .cache import ResponseCache, cache_key
+from .chat import BASE_URLS, ChatClient, ChatError, ChatResult
+from .http import configure, ensure_shared_transport, http_client, http_package, requests_session, uses_shared_transport
+from .metrics import METRICS, LLMMetrics
+
+__all__ = [
+    "BASE_URLS",
+    "ChatClient",
+    "ChatError",
+    "ChatResult",
+    "LLMMetrics",
+    "METRICS",
+    "ResponseCache",
+    "cache_key",
+    "configure",
+    "ensure_shared_transport",
+    "http_client",
+    "http_package",
+    "requests_session",
+    "uses_shared_transport",
+]
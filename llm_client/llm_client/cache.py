@@ -0,0 +1,77 @@
+"""Disk-backed cache of LLM API responses, keyed by endpoint, model, messages and parameters."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# LLM_CACHE: unset/"0" disables the cache, "1" caches deterministic requests
+# (temperature 0, a fixed seed, or embeddings), "all" caches every non-streaming request
+CACHE_MODES = ("off", "deterministic", "all")
+
+
+def cache_mode_from_env() -> str:
+    value = os.getenv("LLM_CACHE", "").strip().lower()
+    if value in ("", "0", "off", "false", "no"):
+        return "off"
+    return "all" if value == "all" else "deterministic"
+
+
+def cache_key(url: str, body: Dict[str, Any]) -> str:
+    # The whole request body goes into the key: model, messages and every sampling parameter
+    return hashlib.sha256(json.dumps({"url": url, "body": body}, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def is_deterministic(endpoint: str, body: Dict[str, Any]) -> bool:
+    if endpoint == "embeddings":
+        return True
+    return body.get("temperature") == 0 or body.get("seed") is not None
+
+
+class ResponseCache:
+    """SQLite store of raw response bodies; entries older than ttl seconds are ignored (ttl=None keeps them)."""
+
+    def __init__(self, path: str = "llm_cache.sqlite3", mode: str = "deterministic", ttl: Optional[float] = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}")
+        self.mode = mode
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, content_type TEXT, "
+                "body BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def accepts(self, endpoint: str, body: Dict[str, Any]) -> bool:
+        if self.mode == "off" or body.get("stream"):
+            return False
+        return self.mode == "all" or is_deterministic(endpoint, body)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT body, content_type, created_at FROM responses WHERE key = ?",
+                                     (key,)).fetchone()
+        if row is None or (self.ttl is not None and time.time() - row[2] > self.ttl):
+            return None
+        return bytes(row[0]), row[1] or "application/json"
+
+    def put(self, key: str, model: Optional[str], body: bytes, content_type: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                               (key, model, content_type, body, time.time()))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    mode = cache_mode_from_env()
+    if mode == "off":
+        return None
+    ttl = os.getenv("LLM_CACHE_TTL")
+    return ResponseCache(os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3"), mode, float(ttl) if ttl else None)
@@ -0,0 +1,66 @@
+"""Minimal client for OpenAI-compatible chat APIs (OpenAI, Together, local servers) over the shared session."""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from .http import requests_session
+
+BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "together": "https://api.together.xyz/v1",
+}
+
+
+class ChatError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+@dataclass
+class ChatResult:
+    content: str
+    model: str = ""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    cached: bool = False
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+class ChatClient:
+    """chat(model, messages, **params) against {base_url}/chat/completions."""
+
+    def __init__(self, api_key: str, base_url: str = BASE_URLS["openai"], timeout: float = 120.0,
+                 session: Optional[requests.Session] = None):
+        self.api_key = api_key
+        self.base_url = BASE_URLS.get(base_url, base_url).rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests_session()
+
+    def chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> ChatResult:
+        response = self.session.post(
+            f"{self.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={"model": model, "messages": messages, **params},
+            timeout=self.timeout,
+        )
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", {}).get("message") or response.text
+            except ValueError:
+                message = response.text
+            raise ChatError(response.status_code, message)
+        data = response.json()
+        usage = data.get("usage") or {}
+        choices = data.get("choices") or [{}]
+        return ChatResult(
+            content=(choices[0].get("message") or {}).get("content") or "",
+            model=data.get("model", model),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            total_tokens=usage.get("total_tokens"),
+            cached=response.headers.get("X-LLM-Cache") == "hit",
+            raw=data,
+        )
@@ -0,0 +1,304 @@
+"""Pooled HTTP clients that cache and meter LLM API calls on their way through.
+
+requests_session() is for code built on requests (the openai<1 SDK, direct REST calls);
+http_client(sdk=...) is for SDKs built on httpx or httpx2 (openai>=1, anthropic, and so agno,
+phidata and langchain-openai).
+Both are process-wide, so every agent in a process shares one connection pool per host.
+
+Only calls to LLM endpoints (chat/completions, completions, messages, embeddings) are cached and
+metered; anything else passes straight through the pool.
+"""
+import importlib
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ResponseCache, cache_from_env, cache_key
+from .metrics import METRICS, LLMMetrics
+
+POOL_SIZE = 32
+
+_ENDPOINTS = (
+    ("/chat/completions", "chat"),
+    ("/completions", "completions"),
+    ("/messages", "messages"),
+    ("/embeddings", "embeddings"),
+)
+_PROVIDERS = {
+    "api.openai.com": "openai",
+    "api.anthropic.com": "anthropic",
+    "api.together.xyz": "together",
+}
+
+
+def endpoint_of(url: str) -> Optional[str]:
+    path = urlsplit(url).path.rstrip("/")
+    for suffix, endpoint in _ENDPOINTS:
+        if path.endswith(suffix):
+            return endpoint
+    return None
+
+
+def provider_of(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return _PROVIDERS.get(host, host)
+
+
+def _usage(body: bytes) -> Tuple[int, int]:
+    """(prompt tokens, completion tokens) from an OpenAI- or Anthropic-style response body."""
+    try:
+        usage = json.loads(body).get("usage") or {}
+    except (ValueError, AttributeError):
+        return 0, 0
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+    completion = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    return int(prompt), int(completion)
+
+
+class Call:
+    """One outgoing request: looks itself up in the cache, then records metrics when it finishes."""
+
+    def __init__(self, instrumentation: "Instrumentation", method: str, url: str, body: Optional[bytes]):
+        self.instrumentation = instrumentation
+        self.endpoint = endpoint_of(url) if method.upper() == "POST" else None
+        self.provider = provider_of(url)
+        self.started = time.perf_counter()
+        self.model: Optional[str] = None
+        self.stream = False
+        self.key: Optional[str] = None
+        if self.endpoint is None or not body:
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return
+        if not isinstance(payload, dict):
+            return
+        self.model = payload.get("model")
+        self.stream = bool(payload.get("stream"))
+        cache = instrumentation.cache
+        if cache is not None and cache.accepts(self.endpoint, payload):
+            self.key = cache_key(f"{self.provider}{urlsplit(url).path}", payload)
+
+    @property
+    def metered(self) -> bool:
+        return self.endpoint is not None
+
+    def cached(self) -> Optional[Tuple[bytes, str]]:
+        if self.key is None:
+            return None
+        hit = self.instrumentation.cache.get(self.key)
+        if hit is not None:
+            prompt, completion = _usage(hit[0])
+            self.instrumentation.metrics.record(self.provider, self.model, 0.0, prompt, completion, cached=True)
+        return hit
+
+    def finish(self, status: int, body: Optional[bytes], content_type: str = "application/json") -> None:
+        """body is None for streamed responses, which are metered for latency only."""
+        if not self.metered:
+            return
+        seconds = time.perf_counter() - self.started
+        prompt, completion = _usage(body) if body else (0, 0)
+        self.instrumentation.metrics.record(self.provider, self.model, seconds, prompt, completion,
+                                            error=status >= 400)
+        if self.key is not None and status == 200 and body:
+            self.instrumentation.cache.put(self.key, self.model, body, content_type)
+
+    def fail(self) -> None:
+        if self.metered:
+            self.instrumentation.metrics.record(self.provider, self.model, time.perf_counter() - self.started,
+                                                error=True)
+
+
+class Instrumentation:
+    def __init__(self, cache: Optional[ResponseCache] = None, metrics: LLMMetrics = METRICS):
+        self.cache = cache
+        self.metrics = metrics
+
+    def start(self, method: str, url: str, body: Any) -> Call:
+        if isinstance(body, str):
+            body = body.encode()
+        return Call(self, method, url, body if isinstance(body, (bytes, bytearray)) else None)
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """requests transport adapter with a larger pool, response caching and metrics."""
+
+    def __init__(self, instrumentation: Instrumentation, pool_size: int = POOL_SIZE, **kwargs: Any):
+        self.instrumentation = instrumentation
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        call = self.instrumentation.start(request.method or "GET", request.url or "", request.body)
+        hit = call.cached()
+        if hit is not None:
+            response = requests.Response()
+            response.status_code = 200
+            response.reason = "OK"
+            response._content = hit[0]
+            response.headers["Content-Type"] = hit[1]
+            response.headers["X-LLM-Cache"] = "hit"
+            response.url = request.url
+            response.request = request
+            response.encoding = "utf-8"
+            return response
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            call.fail()
+            raise
+        streamed = kwargs.get("stream") or call.stream
+        call.finish(response.status_code, None if streamed else response.content,
+                    response.headers.get("Content-Type", "application/json"))
+        return response
+
+
+_lock = threading.Lock()
+_instrumentation: Optional[Instrumentation] = None
+_session: Optional[requests.Session] = None
+_http_clients: Dict[Tuple[str, float], Any] = {}
+_transport_classes: Dict[str, type] = {}
+
+
+def instrumentation() -> Instrumentation:
+    """The process-wide instrumentation; its cache comes from LLM_CACHE / LLM_CACHE_PATH / LLM_CACHE_TTL."""
+    global _instrumentation
+    with _lock:
+        if _instrumentation is None:
+            _instrumentation = Instrumentation(cache_from_env())
+        return _instrumentation
+
+
+def requests_session() -> requests.Session:
+    global _session
+    shared = instrumentation()
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = InstrumentedAdapter(shared)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def http_package(sdk: Optional[str] = None) -> str:
+    """"httpx", or "httpx2" for releases of the sdk package (openai, anthropic) that moved to it.
+
+    Those releases refuse httpx objects, so the client handed to them has to come from httpx2.
+    """
+    if sdk:
+        try:
+            base_client = importlib.import_module(f"{sdk}._base_client")
+        except ImportError:
+            return "httpx"
+        if hasattr(base_client, "httpx2"):
+            return "httpx2"
+    return "httpx"
+
+
+def _transport_class(package: str) -> type:
+    """The instrumented transport for one HTTP library, defined once so every client shares it."""
+    with _lock:
+        if package in _transport_classes:
+            return _transport_classes[package]
+    httpx = importlib.import_module(package)
+
+    class InstrumentedTransport(httpx.BaseTransport):
+        def __init__(self, inner, shared: Instrumentation):
+            self._inner = inner
+            self._shared = shared
+
+        def handle_request(self, request):
+            call = self._shared.start(request.method, str(request.url), request.read())
+            hit = call.cached()
+            if hit is not None:
+                return httpx.Response(200, headers={"Content-Type": hit[1], "X-LLM-Cache": "hit"},
+                                      content=hit[0], request=request)
+            try:
+                response = self._inner.handle_request(request)
+            except Exception:
+                call.fail()
+                raise
+            if call.metered and not call.stream:
+                response.read()
+                call.finish(response.status_code, response.content,
+                            response.headers.get("Content-Type", "application/json"))
+            else:
+                call.finish(response.status_code, None)
+            return response
+
+        def close(self) -> None:
+            self._inner.close()
+
+    with _lock:
+        return _transport_classes.setdefault(package, InstrumentedTransport)
+
+
+def http_client(timeout: float = 600.0, sdk: Optional[str] = None):
+    """Shared HTTP client; pass it as http_client= to any httpx-based SDK client.
+
+    sdk names the package that will use it ("openai", "anthropic"), so the client is built with
+    the HTTP library that release of the SDK expects. One client is kept per library and timeout.
+    """
+    package = http_package(sdk)
+    httpx = importlib.import_module(package)
+    shared = instrumentation()
+    transport_class = _transport_class(package)
+
+    with _lock:
+        key = (package, float(timeout))
+        if key not in _http_clients:
+            limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+            _http_clients[key] = httpx.Client(
+                transport=transport_class(httpx.HTTPTransport(limits=limits), shared),
+                timeout=httpx.Timeout(timeout, connect=10.0),
+            )
+        return _http_clients[key]
+
+
+def _underlying_http_client(client: Any) -> Any:
+    """The httpx/httpx2 client behind an SDK client or a model wrapping one."""
+    if hasattr(client, "get_client"):    # agno / phidata models build their SDK client on demand
+        client = client.get_client()
+    client = getattr(client, "root_client", client)  # langchain-openai
+    return getattr(client, "_client", client)        # openai.OpenAI, anthropic.Anthropic
+
+
+def uses_shared_transport(client: Any) -> bool:
+    """Whether client sends its requests through one of the shared http_client()s.
+
+    client is an SDK client (openai.OpenAI, anthropic.Anthropic), an agno or phidata model, or a
+    langchain-openai ChatOpenAI / OpenAIEmbeddings.
+    """
+    underlying = _underlying_http_client(client)
+    with _lock:
+        return any(underlying is shared for shared in _http_clients.values())
+
+
+def ensure_shared_transport(client: Any) -> Any:
+    """Return client, or raise if it would bypass the shared pool, cache and metrics.
+
+    Wrappers check the type of an http_client= argument against their own httpx and quietly drop
+    one they do not recognise, so this catches the mismatch when the client is built.
+    """
+    if not uses_shared_transport(client):
+        raise RuntimeError(f"{type(client).__name__} does not use llm_client's HTTP client; "
+                           "pass it as client_params={'http_client': http_client(sdk=...)}")
+    return client
+
+
+def configure(cache: Optional[ResponseCache] = None, metrics: Optional[LLMMetrics] = None) -> Instrumentation:
+    """Replace the process-wide cache and/or metrics, e.g. to enable the cache from code instead of the environment."""
+    shared = instrumentation()
+    with _lock:
+        if cache is not None:
+            shared.cache = cache
+        if metrics is not None:
+            shared.metrics = metrics
+    return shared
@@ -0,0 +1,85 @@
+"""Per-call latency and token accounting for LLM API calls."""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# Latency percentiles are computed over this many most recent calls per model
+LATENCY_WINDOW = 1000
+
+
+def _percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def add(self, seconds: float, prompt_tokens: int, completion_tokens: int, cached: bool, error: bool) -> None:
+        self.calls += 1
+        self.errors += error
+        self.cache_hits += cached
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        if not cached:
+            # Cache hits would drag the latency figures toward zero
+            self.seconds += seconds
+            self.latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        upstream = self.calls - self.cache_hits
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "mean_seconds": self.seconds / upstream if upstream else 0.0,
+            "p50_seconds": _percentile(latencies, 0.50),
+            "p95_seconds": _percentile(latencies, 0.95),
+        }
+
+
+class LLMMetrics:
+    """Thread-safe counters per provider/model, plus a process-wide total."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = _Counter()
+        self._by_model: Dict[str, _Counter] = {}
+
+    def record(self, provider: str, model: Optional[str], seconds: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, cached: bool = False, error: bool = False) -> None:
+        key = f"{provider}/{model or 'unknown'}"
+        with self._lock:
+            counter = self._by_model.get(key)
+            if counter is None:
+                counter = self._by_model[key] = _Counter()
+            for c in (counter, self._total):
+                c.add(seconds, prompt_tokens, completion_tokens, cached, error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total": self._total.snapshot(),
+                "by_model": {key: counter.snapshot() for key, counter in sorted(self._by_model.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._total = _Counter()
+            self._by_model = {}
+
+
+METRICS = LLMMetrics()